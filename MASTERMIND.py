@@ -1,4 +1,8 @@
 
+# Startup profiling (enabled with --profile-startup or MASTERMIND_PROFILE_STARTUP)
+import startup_profiler
+startup_profiler.enable_from_environment()
+
 # Auto-Configuration for config.json
 import os
 import json
@@ -15,7 +19,8 @@ def auto_configure():
         logging.info('config.json already exists. Skipping auto-configuration.')
 
 # Calling auto-configuration function during the initialization
-auto_configure()
+with startup_profiler.section("config", "auto_configure"):
+    auto_configure()
 
 # MASTERMIND
 import logging
@@ -58,7 +63,7 @@ class MASTERMIND:
         
     def load_config(self):
         try:
-            with open("config.json", "r") as f:
+            with startup_profiler.section("config", "load_config"), open("config.json", "r") as f:
                 self.config = json.load(f)
         except Exception as e:
             logging.error(f"Could not load config: {e}")
@@ -71,7 +76,8 @@ class MASTERMIND:
 
         try:
             agent_instance = agent_class()
-            agent_instance.initialize()
+            with startup_profiler.section("initialize", agent_name):
+                agent_instance.initialize()
             self.agent_store[agent_name] = agent_instance
         except Exception as e:
             logging.error(f"Failed to load agent {agent_name}: {e}")
@@ -155,6 +161,7 @@ class SimpleAgent(AgentInterface):
 if __name__ == "__main__":
     mastermind = MASTERMIND()
     mastermind.load_agent("SimpleAgent", SimpleAgent)
+    startup_profiler.finish()
     mastermind.execute_agents()
     save_data_store(mastermind)
     mastermind.monitor_resources()
@@ -3,6 +3,9 @@ MASTERMIND Cognitive Framework v3.1
 Production-Grade Autonomous Agent Orchestration System
 """
 
+import startup_profiler
+startup_profiler.enable_from_environment()
+
 import os
 import sys
 import asyncio
@@ -247,6 +250,7 @@ async def main():
         # Register agents
         coder = SimpleCoder()
         await controller.add_agent(coder)
+        startup_profiler.finish()
         
         # Keep alive
         while True:
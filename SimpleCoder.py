@@ -1,80 +1,147 @@
+import os
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from activitylog import ActivityLog
+from coder_templates import DEFAULT_REGISTRY
+
 class SimpleCoder:
-    def __init__(self):
+    def __init__(self, templates=DEFAULT_REGISTRY, log_path=None):
         self.name = "SimpleCoder"
-        self.supported_languages = [
-            'Python', 'JavaScript', 'Go', 'Ruby', 
-            'Bash', 'Perl', 'HTML', 'Markup', 'AIML', 'CSS', 'Three.js', 'Solidity', 'PyTeal', 'Scilla'
-        ]
-        self.activity_log = []
+        # Templates are compiled once at import time and shared by every SimpleCoder
+        self.templates = templates
+        self.supported_languages = sorted(templates.languages)
+        # Append-only JSONL log; only the most recent entries are kept in memory
+        self.activity_log = ActivityLog(log_path or f"{self.name}_activity_log.jsonl", max_entries=1000)
         
     def validate_input(self, language, task):
-        if language not in self.supported_languages:
+        if not self.templates.has_language(language):
             return False, f"Language {language} is not supported."
-        if task not in ['hello_world']:
+        if not self.templates.has_task(task):
             return False, f"Task {task} is not supported."
+        if not self.templates.supports(language, task):
+            return False, f"Task {task} is not supported for {language}."
         return True, "Input is valid."
     
-    def execute_task(self, language, task):
+    def execute_task(self, language, task, params=None):
         try:
             is_valid, message = self.validate_input(language, task)
             if not is_valid:
                 return message
             
-            # Code snippets for various languages
-            code_snippets = {
-                'Python': "print('Hello, World!')",
-                'JavaScript': "console.log('Hello, World!');",
-                'Go': 'fmt.Println("Hello, World!")',
-                'Ruby': 'puts "Hello, World!"',
-                'Bash': 'echo "Hello, World!"',
-                'Perl': 'print "Hello, World!\\n";',
-                'HTML': '<h1>Hello, World!</h1>',
-                'Markup': '# Hello, World!',
-                'AIML': '<category><pattern>HELLO</pattern><template>World!</template></category>',
-                'CSS': '/* Hello, World! */',
-                'Three.js': 'console.log("Three.js Hello, World!");',
-                'Solidity': '/* Solidity Hello, World! */',
-                'PyTeal': '# PyTeal Hello, World!',
-                'Scilla': '(* Scilla Hello, World! *)'
-            }
-            
-            code = code_snippets.get(language, "Language not supported.")
+            code = self.templates.render(language, task, params)
             
-            self.activity_log.append({'language': language, 'task': task, 'code': code})
-            self.save_log()
+            entry = {'language': language, 'task': task, 'code': code}
+            if params:
+                entry['params'] = params
+            self.activity_log.append(entry)
             return code
         
         except Exception as e:
             return f"An error occurred: {e}"
 
+    def _render_unique(self, key):
+        language, task, params = key
+        is_valid, message = self.validate_input(language, task)
+        if not is_valid:
+            return False, message
+        try:
+            return True, self.templates.render(language, task, dict(params))
+        except Exception as e:
+            return False, f"An error occurred: {e}"
+
+    def execute_tasks(self, requests, max_workers=None):
+        """Generate code for many (language, task[, params]) requests, returned in request order.
+
+        Identical requests are rendered once, unique requests are rendered on a bounded
+        thread pool and the activity log is written in a single batch.
+        """
+        keys = []
+        for request in requests:
+            language, task = request[0], request[1]
+            params = request[2] if len(request) > 2 and request[2] else {}
+            keys.append((language, task, tuple(sorted(params.items()))))
+        unique = list(dict.fromkeys(keys))
+        if len(unique) > 1:
+            workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                rendered = dict(zip(unique, executor.map(self._render_unique, unique,
+                                                         chunksize=max(1, len(unique) // (workers * 4)))))
+        else:
+            rendered = {key: self._render_unique(key) for key in unique}
+
+        results, entries = [], []
+        for key in keys:
+            ok, code = rendered[key]
+            results.append(code)
+            if ok:
+                entry = {'language': key[0], 'task': key[1], 'code': code}
+                if key[2]:
+                    entry['params'] = dict(key[2])
+                entries.append(entry)
+        self.activity_log.extend(entries)
+        return results
+
     def save_log(self):
-        with open(f"{self.name}_activity_log.json", "w") as f:
-            json.dump(self.activity_log, f)
+        self.activity_log.flush(fsync=True)
+
+def benchmark_execute_tasks(n=10**5, distinct=1000, max_workers=None, coder_class=SimpleCoder):
+    """Compare sequential execute_task with execute_tasks on n requests and print requests/second."""
+    languages = sorted(DEFAULT_REGISTRY.languages)
+    requests = [(languages[i % len(languages)], 'comment', {'text': f"note {i % distinct}"}) for i in range(n)]
+    with tempfile.TemporaryDirectory() as directory:
+        coder = coder_class(log_path=os.path.join(directory, 'sequential.jsonl'))
+        start = time.perf_counter()
+        sequential = [coder.execute_task(*request) for request in requests]
+        sequential_seconds = time.perf_counter() - start
+        coder.activity_log.close()
+
+        coder = coder_class(log_path=os.path.join(directory, 'batch.jsonl'))
+        coder.templates.clear_cache()
+        start = time.perf_counter()
+        batch = coder.execute_tasks(requests, max_workers=max_workers)
+        batch_seconds = time.perf_counter() - start
+        coder.activity_log.close()
+    assert batch == sequential
+    print(f"execute_task:  {n / sequential_seconds:12,.0f} requests/s ({sequential_seconds:.3f}s)")
+    print(f"execute_tasks: {n / batch_seconds:12,.0f} requests/s ({batch_seconds:.3f}s)")
+    return {'sequential_seconds': sequential_seconds, 'batch_seconds': batch_seconds}
 
 # Create a SimpleCoder agent
 agent = SimpleCoder()
 
-# Execute tasks and display the generated code
-print(agent.execute_task('Python', 'hello_world'))
-print(agent.execute_task('JavaScript', 'hello_world'))
-print(agent.execute_task('HTML', 'hello_world'))
-print(agent.execute_task('Solidity', 'hello_world'))
+# Execute tasks in one batch and display the generated code
+for code in agent.execute_tasks([('Python', 'hello_world'), ('JavaScript', 'hello_world'),
+                                 ('HTML', 'hello_world'), ('Solidity', 'hello_world')]):
+    print(code)
+from skills import AsyncSkillRunner, BashSkill, PythonSkill, SubprocessSkill
+from pyworkers import PythonWorkerPool
+from history_store import HistoryStore
+
 class SimpleCoder:
     def __init__(self):
         self.skills = {
             'bash': BashSkill(),
-            'python': PythonSkill(),
+            'python': PythonSkill(pool=PythonWorkerPool(size=2, preload=['json', 'math', 're'])),
         }
-        self.history = []
+        # Indexed, bounded history; queried page by page instead of held in memory
+        self.history = HistoryStore("SimpleCoder_history.sqlite3")
         self.name = None
+        # Subprocess skills run on a background event loop so the console stays responsive
+        self.runner = AsyncSkillRunner(max_concurrency=4, default_timeout=300)
 
     # New: history feature
-    def display_history(self):
-        for i, item in enumerate(self.history):
-            print(f"{i+1}. {item['task']} -> {item['param']}")
+    def display_history(self, skill=None, after_id=None, page_size=20):
+        """Print one page of history and return the id to pass as `after_id` for the next page."""
+        page = self.history.query(skill=skill, after_id=after_id, limit=page_size)
+        for item in page:
+            print(f"{item['id']}. {item['task']} -> {item['param']}")
+        return page[-1]['id'] if len(page) == page_size else None
 
     def set_name(self, name):
         self.name = name
+        self.history.close()
+        self.history = HistoryStore(f"{name}_history.sqlite3")
 
     def add_skill(self, name, skill):
         self.skills[name] = skill
@@ -82,19 +149,31 @@ class SimpleCoder:
     def execute_task(self, task, param):
         skill = self.skills.get(task)
         if skill:
-            skill.execute(param)
-            self.history.append({'task': task, 'param': param})
+            job_id = None
+            if isinstance(skill, SubprocessSkill):
+                job_id = self.runner.start().submit(
+                    skill, param, on_line=lambda stream, line: print(f"[{task}] {line}"))
+                print(f"Started job {job_id} for skill '{task}'.")
+            else:
+                skill.execute(param)
+            self.history.append(task, param)
             logging.info(f"Executed task: {task} with param: {param}")
+            return job_id
         else:
             print(f"Skill '{task}' not found.")
 
+    def cancel_job(self, job_id):
+        if self.runner.cancel(job_id):
+            print(f"Cancelled job {job_id}.")
+        else:
+            print(f"Job {job_id} is not running.")
+
     def export_config(self, filename):
-        with open(filename, 'w') as f:
-            json.dump(self.history, f)
+        self.history.export_jsonl(filename)
 
     def import_config(self, filename):
-        with open(filename, 'r') as f:
-            self.history = json.load(f)
+        self.history.clear()
+        self.history.import_jsonl(filename)
 
     def display_ui(self):
         print("SimpleCoder Console")
@@ -102,20 +181,37 @@ class SimpleCoder:
         for skill in self.skills.keys():
             print(f" - {skill}")
         while True:
-            task = input("Enter the skill you want to use or 'q' to quit: ")
+            task = input("Enter the skill you want to use, 'history', 'jobs', 'cancel' or 'q' to quit: ")
             if task == 'q':
                 break
+            if task == 'history':
+                after_id = self.display_history()
+                while after_id is not None and input("More? (y/n): ") == 'y':
+                    after_id = self.display_history(after_id=after_id)
+                continue
+            if task == 'jobs':
+                print(f"Running jobs: {sorted(self.runner.jobs) or 'none'}")
+                continue
+            if task == 'cancel':
+                job_id = input("Enter the job id to cancel: ")
+                if job_id.isdigit():
+                    self.cancel_job(int(job_id))
+                continue
             param = input("Enter parameter (if any) or press Enter: ")
             self.execute_task(task, param)
 
+from agent_registry import AGENT_REGISTRY, preload_from_config
+
 class MASTERMIND:
-    def __init__(self):
+    def __init__(self, registry=AGENT_REGISTRY):
         self.agents = {}
+        # Agent classes are resolved once; config.json "preload_agents" warms them in the background
+        self.registry = registry
+        preload_from_config(self.registry)
 
     # New: Dynamic agent loading
     def load_agent(self, agent_name, agent_module):
-        AgentClass = getattr(import_module(agent_module), agent_name)
-        agent = AgentClass()
+        agent = self.registry.create(agent_module, agent_name)
         self.agents[agent_name] = agent
 
     def create_agent(self, agent_name, agent_class):
@@ -309,38 +405,241 @@ def write_text_file(file_path, text):
 from hflocal import get_hf_llm, confirm_action
 hf.py
 
+"""
+Select, download and load GGUF models from the Hugging Face Hub for local execution.
+
+`get_hf_llm` is the interactive loader. It lists a repo's GGUF files, asks
+for a quality level and GPU use, offers to download the model, and offers
+to install llama-cpp-python.
+
+`load_hf_llm` never prompts and is what `get_hf_llm(auto_select=True)` and
+`LocalChatClient.load` use. The model is picked by
+`model_bench.auto_select_model` within the host's budget. When the Hub
+cannot be reached, or HF_HUB_OFFLINE is set, only models already in the
+local model index are considered and nothing is downloaded. Every failure
+raises `LocalModelError` with a message that says what to do next, instead
+of asking.
+"""
+
 import os
 import sys
-import appdirs
+import logging
 import traceback
-import inquirer
 import subprocess
-from rich import print
-from rich.markdown import Markdown
-import os
-import inquirer
-from huggingface_hub import list_files_info, hf_hub_download
+from typing import Dict, List, Optional, Union
+
+from model_index import ModelIndex, combine_splits, default_model_index, default_models_dir
+from model_download import hf_download
+from model_bench import Budget, NoModelFitsError, auto_select_model, ensure_fits
+
+BYTES_PER_GB = 1024 ** 3
+RAM_OVERHEAD_GB = 2.5
+
+
+class LocalModelError(Exception):
+    """Raised when no local model can be resolved or loaded without user interaction."""
+
+
+def hub_offline() -> bool:
+    """True when huggingface_hub is configured not to use the network."""
+    return os.environ.get("HF_HUB_OFFLINE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def list_gguf_files(repo_id: str, interactive: bool = True) -> List[Dict[str, Union[str, float]]]:
+    """
+    Fetch all files from a given repository on Hugging Face Model Hub that contain 'gguf'.
+
+    :param repo_id: Repository ID on Hugging Face Model Hub.
+    :param interactive: Offer to log in when the repository needs authentication; otherwise raise.
+    :return: A list of dictionaries, each dictionary containing filename, size, and RAM usage of a model.
+    """
+    from huggingface_hub import list_files_info, login
+
+    try:
+        files_info = list_files_info(repo_id=repo_id)
+    except Exception as e:
+        if not interactive or "authentication" not in str(e).lower():
+            raise
+        print("You likely need to be logged in to HuggingFace to access this language model.")
+        print(f"Visit this URL to log in and apply for access to this language model: https://huggingface.co/{repo_id}")
+        print("Then, log in here:")
+        login()
+        files_info = list_files_info(repo_id=repo_id)
+
+    gguf_files = sorted((file for file in files_info if "gguf" in file.rfilename), key=lambda x: x.size)
+
+    result = []
+    for file in gguf_files:
+        size_in_gb = file.size / BYTES_PER_GB
+        lfs = getattr(file, "lfs", None)
+        result.append({
+            "filename": file.rfilename,
+            "Size": size_in_gb,
+            "RAM": size_in_gb + RAM_OVERHEAD_GB,
+            "sha256": lfs.get("sha256") if isinstance(lfs, dict) else getattr(lfs, "sha256", None),
+        })
+    return result
+
+
+def local_gguf_files(repo_id: str, index: ModelIndex) -> List[Dict[str, Union[str, float]]]:
+    """Indexed models whose filenames match `repo_id`, in the same shape as `list_gguf_files`.
+
+    TheBloke-style repos name their files after the repo, e.g.
+    `TheBloke/CodeLlama-7B-Instruct-GGUF` holds `codellama-7b-instruct.Q4_K_M.gguf`.
+    """
+    stem = repo_id.split("/")[-1].lower()
+    if stem.endswith("-gguf"):
+        stem = stem[:-len("-gguf")]
+    result = []
+    for filename, entry in index.entries.items():
+        if entry.get("split_of") or not filename.lower().startswith(stem):
+            continue
+        if index.lookup(filename, rescan=False) is None:
+            continue
+        size_in_gb = entry["size"] / BYTES_PER_GB
+        result.append({"filename": filename, "Size": size_in_gb, "RAM": size_in_gb + RAM_OVERHEAD_GB,
+                       "sha256": entry.get("sha256")})
+    return sorted(result, key=lambda model: model["Size"])
+
+
+def group_and_combine_splits(models: List[Dict[str, Union[str, float]]]) -> List[Dict[str, Union[str, float]]]:
+    """
+    Groups filenames based on their base names and combines the sizes and RAM requirements.
+
+    :param models: List of model details.
+    :return: A list of combined model details.
+    """
+    grouped_files = {}
+
+    for model in models:
+        base_name = model["filename"].split('-split-')[0]
+
+        if base_name in grouped_files:
+            grouped_files[base_name]["Size"] += model["Size"]
+            grouped_files[base_name]["RAM"] += model["RAM"]
+            grouped_files[base_name]["SPLITS"].append(model["filename"])
+        else:
+            grouped_files[base_name] = {
+                "filename": base_name,
+                "Size": model["Size"],
+                "RAM": model["RAM"],
+                "SPLITS": [model["filename"]]
+            }
 
+    return list(grouped_files.values())
 
-def get_hf_llm(repo_id, debug_mode, context_window):
+
+def actually_combine_files(base_name: str, files: List[str], expected: Optional[Dict[str, str]] = None) -> str:
+    """
+    Combines files together and deletes the original split files once the result verifies.
+
+    :param base_name: The base name for the combined file.
+    :param files: List of files to be combined.
+    :param expected: Optional SHA-256 per split file, e.g. from the Hugging Face LFS metadata.
+    :return: The SHA-256 of the combined file.
+    """
+    return combine_splits(base_name, files, expected)
+
+
+def download_model(repo_id: str, selected_model: str, raw_models: List[Dict], index: ModelIndex,
+                   models_dir: str) -> str:
+    """Download `selected_model` (joining its splits, if any) into `models_dir` and index it; returns its path."""
+    download_path = os.path.join(models_dir, selected_model)
+    split_files = [model["filename"] for model in raw_models if selected_model in model["filename"]]
+    expected_sha256 = {model["filename"]: model.get("sha256") for model in raw_models}
+
+    if len(split_files) > 1:
+        for split_file in split_files:
+            hf_download(repo_id, split_file, models_dir, sha256=expected_sha256.get(split_file))
+        expected = {os.path.join(models_dir, split_file): expected_sha256.get(split_file)
+                    for split_file in split_files}
+        combined_sha256 = actually_combine_files(download_path, list(expected), expected)
+    else:
+        combined_sha256 = hf_download(repo_id, selected_model, models_dir, sha256=expected_sha256.get(selected_model))
+
+    index.add(download_path, splits=split_files if len(split_files) > 1 else None, sha256=combined_sha256)
+    index.save()
+    return download_path
+
+
+def load_hf_llm(repo_id: str, context_window: int = 4096, budget: Optional[Budget] = None,
+                offline: Optional[bool] = None, verbose: bool = False):
+    """Pick, fetch if needed and load a model from `repo_id` without prompting.
+
+    Raises LocalModelError when llama-cpp-python is missing, when no model is
+    available offline, or when no model fits the budget.
+    """
+    try:
+        from llama_cpp import Llama
+    except ImportError:
+        raise LocalModelError("llama-cpp-python is not installed. Install it with `pip install llama-cpp-python` "
+                              "(see its README for GPU builds), then try again.")
+
+    index = default_model_index()
+    index.scan()
+    offline = hub_offline() if offline is None else offline
+    raw_models = None
+    if not offline:
+        try:
+            raw_models = list_gguf_files(repo_id, interactive=False)
+        except Exception as e:
+            logging.warning(f"Could not list `{repo_id}` on the Hugging Face Hub, using local models only: {e}")
+
+    if raw_models is None:
+        candidates = local_gguf_files(repo_id, index)
+        if not candidates:
+            raise LocalModelError(f"The Hugging Face Hub is offline or unreachable, and no model from `{repo_id}` is in the "
+                                  f"local model index. Copy a GGUF file into {default_models_dir()}, or pass the "
+                                  f"path of a model file.")
+    elif not raw_models:
+        raise LocalModelError(f"There are no GGUF files in `{repo_id}`.")
+    else:
+        candidates = group_and_combine_splits(raw_models)
+
+    try:
+        selected_model = auto_select_model(candidates, budget)
+        model_path = index.lookup(selected_model, rescan=False)
+        if model_path is None:
+            logging.info(f"Downloading {selected_model} from `{repo_id}`")
+            model_path = download_model(repo_id, selected_model, raw_models, index, default_models_dir())
+            # The choice was based on estimates; measure the real thing before using it
+            ensure_fits(model_path, budget)
+    except NoModelFitsError as e:
+        raise LocalModelError(f"No model in `{repo_id}` fits this host: {e}") from e
+
+    logging.info(f"Loading local model {model_path}")
+    return Llama(model_path=model_path, n_gpu_layers=0, verbose=verbose, n_ctx=context_window)
+
+
+def get_hf_llm(repo_id, debug_mode, context_window, auto_select=False, budget=None):
+    from rich import print
+    from rich.markdown import Markdown
+
+    if auto_select:
+        # Non-interactive: benchmark what is on this host and pick the best model within budget
+        try:
+            return load_hf_llm(repo_id, context_window, budget, verbose=debug_mode)
+        except LocalModelError as e:
+            print(str(e))
+            return None
+
+    import inquirer
 
     if "TheBloke/CodeLlama-" not in repo_id:
-      # ^ This means it was prob through the old --local, so we have already displayed this message.
-      # Hacky. Not happy with this
-      print('', Markdown(f"**Open Interpreter** will use `{repo_id}` for local execution. Use your arrow keys to set up the model."), '')
+        # ^ This means it was prob through the old --local, so we have already displayed this message.
+        # Hacky. Not happy with this
+        print('', Markdown(f"**Open Interpreter** will use `{repo_id}` for local execution. Use your arrow keys to set up the model."), '')
 
     raw_models = list_gguf_files(repo_id)
-    
+
     if not raw_models:
         print(f"Failed. Are you sure there are GGUF files in `{repo_id}`?")
         return None
 
     combined_models = group_and_combine_splits(raw_models)
 
-    selected_model = None
-
     # First we give them a simple small medium large option. If they want to see more, they can.
-
+    selected_model = None
     if len(combined_models) > 3:
 
         # Display Small Medium Large options to user
@@ -358,8 +657,8 @@ def get_hf_llm(repo_id, debug_mode, context_window):
             selected_model = combined_models[len(combined_models) // 2]["filename"]
         elif answers["selected_model"].startswith("Large"):
             selected_model = combined_models[-1]["filename"]
-    
-    if selected_model == None:
+
+    if selected_model is None:
         # This means they either selected See More,
         # Or the model only had 1 or 2 options
 
@@ -374,60 +673,29 @@ def get_hf_llm(repo_id, debug_mode, context_window):
 
     # Third stage: GPU confirm
     if confirm_action("Use GPU? (Large models might crash on GPU, but will run more quickly)"):
-      n_gpu_layers = -1
+        n_gpu_layers = -1
     else:
-      n_gpu_layers = 0
-
-    # Get user data directory
-    user_data_dir = appdirs.user_data_dir("Open Interpreter")
-    default_path = os.path.join(user_data_dir, "models")
+        n_gpu_layers = 0
 
-    # Ensure the directory exists
+    default_path = default_models_dir()
     os.makedirs(default_path, exist_ok=True)
 
-    # Define the directories to check
-    directories_to_check = [
-        default_path,
-        "llama.cpp/models/",
-        os.path.expanduser("~") + "/llama.cpp/models/",
-        "/"
-    ]
+    # Resolve the model through the local index instead of probing each directory
+    index = default_model_index()
+    model_path = index.lookup(selected_model)
 
-    # Check for the file in each directory
-    for directory in directories_to_check:
-        path = os.path.join(directory, selected_model)
-        if os.path.exists(path):
-            model_path = path
-            break
-    else:
+    if model_path is None:
         # If the file was not found, ask for confirmation to download it
-        download_path = os.path.join(default_path, selected_model)
-      
         print(f"This language model was not found on your system.\n\nDownload to `{default_path}`?", "")
         if confirm_action(""):
-          
-            # Check if model was originally split
-            split_files = [model["filename"] for model in raw_models if selected_model in model["filename"]]
-            
-            if len(split_files) > 1:
-                # Download splits
-                for split_file in split_files:
-                    hf_hub_download(repo_id=repo_id, filename=split_file, local_dir=default_path, local_dir_use_symlinks=False)
-                
-                # Combine and delete splits
-                actually_combine_files(selected_model, split_files)
-            else:
-                hf_hub_download(repo_id=repo_id, filename=selected_model, local_dir=default_path, local_dir_use_symlinks=False)
-
-            model_path = download_path
-        
+            model_path = download_model(repo_id, selected_model, raw_models, index, default_path)
         else:
             print('\n', "Download cancelled. Exiting.", '\n')
             return None
 
     # This is helpful for folks looking to delete corrupted ones and such
     print(Markdown(f"Model found at `{model_path}`"))
-  
+
     try:
         from llama_cpp import Llama
     except:
@@ -436,11 +704,11 @@ def get_hf_llm(repo_id, debug_mode, context_window):
         # Ask for confirmation to install the required pip package
         message = "Local LLM interface package not found. Install `llama-cpp-python`?"
         if confirm_action(message):
-            
+
             # We're going to build llama-cpp-python correctly for the system we're on
 
             import platform
-            
+
             def check_command(command):
                 try:
                     subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
@@ -449,12 +717,12 @@ def get_hf_llm(repo_id, debug_mode, context_window):
                     return False
                 except FileNotFoundError:
                     return False
-            
+
             def install_llama(backend):
                 env_vars = {
                     "FORCE_CMAKE": "1"
                 }
-                
+
                 if backend == "cuBLAS":
                     env_vars["CMAKE_ARGS"] = "-DLLAMA_CUBLAS=on"
                 elif backend == "hipBLAS":
@@ -463,12 +731,12 @@ def get_hf_llm(repo_id, debug_mode, context_window):
                     env_vars["CMAKE_ARGS"] = "-DLLAMA_METAL=on"
                 else:  # Default to OpenBLAS
                     env_vars["CMAKE_ARGS"] = "-DLLAMA_BLAS=ON -DLLAMA_BLAS_VENDOR=OpenBLAS"
-                
+
                 try:
                     subprocess.run([sys.executable, "-m", "pip", "install", "llama-cpp-python"], env=env_vars, check=True)
                 except subprocess.CalledProcessError as e:
                     print(f"Error during installation with {backend}: {e}")
-            
+
             def supports_metal():
                 # Check for macOS version
                 if platform.system() == "Darwin":
@@ -477,7 +745,7 @@ def get_hf_llm(repo_id, debug_mode, context_window):
                     if mac_version >= (10, 11):
                         return True
                 return False
-            
+
             # Check system capabilities
             if check_command(["nvidia-smi"]):
                 install_llama("cuBLAS")
@@ -487,7 +755,7 @@ def get_hf_llm(repo_id, debug_mode, context_window):
                 install_llama("Metal")
             else:
                 install_llama("OpenBLAS")
-          
+
             from llama_cpp import Llama
             print('', Markdown("Finished downloading `Code-Llama` interface."), '')
 
@@ -505,7 +773,7 @@ def get_hf_llm(repo_id, debug_mode, context_window):
                     print("2. Install it:")
                     print("bash Miniforge3-MacOSX-arm64.sh")
                     print("")
-      
+
         else:
             print('', "Installation cancelled. Exiting.", '')
             return None
@@ -513,10 +781,13 @@ def get_hf_llm(repo_id, debug_mode, context_window):
     # Initialize and return Code-Llama
     assert os.path.isfile(model_path)
     llama_2 = Llama(model_path=model_path, n_gpu_layers=n_gpu_layers, verbose=debug_mode, n_ctx=context_window)
-      
+
     return llama_2
 
+
 def confirm_action(message):
+    import inquirer
+
     question = [
         inquirer.Confirm('confirm',
                          message=message,
@@ -527,91 +798,7 @@ def confirm_action(message):
     return answers['confirm']
 
 
-
-import os
-import inquirer
-from huggingface_hub import list_files_info, hf_hub_download, login
-from typing import Dict, List, Union
-
-def list_gguf_files(repo_id: str) -> List[Dict[str, Union[str, float]]]:
-    """
-    Fetch all files from a given repository on Hugging Face Model Hub that contain 'gguf'.
-
-    :param repo_id: Repository ID on Hugging Face Model Hub.
-    :return: A list of dictionaries, each dictionary containing filename, size, and RAM usage of a model.
-    """
-
-    try:
-      files_info = list_files_info(repo_id=repo_id)
-    except Exception as e:
-      if "authentication" in str(e).lower():
-        print("You likely need to be logged in to HuggingFace to access this language model.")
-        print(f"Visit this URL to log in and apply for access to this language model: https://huggingface.co/{repo_id}")
-        print("Then, log in here:")
-        login()
-        files_info = list_files_info(repo_id=repo_id)
-  
-    gguf_files = [file for file in files_info if "gguf" in file.rfilename]
-
-    gguf_files = sorted(gguf_files, key=lambda x: x.size)
-
-    # Prepare the result
-    result = []
-    for file in gguf_files:
-        size_in_gb = file.size / (1024**3)
-        filename = file.rfilename
-        result.append({
-            "filename": filename,
-            "Size": size_in_gb,
-            "RAM": size_in_gb + 2.5,
-        })
-
-    return result
-
-from typing import List, Dict, Union
-
-def group_and_combine_splits(models: List[Dict[str, Union[str, float]]]) -> List[Dict[str, Union[str, float]]]:
-    """
-    Groups filenames based on their base names and combines the sizes and RAM requirements.
-
-    :param models: List of model details.
-    :return: A list of combined model details.
-    """
-    grouped_files = {}
-
-    for model in models:
-        base_name = model["filename"].split('-split-')[0]
-        
-        if base_name in grouped_files:
-            grouped_files[base_name]["Size"] += model["Size"]
-            grouped_files[base_name]["RAM"] += model["RAM"]
-            grouped_files[base_name]["SPLITS"].append(model["filename"])
-        else:
-            grouped_files[base_name] = {
-                "filename": base_name,
-                "Size": model["Size"],
-                "RAM": model["RAM"],
-                "SPLITS": [model["filename"]]
-            }
-
-    return list(grouped_files.values())
-
-
-def actually_combine_files(base_name: str, files: List[str]) -> None:
-    """
-    Combines files together and deletes the original split files.
-
-    :param base_name: The base name for the combined file.
-    :param files: List of files to be combined.
-    """
-    files.sort()    
-    with open(base_name, 'wb') as outfile:
-        for file in files:
-            with open(file, 'rb') as infile:
-                outfile.write(infile.read())
-            os.remove(file)
-
-def format_quality_choice(model, name_override = None) -> str:
+def format_quality_choice(model, name_override=None) -> str:
     """
     Formats the model choice for display in the inquirer prompt.
     """
@@ -625,35 +812,31 @@ def format_quality_choice(model, name_override = None) -> str:
 # HF_LLM End
 
 # AutoEpistemicAgent Start
+from epistemic import BeliefStore
+
 class AutoepistemicAgent:
     def __init__(self, initial_beliefs):
         # Input validation
         if not isinstance(initial_beliefs, set):
             raise TypeError("Initial beliefs must be a set")
         
-        self.beliefs = initial_beliefs
+        self.beliefs = BeliefStore(initial_beliefs)
 
     def add_information(self, new_information):
         # Input validation and sanitization
         if not isinstance(new_information, set):
             raise TypeError("New information must be a set")
         
-        # Update beliefs with new information
+        # Update beliefs with new information; conflicts are detected as each belief is added
         self.beliefs.update(new_information)
 
     def contradicts_new_information(self, belief):
-        # Placeholder for a real contradiction check
-        # Implement your logic here to check if the belief contradicts with new information
-        return 'not ' + belief in self.beliefs
+        # A belief is contradicted by its negation, e.g. 'p' by 'not p'
+        return self.beliefs.is_contradicted(belief)
 
     def revise_beliefs(self):
-        # Check if any conclusions based on default rules need to be retracted
-        beliefs_to_remove = set()
-        for belief in self.beliefs:
-            if self.contradicts_new_information(belief):
-                beliefs_to_remove.add(belief)
-        
-        self.beliefs.difference_update(beliefs_to_remove)
+        # Retract only the beliefs found in conflict, instead of rescanning every belief
+        return self.beliefs.apply_retractions()
 
 if __name__ == '__main__':
     try:
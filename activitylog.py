@@ -0,0 +1,178 @@
+"""
+Append-only JSONL activity log for MASTERMIND agents.
+
+Each entry is one JSON line. Writes are buffered and flushed when the buffer
+fills or every `flush_interval` seconds, whichever comes first, so logging an
+entry costs O(1) I/O instead of rewriting the whole history. The fsync policy is
+one of "always" (every flush), "interval" (at most every `fsync_interval`
+seconds) or "never". The file is rotated to `<path>.1`, `<path>.2`, ... once it
+grows past `max_bytes`, and only the last `max_entries` entries are kept in
+memory.
+
+A single background thread flushes every open log, and a single exit hook
+closes any logs still open, so short-lived logs do not add threads or
+exit hooks.
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import weakref
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_open_logs: "weakref.WeakSet[ActivityLog]" = weakref.WeakSet()
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_due() -> float:
+    """Flush every open log whose interval has elapsed; return how long to sleep."""
+    now = time.monotonic()
+    interval = 1.0
+    for log in list(_open_logs):
+        interval = min(interval, log.flush_interval)
+        if now >= log._next_flush:
+            try:
+                log.flush()
+            except Exception as e:
+                logging.error(f"Failed to flush activity log {log.path}: {e}")
+    return interval
+
+
+def _flush_loop():
+    while True:
+        time.sleep(_flush_due())
+
+
+def _start_flusher():
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="ActivityLogFlusher", daemon=True)
+            _flusher.start()
+
+
+@atexit.register
+def _close_open_logs():
+    for log in list(_open_logs):
+        log.close()
+
+
+class ActivityLog:
+    """Buffered, rotating JSONL log with an in-memory ring buffer of recent entries."""
+
+    def __init__(self, path: str, max_entries: int = 1000, buffer_size: int = 64,
+                 flush_interval: float = 1.0, fsync: str = "interval", fsync_interval: float = 5.0,
+                 max_bytes: int = 10 * 1024 * 1024, backups: int = 3):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.path = path
+        self.recent = deque(maxlen=max_entries)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._pending: List[str] = []
+        self._lock = threading.RLock()
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._last_fsync = time.monotonic()
+        self._next_flush = self._last_fsync + flush_interval
+        _open_logs.add(self)
+        _start_flusher()
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Record one entry."""
+        self.extend((entry,))
+
+    def extend(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Record several entries with a single buffer update."""
+        lines = []
+        with self._lock:
+            for entry in entries:
+                self.recent.append(entry)
+                lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._pending.extend(lines)
+            if len(self._pending) >= self.buffer_size:
+                self.flush()
+
+    def flush(self, fsync: bool = False) -> None:
+        """Write buffered entries; `fsync=True` forces them to stable storage."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._next_flush = time.monotonic() + self.flush_interval
+            if self._pending:
+                data = "".join(self._pending)
+                self._pending.clear()
+                if self._size and self._size + len(data) > self.max_bytes:
+                    self._rotate()
+                self._file.write(data)
+                self._file.flush()
+                self._size += len(data)
+            now = time.monotonic()
+            if fsync or self.fsync == "always" or (
+                    self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if self.backups == 0:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def close(self) -> None:
+        """Flush, fsync and close the log."""
+        _open_logs.discard(self)
+        with self._lock:
+            if not self._file.closed:
+                self.flush(fsync=self.fsync != "never")
+                self._file.close()
+
+    def __del__(self):
+        # A log dropped without close() still writes its buffered entries
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __len__(self):
+        return len(self.recent)
+
+    def __iter__(self):
+        return iter(list(self.recent))
+
+
+def iter_activity_log(path: str, include_rotated: bool = True,
+                      backups: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream entries oldest first without loading the log into memory."""
+    paths = []
+    if include_rotated:
+        index = 1
+        while (backups is None or index <= backups) and os.path.exists(f"{path}.{index}"):
+            paths.append(f"{path}.{index}")
+            index += 1
+        paths.reverse()
+    paths.append(path)
+    for log_path in paths:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
@@ -0,0 +1,114 @@
+"""
+Agent class registry for MASTERMIND.
+
+Each (module, class) pair is imported and resolved once and then served from a
+dictionary, so creating many agents of one class does not go back through the
+import machinery. A configured set of pairs can be preloaded at startup in a
+background thread. `create()` builds a fresh instance by default. It clones a
+per-class prototype instead of re-running `__init__` only when asked to, or
+when the class defines its own `clone()`, because a generic copy would share
+stores, pools and nested state between agents.
+"""
+
+import os
+import copy
+import json
+import logging
+import threading
+from importlib import import_module
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+CONTAINER_TYPES = (dict, list, set)
+
+
+class AgentRegistry:
+    """Caches resolved agent classes and prototype instances."""
+
+    def __init__(self):
+        self._classes: Dict[Tuple[str, str], type] = {}
+        self._prototypes: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, module_name: str, class_name: str) -> type:
+        """Return the class, importing its module only the first time it is requested."""
+        key = (module_name, class_name)
+        agent_class = self._classes.get(key)
+        if agent_class is None:
+            with self._lock:
+                agent_class = self._classes.get(key)
+                if agent_class is None:
+                    agent_class = getattr(import_module(module_name), class_name)
+                    self._classes[key] = agent_class
+        return agent_class
+
+    def preload(self, pairs: Iterable[Tuple[str, str]], background: bool = True) -> Optional[threading.Thread]:
+        """Resolve `pairs` ahead of time, in a daemon thread unless `background` is False."""
+        pairs = [tuple(pair) for pair in pairs]
+
+        def _preload():
+            for module_name, class_name in pairs:
+                try:
+                    self.resolve(module_name, class_name)
+                except Exception as e:
+                    logging.error(f"Failed to preload agent {module_name}.{class_name}: {e}")
+
+        if not background:
+            _preload()
+            return None
+        thread = threading.Thread(target=_preload, name="AgentRegistryPreload", daemon=True)
+        thread.start()
+        return thread
+
+    def prototype(self, module_name: str, class_name: str) -> Any:
+        """Return the shared prototype instance for a class, creating it on first use."""
+        key = (module_name, class_name)
+        prototype = self._prototypes.get(key)
+        if prototype is None:
+            agent_class = self.resolve(module_name, class_name)
+            with self._lock:
+                prototype = self._prototypes.get(key)
+                if prototype is None:
+                    prototype = self._prototypes[key] = agent_class()
+        return prototype
+
+    def create(self, module_name: str, class_name: str, clone: Optional[bool] = None) -> Any:
+        """Create an agent; `clone=None` clones the prototype only if the class defines `clone()`."""
+        agent_class = self.resolve(module_name, class_name)
+        if clone is None:
+            clone = callable(getattr(agent_class, "clone", None))
+        if clone:
+            return clone_agent(self.prototype(module_name, class_name))
+        return agent_class()
+
+
+def clone_agent(prototype: Any) -> Any:
+    """Cheap copy of an agent: containers are copied one level deep, everything else is shared.
+
+    Agents that need different semantics can define their own `clone()` method.
+    """
+    custom = getattr(prototype, "clone", None)
+    if callable(custom):
+        return custom()
+    if not hasattr(prototype, "__dict__"):
+        return copy.copy(prototype)
+    agent = object.__new__(type(prototype))
+    agent.__dict__.update({name: value.copy() if isinstance(value, CONTAINER_TYPES) else value
+                           for name, value in prototype.__dict__.items()})
+    return agent
+
+
+def preload_from_config(registry: "AgentRegistry", config_path: str = "config.json",
+                        key: str = "preload_agents") -> Optional[threading.Thread]:
+    """Preload the `[module, class]` pairs listed under `key` in config.json, if any."""
+    if not os.path.exists(config_path):
+        return None
+    try:
+        with open(config_path, "r") as f:
+            pairs = json.load(f).get(key, [])
+    except Exception as e:
+        logging.error(f"Could not read {key} from {config_path}: {e}")
+        return None
+    return registry.preload(pairs) if pairs else None
+
+
+AGENT_REGISTRY = AgentRegistry()
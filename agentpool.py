@@ -0,0 +1,243 @@
+"""
+Warm agent instance pools for the MASTERMIND controller.
+
+Agents that load models or open connections pay that cost in `initialize()`.
+Instead of calling `initialize()`/`shutdown()` around every `execute()`, the
+lifecycle manager keeps up to `size` initialized instances per agent, hands
+them out for concurrent runs, health-checks an idle instance before reuse and
+shuts down instances that stayed idle longer than `idle_ttl` seconds.
+
+An agent may define an optional `health_check()` method returning a truthy
+value while the instance is usable; agents without one are assumed healthy.
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import startup_profiler
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when acquiring from a pool that has been closed."""
+
+
+class AgentPool:
+    """Bounded pool of initialized instances of one agent class."""
+
+    def __init__(self, name: str, factory: Callable, size: int = 1, idle_ttl: float = 300.0):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.idle_ttl = idle_ttl
+        self.generation = 0
+        self.closed = False
+        self._idle: List[Tuple[object, float, int]] = []
+        self._owners: Dict[int, int] = {}
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def _create(self):
+        instance = self.factory()
+        with startup_profiler.section("initialize", self.name):
+            instance.initialize()
+        return instance
+
+    @staticmethod
+    def _shutdown(name, instance):
+        try:
+            instance.shutdown()
+        except Exception as e:
+            logging.error(f"Error shutting down pooled agent {name}: {e}")
+
+    @staticmethod
+    def _is_healthy(instance) -> bool:
+        check = getattr(instance, "health_check", None)
+        if check is None:
+            return True
+        try:
+            return bool(check())
+        except Exception as e:
+            logging.warning(f"Health check raised for {type(instance).__name__}: {e}")
+            return False
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Return a healthy initialized instance, creating one if the pool has room."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self.closed:
+                    raise PoolClosedError(f"Pool for agent {self.name} is closed.")
+                if self._idle:
+                    instance, _, generation = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    instance, generation = None, self.generation
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No pooled instance of {self.name} available.")
+                self._cond.wait(remaining)
+
+        if instance is not None and not self._is_healthy(instance):
+            logging.warning(f"Discarding unhealthy pooled instance of {self.name}.")
+            self._shutdown(self.name, instance)
+            instance = None
+        if instance is None:
+            try:
+                instance = self._create()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+        with self._cond:
+            self._owners[id(instance)] = generation
+        return instance
+
+    def release(self, instance, healthy: bool = True):
+        """Return an instance to the pool, or shut it down if it is stale or broken."""
+        with self._cond:
+            generation = self._owners.pop(id(instance), -1)
+            keep = healthy and not self.closed and generation == self.generation
+            if keep:
+                self._idle.append((instance, time.monotonic(), generation))
+            else:
+                self._created -= 1
+            self._cond.notify()
+        if not keep:
+            self._shutdown(self.name, instance)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Context manager wrapping `acquire()`/`release()`."""
+        instance = self.acquire(timeout)
+        healthy = True
+        try:
+            yield instance
+        except Exception:
+            healthy = self._is_healthy(instance)
+            raise
+        finally:
+            self.release(instance, healthy)
+
+    def _drain(self, predicate) -> List[object]:
+        """Remove idle instances matching `predicate`; caller shuts them down outside the lock."""
+        with self._cond:
+            keep, drop = [], []
+            for entry in self._idle:
+                (drop if predicate(entry) else keep).append(entry)
+            self._idle = keep
+            self._created -= len(drop)
+            self._cond.notify_all()
+        return [instance for instance, _, _ in drop]
+
+    def prewarm(self, count: int = 1):
+        """Initialize idle instances until `count` are ready or the pool is full."""
+        while True:
+            with self._cond:
+                if self.closed or len(self._idle) >= count or self._created >= self.size:
+                    return
+                self._created += 1
+                generation = self.generation
+            try:
+                instance = self._create()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                raise
+            with self._cond:
+                self._idle.append((instance, time.monotonic(), generation))
+                self._cond.notify()
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Shut down idle instances older than the TTL and return how many were evicted."""
+        now = time.monotonic() if now is None else now
+        evicted = self._drain(lambda entry: now - entry[1] >= self.idle_ttl)
+        for instance in evicted:
+            self._shutdown(self.name, instance)
+        return len(evicted)
+
+    def replace_factory(self, factory: Callable):
+        """Swap the agent class; idle instances shut down now, leased ones on release."""
+        with self._cond:
+            self.factory = factory
+            self.generation += 1
+        for instance in self._drain(lambda entry: True):
+            self._shutdown(self.name, instance)
+
+    def close(self):
+        """Shut down idle instances and refuse further acquisitions."""
+        with self._cond:
+            self.closed = True
+        for instance in self._drain(lambda entry: True):
+            self._shutdown(self.name, instance)
+
+
+class AgentLifecycleManager:
+    """Keeps one AgentPool per agent and evicts idle instances in the background."""
+
+    def __init__(self, pool_size: int = 1, idle_ttl: float = 300.0, reap_interval: float = 30.0):
+        self.pool_size = pool_size
+        self.idle_ttl = idle_ttl
+        self.reap_interval = reap_interval
+        self.pools: Dict[str, AgentPool] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+    def register(self, agent_name: str, factory: Callable):
+        """Register an agent class, replacing the class of an existing pool in place."""
+        with self._lock:
+            pool = self.pools.get(agent_name)
+            if pool is None:
+                self.pools[agent_name] = AgentPool(agent_name, factory, self.pool_size, self.idle_ttl)
+                return
+        pool.replace_factory(factory)
+
+    def unregister(self, agent_name: str):
+        """Close and forget the pool of an agent."""
+        with self._lock:
+            pool = self.pools.pop(agent_name, None)
+        if pool is not None:
+            pool.close()
+
+    def lease(self, agent_name: str, timeout: Optional[float] = None):
+        """Lease a warm instance of `agent_name` for the duration of a `with` block."""
+        return self.pools[agent_name].lease(timeout)
+
+    def prewarm(self, count: int = 1):
+        """Initialize `count` instances of every registered agent, logging failures."""
+        for pool in list(self.pools.values()):
+            try:
+                pool.prewarm(count)
+            except Exception as e:
+                logging.error(f"Failed to prewarm agent {pool.name}: {e}")
+
+    def start_reaper(self):
+        """Start the background thread that evicts idle instances."""
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_loop, name="AgentPoolReaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._stop.wait(self.reap_interval):
+            for pool in list(self.pools.values()):
+                evicted = pool.evict_idle()
+                if evicted:
+                    logging.info(f"Evicted {evicted} idle instance(s) of {pool.name}")
+
+    def shutdown_all(self):
+        """Stop the reaper and shut down every pooled instance."""
+        self._stop.set()
+        if self._reaper is not None:
+            self._reaper.join()
+            self._reaper = None
+        with self._lock:
+            pools = list(self.pools.values())
+            self.pools.clear()
+        for pool in pools:
+            pool.close()
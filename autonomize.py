@@ -2,13 +2,14 @@
 import time
 import logging
 from typing import NoReturn, Any
+from retry import RetryPolicy
 
 # Setup basic logging
 logging.basicConfig(filename='autonomize.log', level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
 
-def exponential_backoff(attempt: int) -> int:
-    """Calculate sleep time using an exponential backoff strategy."""
-    return min(60, (2 ** attempt))  # Cap the backoff time to 60 seconds
+def task_retry_policy(attempts: int = 3) -> RetryPolicy:
+    """Decorrelated-jitter backoff starting at 1 second and capped at 60 seconds, drawing on the shared retry budget."""
+    return RetryPolicy(max_attempts=attempts, base=1.0, cap=60.0, name="automate_task")
 
 def automate_task() -> str:
     """
@@ -21,18 +22,13 @@ def automate_task() -> str:
 
 def resilient_function(attempts: int = 3) -> NoReturn:
     """
-    A self-healing function that attempts to execute a task up to a specified number of times with exponential backoff.
-    """
-    for attempt in range(1, attempts + 1):
-        try:
-            result = automate_task()
-            logging.info(f"Task succeeded on attempt {attempt} with result: {result}")
-            return
-        except Exception as e:
-            logging.warning(f"Attempt {attempt} failed with error: {e}")
-            time.sleep(exponential_backoff(attempt))
-    else:
-        logging.error(f"All {attempts} attempts failed. Initiating self-healing.")
+    A self-healing function that attempts to execute a task up to a specified number of times with jittered backoff.
+    """
+    try:
+        result = task_retry_policy(attempts).call(automate_task)
+        logging.info(f"Task succeeded with result: {result}")
+    except Exception as e:
+        logging.error(f"Task failed after retries ({e}). Initiating self-healing.")
         self_healing_procedure()
 
 def self_healing_procedure() -> NoReturn:
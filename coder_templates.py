@@ -0,0 +1,244 @@
+"""
+Template registry for SimpleCoder code generation.
+
+Templates are compiled once per (language, task) when the registry is built and
+use `string.Template` placeholders such as `$message`. Each template may carry
+default parameter values. Extra templates can be loaded from a directory laid
+out as `<dir>/<language>/<task>.tmpl`, with optional defaults in
+`<dir>/<language>/<task>.json`. Rendered snippets are memoized in an LRU cache
+keyed on (language, task, params).
+
+Parameter values are escaped for the place they are substituted into before
+rendering. String-literal placeholders such as `print($message)` receive a
+complete quoted literal for the language, and comment text cannot close its
+comment. A directory template can name an escaper from `ESCAPERS` under the
+`"__escape__"` key of its defaults file; otherwise its values are inserted
+verbatim.
+"""
+
+import os
+import html
+import json
+import shlex
+from functools import lru_cache
+from string import Template
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+TEMPLATE_DIR_ENV = "SIMPLECODER_TEMPLATES"
+
+HELLO_WORLD = {
+    'Python': "print('Hello, World!')",
+    'JavaScript': "console.log('Hello, World!');",
+    'Go': 'fmt.Println("Hello, World!")',
+    'Ruby': 'puts "Hello, World!"',
+    'Bash': 'echo "Hello, World!"',
+    'Perl': 'print "Hello, World!\\n";',
+    'HTML': '<h1>Hello, World!</h1>',
+    'Markup': '# Hello, World!',
+    'AIML': '<category><pattern>HELLO</pattern><template>World!</template></category>',
+    'CSS': '/* Hello, World! */',
+    'Three.js': 'console.log("Three.js Hello, World!");',
+    'Solidity': '/* Solidity Hello, World! */',
+    'PyTeal': '# PyTeal Hello, World!',
+    'Scilla': '(* Scilla Hello, World! *)'
+}
+
+PRINT_MESSAGE = {
+    'Python': "print($message)",
+    'JavaScript': "console.log($message);",
+    'Go': 'fmt.Println($message)',
+    'Ruby': 'puts $message',
+    'Bash': 'echo $message',
+    'Perl': 'print $message, "\\n";',
+    'HTML': '<p>$message</p>',
+    'Markup': '$message',
+    'Three.js': 'console.log($message);',
+}
+
+COMMENT = {
+    'Python': '# $text',
+    'JavaScript': '// $text',
+    'Go': '// $text',
+    'Ruby': '# $text',
+    'Bash': '# $text',
+    'Perl': '# $text',
+    'HTML': '<!-- $text -->',
+    'Markup': '<!-- $text -->',
+    'AIML': '<!-- $text -->',
+    'CSS': '/* $text */',
+    'Three.js': '// $text',
+    'Solidity': '// $text',
+    'PyTeal': '# $text',
+    'Scilla': '(* $text *)'
+}
+
+
+def json_string(value: str) -> str:
+    """Double-quoted literal valid in JavaScript and Go."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def single_quoted(value: str) -> str:
+    """Single-quoted literal for Ruby and Perl, where only \\ and \\' are escapes."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def line_comment(value: str) -> str:
+    return " ".join(value.splitlines())
+
+
+def block_comment(terminator: str) -> Callable[[str], str]:
+    """Escaper for text inside a block comment closed by `terminator`."""
+    broken = terminator[:-1] + " " + terminator[-1]
+    return lambda value: line_comment(value).replace(terminator, broken)
+
+
+ESCAPERS: Dict[str, Callable[[str], str]] = {
+    'python': repr,
+    'json': json_string,
+    'single_quoted': single_quoted,
+    'shell': shlex.quote,
+    'html': html.escape,
+    'line_comment': line_comment,
+    'html_comment': block_comment('-->'),
+    'c_comment': block_comment('*/'),
+    'ml_comment': block_comment('*)'),
+}
+
+STRING_LITERAL = {
+    'Python': repr,
+    'JavaScript': json_string,
+    'Go': json_string,
+    'Ruby': single_quoted,
+    'Bash': shlex.quote,
+    'Perl': single_quoted,
+    'HTML': html.escape,
+    'Three.js': json_string,
+}
+
+COMMENT_TEXT = {
+    'Python': line_comment,
+    'JavaScript': line_comment,
+    'Go': line_comment,
+    'Ruby': line_comment,
+    'Bash': line_comment,
+    'Perl': line_comment,
+    'HTML': ESCAPERS['html_comment'],
+    'Markup': ESCAPERS['html_comment'],
+    'AIML': ESCAPERS['html_comment'],
+    'CSS': ESCAPERS['c_comment'],
+    'Three.js': line_comment,
+    'Solidity': line_comment,
+    'PyTeal': line_comment,
+    'Scilla': ESCAPERS['ml_comment'],
+}
+
+
+class CodeTemplate:
+    """A compiled template for one (language, task) pair."""
+
+    def __init__(self, language: str, task: str, source: str, defaults: Optional[Dict[str, str]] = None,
+                 escape: Optional[Callable[[str], str]] = None):
+        self.language = language
+        self.task = task
+        self.template = Template(source)
+        self.defaults = dict(defaults or {})
+        self.escape = escape
+
+    def render(self, params: Optional[Dict[str, str]] = None) -> str:
+        values = dict(self.defaults)
+        if params:
+            values.update(params)
+        if self.escape is not None:
+            values = {name: self.escape(str(value)) for name, value in values.items()}
+        try:
+            return self.template.substitute(values)
+        except KeyError as e:
+            raise ValueError(f"Task {self.task} for {self.language} requires parameter {e.args[0]}.") from None
+
+
+class TemplateRegistry:
+    """Registry of compiled templates with O(1) language/task lookup and cached rendering."""
+
+    def __init__(self, cache_size: int = 4096):
+        self._templates: Dict[Tuple[str, str], CodeTemplate] = {}
+        self.languages: Set[str] = set()
+        self.tasks: Set[str] = set()
+        self._render_cached = lru_cache(maxsize=cache_size)(self._render)
+
+    def register(self, language: str, task: str, source: str, defaults: Optional[Dict[str, str]] = None,
+                 escape: Optional[Callable[[str], str]] = None):
+        """Compile and register a template, replacing any existing one."""
+        self._templates[(language, task)] = CodeTemplate(language, task, source, defaults, escape)
+        self.languages.add(language)
+        self.tasks.add(task)
+        self._render_cached.cache_clear()
+
+    def register_task(self, task: str, sources: Dict[str, str], defaults: Optional[Dict[str, str]] = None,
+                      escapers: Optional[Dict[str, Callable[[str], str]]] = None):
+        """Register one task for several languages, escaping values per language."""
+        for language, source in sources.items():
+            self.register(language, task, source, defaults, (escapers or {}).get(language))
+
+    def load_directory(self, directory: str) -> int:
+        """Load `<language>/<task>.tmpl` templates from `directory`; returns how many were loaded."""
+        loaded = 0
+        for language in sorted(os.listdir(directory)):
+            language_dir = os.path.join(directory, language)
+            if not os.path.isdir(language_dir):
+                continue
+            for filename in sorted(os.listdir(language_dir)):
+                if not filename.endswith('.tmpl'):
+                    continue
+                task = filename[:-5]
+                with open(os.path.join(language_dir, filename), 'r') as f:
+                    source = f.read().rstrip('\n')
+                defaults = {}
+                defaults_path = os.path.join(language_dir, f"{task}.json")
+                if os.path.exists(defaults_path):
+                    with open(defaults_path, 'r') as f:
+                        defaults = json.load(f)
+                escape = defaults.pop('__escape__', None)
+                if escape is not None and escape not in ESCAPERS:
+                    raise ValueError(f"Unknown escaper {escape} in {defaults_path}")
+                self.register(language, task, source, defaults, ESCAPERS.get(escape))
+                loaded += 1
+        return loaded
+
+    def has_language(self, language: str) -> bool:
+        return language in self.languages
+
+    def has_task(self, task: str) -> bool:
+        return task in self.tasks
+
+    def supports(self, language: str, task: str) -> bool:
+        return (language, task) in self._templates
+
+    def _render(self, language: str, task: str, params: Tuple[Tuple[str, str], ...]) -> str:
+        return self._templates[(language, task)].render(dict(params))
+
+    def render(self, language: str, task: str, params: Optional[Dict[str, str]] = None) -> str:
+        """Render a template; identical requests are served from the LRU cache."""
+        key = tuple(sorted(params.items())) if params else ()
+        return self._render_cached(language, task, key)
+
+    def cache_info(self):
+        return self._render_cached.cache_info()
+
+    def clear_cache(self):
+        self._render_cached.cache_clear()
+
+
+def build_default_registry(template_dirs: Iterable[str] = ()) -> TemplateRegistry:
+    """Build the registry with the built-in tasks plus any template directories."""
+    registry = TemplateRegistry()
+    registry.register_task('hello_world', HELLO_WORLD)
+    registry.register_task('print_message', PRINT_MESSAGE, {'message': 'Hello, World!'}, STRING_LITERAL)
+    registry.register_task('comment', COMMENT, escapers=COMMENT_TEXT)
+    for directory in template_dirs:
+        if os.path.isdir(directory):
+            registry.load_directory(directory)
+    return registry
+
+
+DEFAULT_REGISTRY = build_default_registry(filter(None, [os.environ.get(TEMPLATE_DIR_ENV)]))
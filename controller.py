@@ -14,11 +14,15 @@ Key Functionalities:
 1. **Directory Setup**: The `MASTERMIND` class automatically creates and manages three key directories: `agents`, `tools`, and `executor`. These directories are essential for organizing agent scripts based on their development stage and functionality.
 2. **Dynamic Agent Loading**: Agents are dynamically loaded from the `agents` and `tools` directories. This allows for the addition or removal of agent scripts without modifying the core controller code.
 3. **Concurrent Agent Execution**: Agents are executed concurrently, each in its own thread, enabling efficient utilization of system resources and parallel task processing.
+4. **Warm Agent Pools**: Agents are initialized once and kept in a per-agent pool of up to `pool_size` instances. Pooled instances are health-checked before reuse and shut down after `idle_ttl` seconds without work, so expensive `initialize()` work is not repeated on every run.
+5. **Sandboxed Execution**: When a `sandbox.SandboxPool` is passed to `MASTERMIND`, agent modules are never executed in the controller process. Each run happens in a pre-forked worker with CPU, memory and file-descriptor rlimits, its own working directory and a per-call timeout. The working directory is not a filesystem jail; use a separate user or a container to keep agents away from the rest of the system.
+6. **Startup Profiling**: Run with `--profile-startup[=path]` (or set `MASTERMIND_PROFILE_STARTUP=path`) to time every import, agent module load, `initialize()` call and config step. A sorted report is logged and a JSON file is written for comparison across releases.
+7. **Hot Reload**: `start_hot_reload()` watches the `agents` and `tools` directories and reloads only the agent module that changed, swapping its instance between runs while every other agent stays loaded.
 
 Usage Guide:
 ------------
 1. Implement agent classes in Python files and place them in the `agents` or `tools` directories. Ensure each agent class inherits from `AgentInterface` and implements all abstract methods.
-2. Run the `MASTERMINDcontroller.py` script. The controller will automatically load and execute all agents found in the designated directories.
+2. Run the `MASTERMINDcontroller.py` script. The controller will automatically load and execute all agents found in the designated directories. Pass `--sandbox` to run untrusted agents in the sandboxed worker pool.
 
 AgentInterface Methods:
 -----------------------
@@ -26,6 +30,7 @@ AgentInterface Methods:
 - `execute()`: Contains the main logic of the agent. This is where the agent performs its designated task.
 - `get_data()`: Retrieves any data or results produced during the agent's execution.
 - `shutdown()`: Cleans up resources and performs any necessary teardown activities post-execution.
+- `health_check()` (optional): Returns a truthy value while a pooled instance can be reused.
 
 Example:
 --------
@@ -48,6 +53,9 @@ To execute this agent, place its script in the `agents` directory and run the `M
 
 """
 
+import startup_profiler
+startup_profiler.enable_from_environment()
+
 import os
 import json
 import logging
@@ -56,6 +64,9 @@ from abc import ABC, abstractmethod
 import psutil
 import importlib.util
 import sys
+from hotreload import AgentReloader
+from agentpool import AgentLifecycleManager
+from sandbox import SandboxPool
 
 logging.basicConfig(level=logging.INFO)
 
@@ -85,12 +96,17 @@ class AgentInterface(ABC):
 class MASTERMIND:
     """Core class responsible for managing agent lifecycles within the MASTERMIND framework."""
 
-    def __init__(self):
+    def __init__(self, pool_size=1, idle_ttl=300.0, sandbox=None):
         self.agents = {}
+        self.agent_paths = {}
+        self.sandbox = sandbox
+        self.lifecycle = AgentLifecycleManager(pool_size=pool_size, idle_ttl=idle_ttl)
+        self.reloader = None
         self.directories = ["agents", "tools", "executor"]
         self._setup_directories()
         self._load_agents_from_directory("agents")
         self._load_agents_from_directory("tools")
+        self.lifecycle.start_reaper()
 
     def _setup_directories(self):
         """Ensures the existence of required directories and sets appropriate permissions."""
@@ -107,36 +123,111 @@ class MASTERMIND:
                 self._load_agent_module(agent_name, module_path)
 
     def _load_agent_module(self, agent_name, module_path):
-        """Loads an agent module and initializes its class if it implements AgentInterface."""
-        spec = importlib.util.spec_from_file_location(agent_name, module_path)
-        module = importlib.util.module_from_spec(spec)
-        sys.modules[agent_name] = module
-        spec.loader.exec_module(module)
+        """Loads an agent module and registers its class if it implements AgentInterface."""
+        if self.sandbox is not None:
+            # Sandboxed agents are only executed inside worker processes.
+            self.agents[agent_name] = None
+            self.agent_paths[agent_name] = module_path
+            logging.info(f"Registered sandboxed agent: {agent_name}")
+            return
+        agent_class = self._exec_agent_module(agent_name, module_path)
+        if agent_class is not None:
+            self.agents[agent_name] = agent_class
+            self.agent_paths[agent_name] = module_path
+            self.lifecycle.register(agent_name, agent_class)
+            logging.info(f"Loaded agent: {agent_name}")
+
+    def _exec_agent_module(self, agent_name, module_path):
+        """Executes an agent module and returns the AgentInterface subclass it defines, if any."""
+        with startup_profiler.section("agent_load", agent_name):
+            spec = importlib.util.spec_from_file_location(agent_name, module_path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[agent_name] = module
+            spec.loader.exec_module(module)
+        agent_class = None
         for attribute_name in dir(module):
             attribute = getattr(module, attribute_name)
             if isinstance(attribute, type) and issubclass(attribute, AgentInterface) and attribute != AgentInterface:
-                self.agents[agent_name] = attribute()
-                logging.info(f"Loaded agent: {agent_name}")
+                agent_class = attribute
+        return agent_class
+
+    def reload_agent(self, agent_name, module_path):
+        """Re-executes a single changed agent module and swaps its pooled instances between runs."""
+        if not os.path.exists(module_path):
+            if agent_name in self.agents:
+                del self.agents[agent_name]
+                self.agent_paths.pop(agent_name, None)
+                self.lifecycle.unregister(agent_name)
+                sys.modules.pop(agent_name, None)
+                logging.info(f"Unloaded removed agent: {agent_name}")
+            return
+        if self.sandbox is not None:
+            # Workers re-execute a module whenever its mtime changes.
+            self._load_agent_module(agent_name, module_path)
+            return
+        agent_class = self._exec_agent_module(agent_name, module_path)
+        if agent_class is None:
+            logging.warning(f"Reloaded module {agent_name} defines no agent; keeping previous version.")
+            return
+        self.agents[agent_name] = agent_class
+        self.agent_paths[agent_name] = module_path
+        self.lifecycle.register(agent_name, agent_class)
+        logging.info(f"Reloaded agent: {agent_name}")
+
+    def start_hot_reload(self, debounce=0.3):
+        """Starts watching the agent directories and reloading changed modules."""
+        if self.reloader is None:
+            self.reloader = AgentReloader(["agents", "tools"], self.reload_agent, debounce=debounce)
+            self.reloader.start()
+
+    def stop_hot_reload(self):
+        """Stops the hot reload watcher if it is running."""
+        if self.reloader is not None:
+            self.reloader.stop()
+            self.reloader = None
+
+    def warm_up(self):
+        """Initializes one pooled instance of every agent ahead of the first run."""
+        if self.sandbox is None:
+            self.lifecycle.prewarm()
 
     def execute_agents(self):
         """Executes all loaded agents concurrently in separate threads."""
-        for agent_name, agent_instance in self.agents.items():
-            thread = threading.Thread(target=self._execute_single_agent, args=(agent_name, agent_instance,))
+        threads = []
+        for agent_name in list(self.agents):
+            thread = threading.Thread(target=self._execute_single_agent, args=(agent_name,))
+            threads.append(thread)
             thread.start()
+        for thread in threads:
             thread.join()
 
-    def _execute_single_agent(self, agent_name, agent_instance):
-        """Handles the lifecycle of a single agent, including initialization, execution, and shutdown."""
+    def _execute_single_agent(self, agent_name):
+        """Runs one agent on a warm pooled instance; initialization and shutdown are handled by the pool."""
         try:
-            agent_instance.initialize()
-            agent_instance.execute()
-            data = agent_instance.get_data()
+            if self.sandbox is not None:
+                data = self.sandbox.run_agent(agent_name, self.agent_paths[agent_name])
+                logging.info(f"Sandboxed agent {agent_name} executed successfully with data: {data}")
+                return
+            with self.lifecycle.lease(agent_name) as agent_instance:
+                agent_instance.execute()
+                data = agent_instance.get_data()
             logging.info(f"Agent {agent_name} executed successfully with data: {data}")
-            agent_instance.shutdown()
         except Exception as e:
             logging.error(f"Error executing agent {agent_name}: {e}")
 
+    def shutdown(self):
+        """Stops hot reload and shuts down every pooled agent instance."""
+        self.stop_hot_reload()
+        self.lifecycle.shutdown_all()
+        if self.sandbox is not None:
+            self.sandbox.close()
+
 if __name__ == "__main__":
-    mastermind = MASTERMIND()
+    # The sandbox zygote must be forked before the controller starts any threads.
+    sandbox = SandboxPool().start() if "--sandbox" in sys.argv else None
+    mastermind = MASTERMIND(sandbox=sandbox)
+    mastermind.warm_up()
+    startup_profiler.finish()
     mastermind.execute_agents()
+    mastermind.shutdown()
     logging.info("All agents have been executed.")
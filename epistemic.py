@@ -17,20 +17,118 @@
 
 # Python Code Implementation
 
+from collections.abc import MutableSet
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+NEGATION = 'not '
+
+
+def parse_literal(belief: str) -> Tuple[str, int]:
+    """Split a belief into its atom and negation depth: 'not not p' -> ('p', 2)."""
+    depth = 0
+    while belief.startswith(NEGATION):
+        belief = belief[len(NEGATION):]
+        depth += 1
+    return belief, depth
+
+
+class BeliefStore(MutableSet):
+    """Set of belief strings indexed by interned atom and negation depth.
+
+    A belief at depth d is contradicted by the same atom at depth d + 1, so
+    'p' is contradicted by 'not p' and 'not p' by 'not not p'. Conflicts are
+    found when a belief is added, by looking only at its neighbouring depths,
+    and queued as pending retractions. Revising therefore costs time in the
+    number of conflicts, not the number of beliefs.
+    """
+
+    def __init__(self, beliefs: Iterable[str] = ()):
+        self._atoms: Dict[str, int] = {}
+        self._depths: Dict[int, Set[int]] = {}
+        self._beliefs: Set[str] = set()
+        self.pending: Dict[str, str] = {}
+        self.retractions: List[Dict[str, str]] = []
+        self.update(beliefs)
+
+    def _intern(self, atom: str) -> int:
+        atom_id = self._atoms.get(atom)
+        if atom_id is None:
+            atom_id = self._atoms[atom] = len(self._atoms)
+        return atom_id
+
+    def __contains__(self, belief) -> bool:
+        return belief in self._beliefs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._beliefs)
+
+    def __len__(self) -> int:
+        return len(self._beliefs)
+
+    def __repr__(self) -> str:
+        return repr(self._beliefs)
+
+    def add(self, belief: str):
+        if belief in self._beliefs:
+            return
+        atom, depth = parse_literal(belief)
+        depths = self._depths.setdefault(self._intern(atom), set())
+        if depth + 1 in depths:
+            self.pending[belief] = NEGATION + belief
+        if depth - 1 in depths:
+            self.pending[belief[len(NEGATION):]] = belief
+        depths.add(depth)
+        self._beliefs.add(belief)
+
+    def discard(self, belief: str):
+        if belief not in self._beliefs:
+            return
+        atom, depth = parse_literal(belief)
+        self._depths[self._atoms[atom]].discard(depth)
+        self._beliefs.discard(belief)
+        self.pending.pop(belief, None)
+        # The weaker belief this one contradicted no longer needs retracting
+        if depth > 0:
+            weaker = belief[len(NEGATION):]
+            if self.pending.get(weaker) == belief:
+                del self.pending[weaker]
+
+    def update(self, beliefs: Iterable[str]):
+        for belief in beliefs:
+            self.add(belief)
+
+    def difference_update(self, beliefs: Iterable[str]):
+        for belief in beliefs:
+            self.discard(belief)
+
+    def is_contradicted(self, belief: str) -> bool:
+        atom, depth = parse_literal(belief)
+        atom_id = self._atoms.get(atom)
+        return atom_id is not None and depth + 1 in self._depths.get(atom_id, ())
+
+    def apply_retractions(self) -> List[Dict[str, str]]:
+        """Remove every contradicted belief and return what was retracted and why."""
+        retracted = [{'retracted': belief, 'by': by} for belief, by in self.pending.items()]
+        for record in retracted:
+            atom, depth = parse_literal(record['retracted'])
+            self._depths[self._atoms[atom]].discard(depth)
+            self._beliefs.discard(record['retracted'])
+        self.pending.clear()
+        self.retractions.extend(retracted)
+        return retracted
+
+
 class AutoepistemicAgent:
     def __init__(self, initial_beliefs):
-        self.beliefs = initial_beliefs
+        self.beliefs = BeliefStore(initial_beliefs)
 
     def add_information(self, new_information):
-        # Update beliefs with new information
+        # Update beliefs with new information; conflicts are detected as each belief is added
         self.beliefs.update(new_information)
 
     def revise_beliefs(self):
-        # Check if any conclusions based on default rules need to be retracted
-        for belief in list(self.beliefs):
-            if self.contradicts_new_information(belief):
-                self.beliefs.remove(belief)
+        # Retract the conclusions contradicted by the information added so far
+        return self.beliefs.apply_retractions()
 
     def contradicts_new_information(self, belief):
-        # Placeholder function to be implemented with actual logic
-        return False
+        return self.beliefs.is_contradicted(belief)
@@ -0,0 +1,402 @@
+"""
+Select, download and load GGUF models from the Hugging Face Hub for local execution.
+
+`get_hf_llm` is the interactive loader. It lists a repo's GGUF files, asks
+for a quality level and GPU use, offers to download the model, and offers
+to install llama-cpp-python.
+
+`load_hf_llm` never prompts and is what `get_hf_llm(auto_select=True)` and
+`LocalChatClient.load` use. The model is picked by
+`model_bench.auto_select_model` within the host's budget. When the Hub
+cannot be reached, or HF_HUB_OFFLINE is set, only models already in the
+local model index are considered and nothing is downloaded. Every failure
+raises `LocalModelError` with a message that says what to do next, instead
+of asking.
+"""
+
+import os
+import sys
+import logging
+import traceback
+import subprocess
+from typing import Dict, List, Optional, Union
+
+from model_index import ModelIndex, combine_splits, default_model_index, default_models_dir
+from model_download import hf_download
+from model_bench import Budget, NoModelFitsError, auto_select_model, ensure_fits
+
+BYTES_PER_GB = 1024 ** 3
+RAM_OVERHEAD_GB = 2.5
+
+
+class LocalModelError(Exception):
+    """Raised when no local model can be resolved or loaded without user interaction."""
+
+
+def hub_offline() -> bool:
+    """True when huggingface_hub is configured not to use the network."""
+    return os.environ.get("HF_HUB_OFFLINE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def list_gguf_files(repo_id: str, interactive: bool = True) -> List[Dict[str, Union[str, float]]]:
+    """
+    Fetch all files from a given repository on Hugging Face Model Hub that contain 'gguf'.
+
+    :param repo_id: Repository ID on Hugging Face Model Hub.
+    :param interactive: Offer to log in when the repository needs authentication; otherwise raise.
+    :return: A list of dictionaries, each dictionary containing filename, size, and RAM usage of a model.
+    """
+    from huggingface_hub import list_files_info, login
+
+    try:
+        files_info = list_files_info(repo_id=repo_id)
+    except Exception as e:
+        if not interactive or "authentication" not in str(e).lower():
+            raise
+        print("You likely need to be logged in to HuggingFace to access this language model.")
+        print(f"Visit this URL to log in and apply for access to this language model: https://huggingface.co/{repo_id}")
+        print("Then, log in here:")
+        login()
+        files_info = list_files_info(repo_id=repo_id)
+
+    gguf_files = sorted((file for file in files_info if "gguf" in file.rfilename), key=lambda x: x.size)
+
+    result = []
+    for file in gguf_files:
+        size_in_gb = file.size / BYTES_PER_GB
+        lfs = getattr(file, "lfs", None)
+        result.append({
+            "filename": file.rfilename,
+            "Size": size_in_gb,
+            "RAM": size_in_gb + RAM_OVERHEAD_GB,
+            "sha256": lfs.get("sha256") if isinstance(lfs, dict) else getattr(lfs, "sha256", None),
+        })
+    return result
+
+
+def local_gguf_files(repo_id: str, index: ModelIndex) -> List[Dict[str, Union[str, float]]]:
+    """Indexed models whose filenames match `repo_id`, in the same shape as `list_gguf_files`.
+
+    TheBloke-style repos name their files after the repo, e.g.
+    `TheBloke/CodeLlama-7B-Instruct-GGUF` holds `codellama-7b-instruct.Q4_K_M.gguf`.
+    """
+    stem = repo_id.split("/")[-1].lower()
+    if stem.endswith("-gguf"):
+        stem = stem[:-len("-gguf")]
+    result = []
+    for filename, entry in index.entries.items():
+        if entry.get("split_of") or not filename.lower().startswith(stem):
+            continue
+        if index.lookup(filename, rescan=False) is None:
+            continue
+        size_in_gb = entry["size"] / BYTES_PER_GB
+        result.append({"filename": filename, "Size": size_in_gb, "RAM": size_in_gb + RAM_OVERHEAD_GB,
+                       "sha256": entry.get("sha256")})
+    return sorted(result, key=lambda model: model["Size"])
+
+
+def group_and_combine_splits(models: List[Dict[str, Union[str, float]]]) -> List[Dict[str, Union[str, float]]]:
+    """
+    Groups filenames based on their base names and combines the sizes and RAM requirements.
+
+    :param models: List of model details.
+    :return: A list of combined model details.
+    """
+    grouped_files = {}
+
+    for model in models:
+        base_name = model["filename"].split('-split-')[0]
+
+        if base_name in grouped_files:
+            grouped_files[base_name]["Size"] += model["Size"]
+            grouped_files[base_name]["RAM"] += model["RAM"]
+            grouped_files[base_name]["SPLITS"].append(model["filename"])
+        else:
+            grouped_files[base_name] = {
+                "filename": base_name,
+                "Size": model["Size"],
+                "RAM": model["RAM"],
+                "SPLITS": [model["filename"]]
+            }
+
+    return list(grouped_files.values())
+
+
+def actually_combine_files(base_name: str, files: List[str], expected: Optional[Dict[str, str]] = None) -> str:
+    """
+    Combines files together and deletes the original split files once the result verifies.
+
+    :param base_name: The base name for the combined file.
+    :param files: List of files to be combined.
+    :param expected: Optional SHA-256 per split file, e.g. from the Hugging Face LFS metadata.
+    :return: The SHA-256 of the combined file.
+    """
+    return combine_splits(base_name, files, expected)
+
+
+def download_model(repo_id: str, selected_model: str, raw_models: List[Dict], index: ModelIndex,
+                   models_dir: str) -> str:
+    """Download `selected_model` (joining its splits, if any) into `models_dir` and index it; returns its path."""
+    download_path = os.path.join(models_dir, selected_model)
+    split_files = [model["filename"] for model in raw_models if selected_model in model["filename"]]
+    expected_sha256 = {model["filename"]: model.get("sha256") for model in raw_models}
+
+    if len(split_files) > 1:
+        for split_file in split_files:
+            hf_download(repo_id, split_file, models_dir, sha256=expected_sha256.get(split_file))
+        expected = {os.path.join(models_dir, split_file): expected_sha256.get(split_file)
+                    for split_file in split_files}
+        combined_sha256 = actually_combine_files(download_path, list(expected), expected)
+    else:
+        combined_sha256 = hf_download(repo_id, selected_model, models_dir, sha256=expected_sha256.get(selected_model))
+
+    index.add(download_path, splits=split_files if len(split_files) > 1 else None, sha256=combined_sha256)
+    index.save()
+    return download_path
+
+
+def load_hf_llm(repo_id: str, context_window: int = 4096, budget: Optional[Budget] = None,
+                offline: Optional[bool] = None, verbose: bool = False):
+    """Pick, fetch if needed and load a model from `repo_id` without prompting.
+
+    Raises LocalModelError when llama-cpp-python is missing, when no model is
+    available offline, or when no model fits the budget.
+    """
+    try:
+        from llama_cpp import Llama
+    except ImportError:
+        raise LocalModelError("llama-cpp-python is not installed. Install it with `pip install llama-cpp-python` "
+                              "(see its README for GPU builds), then try again.")
+
+    index = default_model_index()
+    index.scan()
+    offline = hub_offline() if offline is None else offline
+    raw_models = None
+    if not offline:
+        try:
+            raw_models = list_gguf_files(repo_id, interactive=False)
+        except Exception as e:
+            logging.warning(f"Could not list `{repo_id}` on the Hugging Face Hub, using local models only: {e}")
+
+    if raw_models is None:
+        candidates = local_gguf_files(repo_id, index)
+        if not candidates:
+            raise LocalModelError(f"The Hugging Face Hub is offline or unreachable, and no model from `{repo_id}` is in the "
+                                  f"local model index. Copy a GGUF file into {default_models_dir()}, or pass the "
+                                  f"path of a model file.")
+    elif not raw_models:
+        raise LocalModelError(f"There are no GGUF files in `{repo_id}`.")
+    else:
+        candidates = group_and_combine_splits(raw_models)
+
+    try:
+        selected_model = auto_select_model(candidates, budget)
+        model_path = index.lookup(selected_model, rescan=False)
+        if model_path is None:
+            logging.info(f"Downloading {selected_model} from `{repo_id}`")
+            model_path = download_model(repo_id, selected_model, raw_models, index, default_models_dir())
+            # The choice was based on estimates; measure the real thing before using it
+            ensure_fits(model_path, budget)
+    except NoModelFitsError as e:
+        raise LocalModelError(f"No model in `{repo_id}` fits this host: {e}") from e
+
+    logging.info(f"Loading local model {model_path}")
+    return Llama(model_path=model_path, n_gpu_layers=0, verbose=verbose, n_ctx=context_window)
+
+
+def get_hf_llm(repo_id, debug_mode, context_window, auto_select=False, budget=None):
+    from rich import print
+    from rich.markdown import Markdown
+
+    if auto_select:
+        # Non-interactive: benchmark what is on this host and pick the best model within budget
+        try:
+            return load_hf_llm(repo_id, context_window, budget, verbose=debug_mode)
+        except LocalModelError as e:
+            print(str(e))
+            return None
+
+    import inquirer
+
+    if "TheBloke/CodeLlama-" not in repo_id:
+        # ^ This means it was prob through the old --local, so we have already displayed this message.
+        # Hacky. Not happy with this
+        print('', Markdown(f"**Open Interpreter** will use `{repo_id}` for local execution. Use your arrow keys to set up the model."), '')
+
+    raw_models = list_gguf_files(repo_id)
+
+    if not raw_models:
+        print(f"Failed. Are you sure there are GGUF files in `{repo_id}`?")
+        return None
+
+    combined_models = group_and_combine_splits(raw_models)
+
+    # First we give them a simple small medium large option. If they want to see more, they can.
+    selected_model = None
+    if len(combined_models) > 3:
+
+        # Display Small Medium Large options to user
+        choices = [
+            format_quality_choice(combined_models[0], "Small"),
+            format_quality_choice(combined_models[len(combined_models) // 2], "Medium"),
+            format_quality_choice(combined_models[-1], "Large"),
+            "See More"
+        ]
+        questions = [inquirer.List('selected_model', message="Quality (smaller is faster, larger is more capable)", choices=choices)]
+        answers = inquirer.prompt(questions)
+        if answers["selected_model"].startswith("Small"):
+            selected_model = combined_models[0]["filename"]
+        elif answers["selected_model"].startswith("Medium"):
+            selected_model = combined_models[len(combined_models) // 2]["filename"]
+        elif answers["selected_model"].startswith("Large"):
+            selected_model = combined_models[-1]["filename"]
+
+    if selected_model is None:
+        # This means they either selected See More,
+        # Or the model only had 1 or 2 options
+
+        # Display to user
+        choices = [format_quality_choice(model) for model in combined_models]
+        questions = [inquirer.List('selected_model', message="Quality (smaller is faster, larger is more capable)", choices=choices)]
+        answers = inquirer.prompt(questions)
+        for model in combined_models:
+            if format_quality_choice(model) == answers["selected_model"]:
+                selected_model = model["filename"]
+                break
+
+    # Third stage: GPU confirm
+    if confirm_action("Use GPU? (Large models might crash on GPU, but will run more quickly)"):
+        n_gpu_layers = -1
+    else:
+        n_gpu_layers = 0
+
+    default_path = default_models_dir()
+    os.makedirs(default_path, exist_ok=True)
+
+    # Resolve the model through the local index instead of probing each directory
+    index = default_model_index()
+    model_path = index.lookup(selected_model)
+
+    if model_path is None:
+        # If the file was not found, ask for confirmation to download it
+        print(f"This language model was not found on your system.\n\nDownload to `{default_path}`?", "")
+        if confirm_action(""):
+            model_path = download_model(repo_id, selected_model, raw_models, index, default_path)
+        else:
+            print('\n', "Download cancelled. Exiting.", '\n')
+            return None
+
+    # This is helpful for folks looking to delete corrupted ones and such
+    print(Markdown(f"Model found at `{model_path}`"))
+
+    try:
+        from llama_cpp import Llama
+    except:
+        if debug_mode:
+            traceback.print_exc()
+        # Ask for confirmation to install the required pip package
+        message = "Local LLM interface package not found. Install `llama-cpp-python`?"
+        if confirm_action(message):
+
+            # We're going to build llama-cpp-python correctly for the system we're on
+
+            import platform
+
+            def check_command(command):
+                try:
+                    subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                    return True
+                except subprocess.CalledProcessError:
+                    return False
+                except FileNotFoundError:
+                    return False
+
+            def install_llama(backend):
+                env_vars = {
+                    "FORCE_CMAKE": "1"
+                }
+
+                if backend == "cuBLAS":
+                    env_vars["CMAKE_ARGS"] = "-DLLAMA_CUBLAS=on"
+                elif backend == "hipBLAS":
+                    env_vars["CMAKE_ARGS"] = "-DLLAMA_HIPBLAS=on"
+                elif backend == "Metal":
+                    env_vars["CMAKE_ARGS"] = "-DLLAMA_METAL=on"
+                else:  # Default to OpenBLAS
+                    env_vars["CMAKE_ARGS"] = "-DLLAMA_BLAS=ON -DLLAMA_BLAS_VENDOR=OpenBLAS"
+
+                try:
+                    subprocess.run([sys.executable, "-m", "pip", "install", "llama-cpp-python"], env=env_vars, check=True)
+                except subprocess.CalledProcessError as e:
+                    print(f"Error during installation with {backend}: {e}")
+
+            def supports_metal():
+                # Check for macOS version
+                if platform.system() == "Darwin":
+                    mac_version = tuple(map(int, platform.mac_ver()[0].split('.')))
+                    # Metal requires macOS 10.11 or later
+                    if mac_version >= (10, 11):
+                        return True
+                return False
+
+            # Check system capabilities
+            if check_command(["nvidia-smi"]):
+                install_llama("cuBLAS")
+            elif check_command(["rocminfo"]):
+                install_llama("hipBLAS")
+            elif supports_metal():
+                install_llama("Metal")
+            else:
+                install_llama("OpenBLAS")
+
+            from llama_cpp import Llama
+            print('', Markdown("Finished downloading `Code-Llama` interface."), '')
+
+            # Tell them if their architecture won't work well
+
+            # Check if on macOS
+            if platform.system() == "Darwin":
+                # Check if it's Apple Silicon
+                if platform.machine() != "arm64":
+                    print("Warning: You are using Apple Silicon (M1/M2) Mac but your Python is not of 'arm64' architecture.")
+                    print("The llama.ccp x86 version will be 10x slower on Apple Silicon (M1/M2) Mac.")
+                    print("\nTo install the correct version of Python that supports 'arm64' architecture:")
+                    print("1. Download Miniforge for M1/M2:")
+                    print("wget https://github.com/conda-forge/miniforge/releases/latest/download/Miniforge3-MacOSX-arm64.sh")
+                    print("2. Install it:")
+                    print("bash Miniforge3-MacOSX-arm64.sh")
+                    print("")
+
+        else:
+            print('', "Installation cancelled. Exiting.", '')
+            return None
+
+    # Initialize and return Code-Llama
+    assert os.path.isfile(model_path)
+    llama_2 = Llama(model_path=model_path, n_gpu_layers=n_gpu_layers, verbose=debug_mode, n_ctx=context_window)
+
+    return llama_2
+
+
+def confirm_action(message):
+    import inquirer
+
+    question = [
+        inquirer.Confirm('confirm',
+                         message=message,
+                         default=True),
+    ]
+
+    answers = inquirer.prompt(question)
+    return answers['confirm']
+
+
+def format_quality_choice(model, name_override=None) -> str:
+    """
+    Formats the model choice for display in the inquirer prompt.
+    """
+    if name_override:
+        name = name_override
+    else:
+        name = model['filename']
+    return f"{name} | Size: {model['Size']:.1f} GB, Estimated RAM usage: {model['RAM']:.1f} GB"
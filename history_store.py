@@ -0,0 +1,172 @@
+"""
+Indexed, bounded skill history for SimpleCoder backed by SQLite.
+
+Entries are indexed by skill and by time, so filtered and paginated queries
+never scan the whole history. Pages are keyed on `id`, and the `(skill, id)`
+index returns a skill's entries already in page order, so fetching a page
+never sorts the skill's whole history. A retention policy (maximum entry count and/or
+maximum age) is applied periodically as entries are appended. Export and
+import stream JSON lines through a cursor, so multi-million-entry histories do
+not need to fit in memory.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    skill TEXT NOT NULL,
+    param TEXT
+);
+CREATE INDEX IF NOT EXISTS history_skill_ts ON history (skill, ts);
+CREATE INDEX IF NOT EXISTS history_skill_id ON history (skill, id);
+CREATE INDEX IF NOT EXISTS history_ts ON history (ts);
+"""
+
+
+class HistoryStore:
+    """SQLite-backed history of executed skills with retention and streaming export/import."""
+
+    def __init__(self, path: str = "SimpleCoder_history.sqlite3", max_entries: Optional[int] = 1_000_000,
+                 max_age: Optional[float] = None, retention_every: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.retention_every = retention_every
+        self._appends = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened lazily so renaming an agent before first use does not create a stray file
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def _row(row) -> Dict[str, Any]:
+        return {'id': row[0], 'ts': row[1], 'task': row[2], 'param': row[3]}
+
+    def append(self, skill: str, param: Optional[str], ts: Optional[float] = None) -> int:
+        """Record one executed skill and return its id."""
+        with self._lock:
+            cursor = self.conn.execute("INSERT INTO history (ts, skill, param) VALUES (?, ?, ?)",
+                                       (time.time() if ts is None else ts, skill, param))
+            self.conn.commit()
+            self._appends += 1
+            if self._appends % self.retention_every == 0:
+                self.apply_retention()
+            return cursor.lastrowid
+
+    def _where(self, skill, since, until, after_id):
+        clauses, args = [], []
+        for clause, value in (("skill = ?", skill), ("ts >= ?", since), ("ts < ?", until), ("id > ?", after_id)):
+            if value is not None:
+                clauses.append(clause)
+                args.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def query(self, skill: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              after_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return up to `limit` entries oldest first; pass the last id as `after_id` for the next page."""
+        where, args = self._where(skill, since, until, after_id)
+        with self._lock:
+            rows = self.conn.execute(f"SELECT id, ts, skill, param FROM history{where} ORDER BY id LIMIT ?",
+                                     args + [limit]).fetchall()
+        return [self._row(row) for row in rows]
+
+    def count(self, skill: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None) -> int:
+        where, args = self._where(skill, since, until, None)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM history{where}", args).fetchone()[0]
+
+    def iter_entries(self, batch_size: int = 1000, **filters) -> Iterator[Dict[str, Any]]:
+        """Stream matching entries in pages of `batch_size`."""
+        after_id = None
+        while True:
+            page = self.query(after_id=after_id, limit=batch_size, **filters)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after_id = page[-1]['id']
+
+    def apply_retention(self) -> int:
+        """Delete entries beyond the age and count limits; returns how many were removed."""
+        removed = 0
+        with self._lock:
+            if self.max_age is not None:
+                removed += self.conn.execute("DELETE FROM history WHERE ts < ?",
+                                             (time.time() - self.max_age,)).rowcount
+            if self.max_entries is not None:
+                removed += self.conn.execute(
+                    "DELETE FROM history WHERE id <= (SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.max_entries,)).rowcount
+            self.conn.commit()
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM history")
+            self.conn.commit()
+
+    def export_jsonl(self, filename: str, **filters) -> int:
+        """Write matching entries to `filename` as JSON lines; returns the number written."""
+        written = 0
+        with open(filename, 'w') as f:
+            for entry in self.iter_entries(**filters):
+                f.write(json.dumps({'task': entry['task'], 'param': entry['param'], 'ts': entry['ts']}) + "\n")
+                written += 1
+        return written
+
+    def import_jsonl(self, filename: str, batch_size: int = 1000) -> int:
+        """Append entries from a JSON lines file (or a legacy JSON list); returns the number imported."""
+        with open(filename, 'r') as f:
+            first = f.read(1)
+            while first.isspace():
+                first = f.read(1)
+            f.seek(0)
+            if first == '[':
+                # Files written by the old export_config are a single JSON list
+                entries = iter(json.load(f))
+            else:
+                entries = (json.loads(line) for line in f if line.strip())
+            imported = 0
+            batch = []
+            for entry in entries:
+                batch.append((entry.get('ts', time.time()), entry['task'], entry.get('param')))
+                if len(batch) >= batch_size:
+                    imported += self._insert_many(batch)
+                    batch = []
+            imported += self._insert_many(batch)
+        self.apply_retention()
+        return imported
+
+    def _insert_many(self, rows) -> int:
+        if not rows:
+            return 0
+        with self._lock:
+            self.conn.executemany("INSERT INTO history (ts, skill, param) VALUES (?, ?, ?)", rows)
+            self.conn.commit()
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return self.iter_entries()
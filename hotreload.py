@@ -0,0 +1,176 @@
+"""
+Hot reload service for MASTERMIND agent directories.
+
+Watches the `agents` and `tools` directories and reports which agent modules
+changed so the controller can reload only those modules. Linux inotify is used
+when libc exposes it, otherwise the watcher falls back to mtime polling.
+Editors often write a file several times per save, so changes are debounced:
+a module is only reported once it has been quiet for `debounce` seconds.
+"""
+
+import os
+import time
+import errno
+import struct
+import select
+import logging
+import threading
+import ctypes
+import ctypes.util
+from typing import Callable, Dict, Iterable, List, Optional
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    """Return libc if it provides inotify, otherwise None."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not all(hasattr(libc, name) for name in ("inotify_init1", "inotify_add_watch")):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """Yields changed `.py` paths using Linux inotify."""
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, libc, directories: Iterable[str]):
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.watches[wd] = directory
+
+    def poll(self, timeout: float) -> List[str]:
+        """Wait up to `timeout` seconds and return the paths that changed."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+        changed = []
+        offset = 0
+        while offset < len(buffer):
+            wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if name.endswith(".py") and wd in self.watches:
+                changed.append(os.path.join(self.watches[wd], name))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Yields changed `.py` paths by comparing file mtimes."""
+
+    def __init__(self, directories: Iterable[str], interval: float = 1.0):
+        self.directories = list(directories)
+        self.interval = interval
+        self.mtimes = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, int]:
+        mtimes = {}
+        for directory in self.directories:
+            for filename in os.listdir(directory):
+                if filename.endswith(".py"):
+                    path = os.path.join(directory, filename)
+                    try:
+                        mtimes[path] = os.stat(path).st_mtime_ns
+                    except FileNotFoundError:
+                        continue
+        return mtimes
+
+    def poll(self, timeout: float) -> List[str]:
+        """Sleep for one polling interval and return the paths that changed."""
+        time.sleep(min(timeout, self.interval))
+        current = self._snapshot()
+        changed = [path for path, mtime in current.items() if self.mtimes.get(path) != mtime]
+        changed.extend(path for path in self.mtimes if path not in current)
+        self.mtimes = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class AgentReloader:
+    """Background thread that reports debounced agent module changes to a callback."""
+
+    def __init__(self, directories: Iterable[str], on_change: Callable[[str, str], None],
+                 debounce: float = 0.3, poll_interval: float = 1.0, use_inotify: bool = True):
+        self.directories = list(directories)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self._pending: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.watcher = None
+
+    def _make_watcher(self):
+        libc = _load_libc() if self.use_inotify else None
+        if libc is not None:
+            try:
+                return InotifyWatcher(libc, self.directories)
+            except OSError as e:
+                logging.warning(f"inotify unavailable, falling back to polling: {e}")
+        return PollingWatcher(self.directories, self.poll_interval)
+
+    def start(self):
+        """Start watching in a daemon thread."""
+        self.watcher = self._make_watcher()
+        self._thread = threading.Thread(target=self._run, name="AgentReloader", daemon=True)
+        self._thread.start()
+        logging.info(f"Hot reload watching {', '.join(self.directories)} with {type(self.watcher).__name__}")
+
+    def stop(self):
+        """Stop the watcher thread and release the watch descriptors."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self.watcher:
+            self.watcher.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            timeout = self.debounce if self._pending else self.poll_interval
+            for path in self.watcher.poll(timeout):
+                self._pending[path] = time.monotonic()
+            self._flush_settled()
+
+    def _flush_settled(self):
+        """Report every pending path that has been quiet for the debounce window."""
+        now = time.monotonic()
+        settled = [path for path, seen in self._pending.items() if now - seen >= self.debounce]
+        for path in settled:
+            del self._pending[path]
+            agent_name = os.path.basename(path)[:-3]
+            try:
+                self.on_change(agent_name, path)
+            except Exception as e:
+                logging.error(f"Hot reload of {agent_name} failed: {e}")
@@ -0,0 +1,200 @@
+"""
+Prompt-prefix state cache and completion cache for local LLM inference.
+
+`PrefixStateCache` keeps llama.cpp states (`Llama.save_state()`) for prompt
+prefixes that many requests share, such as the system prompt produced by
+`generate_automind_prompt`. Before a generation the state of the longest
+cached prefix is loaded with `load_state()`, and llama.cpp only evaluates the
+tokens after it.
+
+`CompletionCache` is a disk-backed LRU of full responses in SQLite, keyed by
+a hash of (model, params, prompt). It enforces a total size limit and an
+optional TTL, and it counts hits and misses. Keys are plain strings, so other
+callers can reuse it for their own responses.
+
+`CachedBackend` wraps an `llm_server.LlamaBackend` with both caches.
+Completions are only cached for deterministic settings (temperature 0 or a
+fixed seed).
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used);
+"""
+
+
+def make_key(model: str, params: Dict[str, Any], prompt: str) -> str:
+    """Stable cache key for a completion request."""
+    canonical = json.dumps({"model": model, "params": params, "prompt": prompt}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CompletionCache:
+    """Size-bounded, optionally expiring LRU of string values stored in SQLite."""
+
+    def __init__(self, path: str = "llm_cache.sqlite3", max_bytes: int = 256 * 1024 * 1024,
+                 ttl: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, size, created FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                self._size -= row[1]
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str):
+        size = len(value.encode())
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO completions (key, value, size, created, last_used) "
+                               "VALUES (?, ?, ?, ?, ?)", (key, value, size, now, now))
+            self._size += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            rows = self._conn.execute("SELECT key, size FROM completions ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for key, size in rows:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._size -= size
+                if self._size <= self.max_bytes:
+                    return
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries, "bytes": self._size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PrefixStateCache:
+    """In-memory LRU of llama.cpp states for shared prompt prefixes."""
+
+    def __init__(self, llama, max_entries: int = 8, min_prefix_chars: int = 200):
+        self.llama = llama
+        self.max_entries = max_entries
+        self.min_prefix_chars = min_prefix_chars
+        self._states: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, prefix: str):
+        """Evaluate `prefix` once and keep the resulting state."""
+        if prefix in self._states or len(prefix) < self.min_prefix_chars:
+            return
+        self.llama.reset()
+        self.llama.eval(self.llama.tokenize(prefix.encode()))
+        self._states[prefix] = self.llama.save_state()
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+
+    def restore(self, prompt: str) -> Optional[str]:
+        """Load the state of the longest cached prefix of `prompt`; returns that prefix or None."""
+        best = max((prefix for prefix in self._states if prompt.startswith(prefix)), key=len, default=None)
+        if best is None:
+            self.misses += 1
+            return None
+        self._states.move_to_end(best)
+        self.llama.load_state(self._states[best])
+        self.hits += 1
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._states)}
+
+
+class CachedBackend:
+    """Backend wrapper that serves repeated deterministic requests from cache and reuses prefix states."""
+
+    def __init__(self, backend, completions: Optional[CompletionCache] = None,
+                 prefixes: Optional[PrefixStateCache] = None):
+        self.backend = backend
+        self.name = getattr(backend, "name", type(backend).__name__)
+        self.completions = completions
+        self.prefixes = prefixes
+
+    @staticmethod
+    def deterministic(params: Dict[str, Any]) -> bool:
+        return params.get("temperature", 0.8) <= 0 or params.get("seed") is not None
+
+    def stream(self, prompt: str, prefix: Optional[str] = None, **params) -> Iterator[str]:
+        """Yield generated text; `prefix` marks a leading part of `prompt` worth caching state for."""
+        key = None
+        if self.completions is not None and self.deterministic(params):
+            key = make_key(self.name, params, prompt)
+            cached = self.completions.get(key)
+            if cached is not None:
+                yield cached
+                return
+        if self.prefixes is not None:
+            try:
+                if prefix and prompt.startswith(prefix):
+                    self.prefixes.remember(prefix)
+                self.prefixes.restore(prompt)
+            except Exception as e:
+                logging.warning(f"Prefix state cache unavailable: {e}")
+        pieces = []
+        for piece in self.backend.stream(prompt, **params):
+            pieces.append(piece)
+            yield piece
+        # Only reached when the generation ran to completion
+        if key is not None:
+            self.completions.put(key, "".join(pieces))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"completions": self.completions.stats() if self.completions else None,
+                "prefixes": self.prefixes.stats() if self.prefixes else None}
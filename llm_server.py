@@ -0,0 +1,465 @@
+"""
+Resident local LLM inference server.
+
+Loads one GGUF model and serves it to every local component over a Unix
+socket, so MASTERMIND agents and TerminAI share a single copy in RAM instead
+of each building its own `Llama`. The protocol is JSON lines:
+
+    -> {"prompt": "...", "max_tokens": 128, "temperature": 0.0, "stop": [], "client": "terminai"}
+    <- {"token": "..."}                                  (one per generated piece)
+    <- {"done": true, "text": "...", "metrics": {...}}   (or {"error": "..."})
+    -> {"op": "cancel"}                                  (stop the request being streamed)
+    <- {"done": true, "cancelled": true, ...}
+    -> {"op": "stats"}
+    <- {"stats": {...}}
+
+Every request ends with exactly one frame that has no "token" key. A client
+that stops reading a stream part-way sends a cancel and reads up to that
+frame, so the rest of the stream is never taken as the reply to its next
+request.
+
+Requests wait in a bounded queue and are served round-robin across clients
+by a single inference thread, since a llama.cpp context cannot run two
+generations at once. When the queue is full new requests are rejected right
+away rather than piling up. Tokens are streamed back as they are generated,
+and the server tracks tokens per second and queue wait.
+
+    python3 llm_server.py --model path/to/model.gguf [--socket PATH]
+    python3 llm_server.py --self-test
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import socketserver
+from collections import OrderedDict, deque
+from queue import Queue
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+DEFAULT_SOCKET = os.environ.get("MASTERMIND_LLM_SOCKET",
+                                os.path.join(tempfile.gettempdir(), f"mastermind-llm-{os.getuid()}.sock"))
+GENERATION_PARAMS = ("max_tokens", "temperature", "top_p", "top_k", "repeat_penalty", "stop", "seed", "prefix")
+
+
+class QueueFullError(Exception):
+    """Raised when the server's request queue is at capacity."""
+
+
+class LlamaBackend:
+    """Adapts a llama_cpp.Llama instance to the server's `stream(prompt, **params)` interface."""
+
+    def __init__(self, llama, name: Optional[str] = None):
+        self.llama = llama
+        self.name = name or os.path.basename(getattr(llama, "model_path", "llama"))
+
+    def stream(self, prompt: str, prefix: Optional[str] = None, **params) -> Iterator[str]:
+        # `prefix` is a hint for llm_cache.CachedBackend; llama.cpp itself does not take it
+        for chunk in self.llama(prompt, stream=True, **params):
+            yield chunk["choices"][0]["text"]
+
+
+class _Job:
+    def __init__(self, client: str, prompt: str, params: Dict[str, Any]):
+        self.client = client
+        self.prompt = prompt
+        self.params = params
+        self.events: Queue = Queue()
+        self.enqueued = time.monotonic()
+        self.cancelled = False
+
+
+class FairQueue:
+    """Bounded queue that hands out jobs round-robin across clients."""
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._clients: "OrderedDict[str, deque]" = OrderedDict()
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def put(self, job: _Job):
+        with self._cond:
+            if self._size >= self.max_size:
+                raise QueueFullError(f"Inference queue is full ({self.max_size} requests waiting)")
+            self._clients.setdefault(job.client, deque()).append(job)
+            self._size += 1
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[_Job]:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size > 0, timeout):
+                return None
+            # Take the head of the least recently served client, then move it to the back
+            client, jobs = next(iter(self._clients.items()))
+            job = jobs.popleft()
+            self._size -= 1
+            if jobs:
+                self._clients.move_to_end(client)
+            else:
+                del self._clients[client]
+            return job
+
+    def __len__(self):
+        return self._size
+
+
+class InferenceServer:
+    """Serves one resident model to local clients over a Unix socket."""
+
+    def __init__(self, backend, socket_path: str = DEFAULT_SOCKET, max_queue: int = 64):
+        self.backend = backend
+        self.socket_path = socket_path
+        self.queue = FairQueue(max_queue)
+        self.stats = {"requests": 0, "rejected": 0, "errors": 0, "tokens": 0, "generation_seconds": 0.0,
+                      "queue_wait_total": 0.0, "queue_wait_max": 0.0}
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self._threads = []
+
+    def submit(self, client: str, prompt: str, params: Dict[str, Any]) -> _Job:
+        job = _Job(client, prompt, {k: v for k, v in params.items() if k in GENERATION_PARAMS})
+        try:
+            self.queue.put(job)
+        except QueueFullError:
+            with self._stats_lock:
+                self.stats["rejected"] += 1
+            raise
+        return job
+
+    def _run_job(self, job: _Job):
+        wait = time.monotonic() - job.enqueued
+        start = time.monotonic()
+        first_token = None
+        pieces = []
+        try:
+            for piece in self.backend.stream(job.prompt, **job.params):
+                if job.cancelled:
+                    break
+                if first_token is None:
+                    first_token = time.monotonic() - start
+                pieces.append(piece)
+                job.events.put({"token": piece})
+        except Exception as e:
+            logging.error(f"Inference failed for {job.client}: {e}")
+            with self._stats_lock:
+                self.stats["errors"] += 1
+            job.events.put({"error": str(e)})
+            return
+        elapsed = time.monotonic() - start
+        metrics = {"tokens": len(pieces), "queue_wait": wait, "time_to_first_token": first_token,
+                   "seconds": elapsed, "tokens_per_second": len(pieces) / elapsed if elapsed > 0 else 0.0}
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["tokens"] += len(pieces)
+            self.stats["generation_seconds"] += elapsed
+            self.stats["queue_wait_total"] += wait
+            self.stats["queue_wait_max"] = max(self.stats["queue_wait_max"], wait)
+        job.events.put({"done": True, "text": "".join(pieces), "metrics": metrics, "cancelled": job.cancelled})
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            job = self.queue.get(timeout=0.5)
+            if job is None:
+                continue
+            if job.cancelled:
+                job.events.put({"done": True, "text": "", "metrics": {}, "cancelled": True})
+            else:
+                self._run_job(job)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["queued"] = len(self.queue)
+        stats["tokens_per_second"] = stats["tokens"] / stats["generation_seconds"] if stats["generation_seconds"] else 0.0
+        stats["queue_wait_mean"] = stats["queue_wait_total"] / stats["requests"] if stats["requests"] else 0.0
+        stats["model"] = getattr(self.backend, "name", type(self.backend).__name__)
+        if hasattr(self.backend, "stats"):
+            stats["cache"] = self.backend.stats()
+        return stats
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _send(self, message):
+                self.wfile.write((json.dumps(message) + "\n").encode())
+                self.wfile.flush()
+
+            def _read_requests(self, requests: Queue, current: Dict[str, Optional[_Job]]):
+                # Runs beside handle() so a cancel is seen while a reply is still streaming
+                try:
+                    for line in self.rfile:
+                        if not line.strip():
+                            continue
+                        try:
+                            request = json.loads(line)
+                        except ValueError:
+                            request = {"op": "malformed"}
+                        if request.get("op") == "cancel":
+                            job = current["job"]
+                            if job is not None:
+                                job.cancelled = True
+                            continue
+                        requests.put(request)
+                except (OSError, ValueError):
+                    pass
+                finally:
+                    requests.put(None)
+
+            def handle(self):
+                requests: Queue = Queue()
+                current: Dict[str, Optional[_Job]] = {"job": None}
+                threading.Thread(target=self._read_requests, args=(requests, current), daemon=True).start()
+                while True:
+                    request = requests.get()
+                    if request is None:
+                        return
+                    if request.get("op") == "malformed":
+                        self._send({"error": "Malformed request"})
+                        continue
+                    if request.get("op") == "stats":
+                        self._send({"stats": server.snapshot()})
+                        continue
+                    try:
+                        job = current["job"] = server.submit(request.get("client", "anonymous"), request["prompt"], request)
+                    except (QueueFullError, KeyError) as e:
+                        self._send({"error": str(e)})
+                        continue
+                    try:
+                        while True:
+                            event = job.events.get()
+                            self._send(event)
+                            if "token" not in event:
+                                break
+                    except OSError:
+                        # Client went away; stop generating for it
+                        job.cancelled = True
+                        return
+                    finally:
+                        current["job"] = None
+
+        return Handler
+
+    def start(self) -> "InferenceServer":
+        """Start the inference thread and the socket listener in the background."""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, self._make_handler())
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        self._threads = [threading.Thread(target=self._inference_loop, name="InferenceLoop", daemon=True),
+                         threading.Thread(target=self._server.serve_forever, name="InferenceSocket", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        logging.info(f"Serving {self.snapshot()['model']} on {self.socket_path}")
+        return self
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class InferenceClient:
+    """Client for InferenceServer; one connection per client object.
+
+    Threads sharing a client take turns: a request waits until another thread's reply has been read. A reply
+    that the calling thread itself stopped reading is cancelled instead.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, client: str = "anonymous", timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.client = client
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._cond = threading.Condition(threading.RLock())
+        self._requests = 0
+        # (request number, thread) of the reply not yet read to its end frame
+        self._pending: Optional[Tuple[int, int]] = None
+        self.last_metrics: Optional[Dict[str, Any]] = None
+
+    def _connect(self):
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(self.timeout)
+            self._sock.connect(self.socket_path)
+            self._reader = self._sock.makefile("rb")
+
+    def _read_reply(self) -> Dict[str, Any]:
+        line = self._reader.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("Inference server closed the connection.")
+        return json.loads(line)
+
+    def _done(self):
+        self._pending = None
+        self._cond.notify_all()
+
+    def _finish_pending(self):
+        """Cancel a reply the caller stopped reading and discard the rest of it."""
+        if self._pending is None:
+            return
+        self._done()
+        try:
+            self._sock.sendall(b'{"op": "cancel"}\n')
+            while "token" in self._read_reply():
+                pass
+        except (OSError, ValueError):
+            # Could not resynchronize; a fresh connection is opened for the next request
+            self.close()
+
+    def _request(self, message: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        thread = threading.get_ident()
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is None or self._pending[1] == thread)
+            self._finish_pending()
+            self._connect()
+            self._sock.sendall((json.dumps(message) + "\n").encode())
+            self._requests += 1
+            request = self._requests
+            self._pending = (request, thread)
+        try:
+            while True:
+                with self._cond:
+                    if self._pending is None or self._pending[0] != request:
+                        return
+                    reply = self._read_reply()
+                    if "token" not in reply:
+                        self._done()
+                yield reply
+        finally:
+            with self._cond:
+                if self._pending is not None and self._pending[0] == request:
+                    self._finish_pending()
+
+    def stream(self, prompt: str, **params) -> Iterator[str]:
+        """Yield generated text pieces as the server produces them.
+
+        Stopping early cancels the generation on the server.
+        """
+        for reply in self._request(dict(params, prompt=prompt, client=self.client)):
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+            if "token" in reply:
+                yield reply["token"]
+            else:
+                self.last_metrics = reply.get("metrics")
+
+    def complete(self, prompt: str, **params) -> str:
+        return "".join(self.stream(prompt, **params))
+
+    def stats(self) -> Dict[str, Any]:
+        replies = self._request({"op": "stats"})
+        try:
+            return next(replies)["stats"]
+        finally:
+            replies.close()
+
+    def close(self):
+        with self._cond:
+            self._done()
+            if self._sock is not None:
+                self._reader.close()
+                self._sock.close()
+                self._sock = self._reader = None
+
+
+def load_backend(model_path: str, n_ctx: int = 2048, n_gpu_layers: int = 0, cache_path: Optional[str] = None,
+                 cache_bytes: int = 256 * 1024 * 1024):
+    """Load a GGUF model, wrapped in llm_cache.CachedBackend when `cache_path` is given."""
+    from llama_cpp import Llama
+    backend = LlamaBackend(Llama(model_path=model_path, n_ctx=n_ctx, n_gpu_layers=n_gpu_layers, verbose=False))
+    if cache_path is None:
+        return backend
+    from llm_cache import CachedBackend, CompletionCache, PrefixStateCache
+    return CachedBackend(backend, CompletionCache(cache_path, max_bytes=cache_bytes), PrefixStateCache(backend.llama))
+
+
+class _EchoBackend:
+    """Stand-in model for the self-test: streams the prompt's words back slowly."""
+
+    name = "echo"
+
+    def stream(self, prompt, max_tokens=16, **params):
+        for word in prompt.split()[:max_tokens]:
+            time.sleep(0.005)
+            yield word + " "
+
+
+def self_test():
+    path = os.path.join(tempfile.mkdtemp(), "llm.sock")
+    server = InferenceServer(_EchoBackend(), path, max_queue=8).start()
+    try:
+        results = {}
+
+        def run(name, count):
+            client = InferenceClient(path, client=name)
+            results[name] = [client.complete(f"{name} says hello number {i}") for i in range(count)]
+            client.close()
+
+        threads = [threading.Thread(target=run, args=(name, 5)) for name in ("agent", "terminai", "coder")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results["agent"][0] == "agent says hello number 0 "
+        # A stream abandoned part-way is cancelled and must not leak into the next reply
+        client = InferenceClient(path, client="abandon")
+        for piece in client.stream("one two three four five six"):
+            break
+        assert client.complete("alpha beta") == "alpha beta "
+        client.close()
+        stats = InferenceClient(path).stats()
+        assert stats["requests"] == 17 and stats["rejected"] == 0
+        print(f"self-test passed: {stats['requests']} requests, {stats['tokens_per_second']:.0f} tok/s, "
+              f"mean queue wait {stats['queue_wait_mean'] * 1000:.1f} ms")
+    finally:
+        server.stop()
+        os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Resident local LLM inference server")
+    parser.add_argument("--model", help="Path to a GGUF model file")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--n-ctx", type=int, default=2048)
+    parser.add_argument("--n-gpu-layers", type=int, default=0)
+    parser.add_argument("--cache", help="SQLite file for the completion cache; enables prefix state caching too")
+    parser.add_argument("--cache-mb", type=int, default=256)
+    parser.add_argument("--self-test", action="store_true")
+    args = parser.parse_args()
+    if args.self_test:
+        self_test()
+    elif args.model:
+        backend = load_backend(args.model, args.n_ctx, args.n_gpu_layers, args.cache, args.cache_mb * 1024 * 1024)
+        InferenceServer(backend, args.socket, args.max_queue).serve_forever()
+    else:
+        parser.print_help()
+        sys.exit(1)
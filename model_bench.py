@@ -0,0 +1,265 @@
+"""
+On-host benchmark and automatic selection of GGUF quantizations.
+
+Each candidate model is loaded in a separate process, so one model's memory
+does not affect the next measurement. The benchmark records load time,
+prompt-eval and generation tokens per second, and peak RSS. Results are
+cached in `benchmarks.json` in the models directory. The cache key includes
+the host (CPU, core count, RAM) and the file's size and mtime, so a model is
+only measured again when the machine or the file changes.
+
+`select_model` picks the largest candidate that fits a `Budget`. Larger
+quantizations are more capable, so size stands in for quality.
+
+Models that have not been downloaded yet cannot be measured. Their speed is
+estimated from the benchmarked local models instead: generation is bound by
+memory bandwidth, so tokens per second scale inversely with file size, and
+load and first-token times scale with it. After download, `ensure_fits`
+measures the model for real and rejects it if it misses the budget.
+
+    python3 model_bench.py model-a.gguf model-b.gguf ...
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import resource
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from model_index import default_models_dir
+
+BENCH_PROMPT = "Write a Python function that returns the n-th Fibonacci number, with a docstring and tests. " * 4
+
+
+class NoModelFitsError(Exception):
+    """Raised when no local or downloadable model fits the budget."""
+
+
+@dataclass
+class Budget:
+    """Limits a selected model must stay within; None means unconstrained."""
+    max_rss_bytes: Optional[int] = None
+    max_load_seconds: Optional[float] = None
+    max_first_token_seconds: Optional[float] = None
+    min_generation_tps: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config_path: str = "config.json", key: str = "model_budget") -> "Budget":
+        """Read the budget from `key` in config.json, defaulting to 80% of physical memory."""
+        values = {}
+        if os.path.exists(config_path):
+            try:
+                with open(config_path, "r") as f:
+                    values = json.load(f).get(key, {})
+            except Exception as e:
+                logging.error(f"Could not read {key} from {config_path}: {e}")
+        budget = cls(**{name: value for name, value in values.items() if name in cls.__dataclass_fields__})
+        if budget.max_rss_bytes is None and hasattr(os, "sysconf"):
+            budget.max_rss_bytes = int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") * 0.8)
+        return budget
+
+    def allows(self, result: Dict) -> bool:
+        if "error" in result:
+            return False
+        checks = ((self.max_rss_bytes, result["peak_rss_bytes"], "<="),
+                  (self.max_load_seconds, result["load_seconds"], "<="),
+                  (self.max_first_token_seconds, result["first_token_seconds"], "<="),
+                  (self.min_generation_tps, result["generation_tps"], ">="))
+        return all(limit is None or (value <= limit if op == "<=" else value >= limit) for limit, value, op in checks)
+
+
+def host_fingerprint() -> str:
+    memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") if hasattr(os, "sysconf") else 0
+    return f"{platform.node()}|{platform.machine()}|{platform.processor()}|{os.cpu_count()}|{memory}"
+
+
+def _worker(model_path: str, n_ctx: int, gen_tokens: int) -> Dict:
+    """Runs inside the benchmark subprocess."""
+    start = time.perf_counter()
+    from llama_cpp import Llama
+    llama = Llama(model_path=model_path, n_ctx=n_ctx, n_gpu_layers=0, verbose=False)
+    load_seconds = time.perf_counter() - start
+    prompt_tokens = len(llama.tokenize(BENCH_PROMPT.encode()))
+    start = time.perf_counter()
+    first_token = None
+    generated = 0
+    for _ in llama(BENCH_PROMPT, max_tokens=gen_tokens, temperature=0, stream=True):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        generated += 1
+    total = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "load_seconds": load_seconds,
+        "first_token_seconds": first_token or total,
+        "prompt_tps": prompt_tokens / first_token if first_token else 0.0,
+        "generation_tps": (generated - 1) / (total - first_token) if generated > 1 and total > first_token else 0.0,
+        # ru_maxrss is kilobytes on Linux and bytes on macOS
+        "peak_rss_bytes": peak if sys.platform == "darwin" else peak * 1024,
+    }
+
+
+class ModelBenchmark:
+    """Benchmarks GGUF files in subprocesses and caches the results per host."""
+
+    def __init__(self, cache_path: Optional[str] = None, n_ctx: int = 2048, gen_tokens: int = 32,
+                 timeout: float = 600.0):
+        self.cache_path = cache_path or os.path.join(default_models_dir(), "benchmarks.json")
+        self.n_ctx = n_ctx
+        self.gen_tokens = gen_tokens
+        self.timeout = timeout
+        self.host = host_fingerprint()
+        self.results: Dict[str, Dict] = {}
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, "r") as f:
+                    self.results = json.load(f).get(self.host, {})
+            except (OSError, ValueError):
+                self.results = {}
+
+    def _save(self):
+        cache = {}
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, "r") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+        cache[self.host] = self.results
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temp_path, self.cache_path)
+
+    @staticmethod
+    def _file_key(model_path: str) -> str:
+        stat = os.stat(model_path)
+        return f"{os.path.abspath(model_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def run(self, model_path: str) -> Dict:
+        """Benchmark one model, or return its cached result."""
+        key = self._file_key(model_path)
+        if key in self.results:
+            return self.results[key]
+        logging.info(f"Benchmarking {model_path}")
+        try:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", model_path, str(self.n_ctx), str(self.gen_tokens)],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=self.timeout, check=True)
+            result = json.loads(completed.stdout.decode().strip().splitlines()[-1])
+        except subprocess.TimeoutExpired:
+            result = {"error": f"timed out after {self.timeout}s"}
+        except (subprocess.CalledProcessError, ValueError, IndexError) as e:
+            stderr = (getattr(e, "stderr", b"") or b"").decode(errors="replace").strip()
+            # Crashes (e.g. llama-cpp-python not installed yet) are not cached; timeouts are
+            return {"error": stderr.splitlines()[-1] if stderr else str(e), "crashed": True}
+        result["size_bytes"] = os.path.getsize(model_path)
+        self.results[key] = result
+        self._save()
+        return result
+
+    def select_model(self, model_paths: List[str], budget: Budget) -> Optional[str]:
+        """Return the largest model whose benchmark fits `budget`, or None if none do."""
+        fitting = []
+        for model_path in model_paths:
+            result = self.run(model_path)
+            if budget.allows(result):
+                fitting.append((result["size_bytes"], result["generation_tps"], model_path))
+            else:
+                logging.info(f"{os.path.basename(model_path)} does not fit the budget: {result}")
+        return max(fitting)[2] if fitting else None
+
+
+def estimate_result(size_bytes: int, ram_bytes: int, measured: List[Dict]) -> Dict:
+    """Estimate a benchmark result for a model of `size_bytes` from results of other models on this host.
+
+    Without any measured model only the memory estimate is known, and the speed fields are left out.
+    """
+    estimate = {"size_bytes": size_bytes, "peak_rss_bytes": ram_bytes}
+    measured = [result for result in measured if "error" not in result and result.get("size_bytes")]
+    if measured:
+        count = len(measured)
+        estimate["generation_tps"] = sum(r["generation_tps"] * r["size_bytes"] for r in measured) / count / size_bytes
+        for field in ("load_seconds", "first_token_seconds"):
+            estimate[field] = sum(r[field] / r["size_bytes"] for r in measured) / count * size_bytes
+    return estimate
+
+
+def _allows_estimate(budget: Budget, estimate: Dict) -> bool:
+    # Fields that could not be estimated are checked by ensure_fits after download
+    if budget.max_rss_bytes is not None and estimate["peak_rss_bytes"] > budget.max_rss_bytes:
+        return False
+    if "generation_tps" not in estimate:
+        return True
+    return budget.allows(estimate)
+
+
+def auto_select_model(combined_models: List[Dict], budget: Optional[Budget] = None,
+                      benchmark: Optional[ModelBenchmark] = None) -> str:
+    """Pick a model filename for get_hf_llm without prompting.
+
+    Models already on this host are benchmarked and the largest one within the
+    budget wins. Otherwise the largest model not yet downloaded whose estimated
+    memory and speed fit the budget is chosen; pass its path to `ensure_fits`
+    once it is downloaded. Raises NoModelFitsError if nothing fits.
+    """
+    from model_index import default_model_index
+    budget = budget or Budget.from_config()
+    benchmark = benchmark or ModelBenchmark()
+    index = default_model_index()
+    index.scan()
+    local = {}
+    for model in combined_models:
+        path = index.lookup(model["filename"], rescan=False)
+        if path is not None:
+            local[path] = model["filename"]
+    chosen = benchmark.select_model(list(local), budget) if local else None
+    if chosen is not None:
+        return local[chosen]
+    measured = list(benchmark.results.values())
+    remote = []
+    for model in combined_models:
+        if model["filename"] in local.values():
+            continue
+        estimate = estimate_result(int(model["Size"] * 1024 ** 3), int(model["RAM"] * 1024 ** 3), measured)
+        if _allows_estimate(budget, estimate):
+            remote.append((model["Size"], model["filename"]))
+        else:
+            logging.info(f"{model['filename']} is not expected to fit the budget: {estimate}")
+    if remote:
+        return max(remote)[1]
+    raise NoModelFitsError(f"No model fits the budget {budget}: {len(local)} local model(s) were benchmarked "
+                           f"and {len(combined_models) - len(local)} downloadable model(s) are estimated too "
+                           f"large or too slow for this host.")
+
+
+def ensure_fits(model_path: str, budget: Optional[Budget] = None,
+                benchmark: Optional[ModelBenchmark] = None) -> Dict:
+    """Benchmark a freshly downloaded model and raise NoModelFitsError if it misses the budget."""
+    budget = budget or Budget.from_config()
+    result = (benchmark or ModelBenchmark()).run(model_path)
+    if result.get("crashed"):
+        # Could not measure the model at all, which says nothing about its speed
+        logging.warning(f"Could not benchmark {model_path}: {result['error']}")
+        return result
+    if not budget.allows(result):
+        raise NoModelFitsError(f"{os.path.basename(model_path)} does not fit the budget {budget}: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--worker":
+        print(json.dumps(_worker(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))))
+    else:
+        logging.basicConfig(level=logging.INFO)
+        bench = ModelBenchmark()
+        for path in sys.argv[1:]:
+            print(os.path.basename(path), json.dumps(bench.run(path)))
+        if len(sys.argv) > 1:
+            print("selected:", bench.select_model(sys.argv[1:], Budget.from_config()))
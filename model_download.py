@@ -0,0 +1,270 @@
+"""
+Resumable, parallel HTTP Range downloader for model files.
+
+A file is split into fixed-size chunks that worker threads fetch with HTTP
+Range requests and write straight into a preallocated `<dest>.part` file with
+`pwrite`. Completed chunks are recorded in a `<dest>.progress` sidecar, so an
+interrupted download resumes with only the missing chunks. When every chunk is
+in place the file is checked against the expected size and SHA-256 before it
+is renamed to `dest`. Servers that ignore Range requests are downloaded in a
+single stream.
+
+Credentials passed as `auth_headers` only go to the URL's own host. urllib
+does not carry them across redirects, so a Hugging Face token is not sent on
+to the LFS/CDN host that `hf_hub_url` redirects to. Presigned CDN URLs also
+reject requests that carry an extra Authorization header.
+
+    python3 model_download.py URL DEST [SHA256]
+    python3 model_download.py --self-test
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import urllib.request
+from urllib.error import HTTPError, URLError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from model_index import ChecksumMismatchError, preallocate, sha256_file
+
+CHUNK_SIZE = 16 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+
+class DownloadError(Exception):
+    """Raised when a chunk cannot be fetched after all retries."""
+
+
+class RangeDownloader:
+    """Downloads one URL to `dest` with parallel Range requests and resume support."""
+
+    def __init__(self, url: str, dest: str, sha256: Optional[str] = None, size: Optional[int] = None,
+                 workers: int = 4, chunk_size: int = CHUNK_SIZE, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 30.0, retries: int = 3, auth_headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.dest = dest
+        self.sha256 = sha256
+        self.size = size
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.headers = dict(headers or {})
+        self.auth_headers = dict(auth_headers or {})
+        self.timeout = timeout
+        self.retries = retries
+        self.part_path = dest + ".part"
+        self.progress_path = dest + ".progress"
+        self.done = set()
+        self.bytes_fetched = 0
+        self._lock = threading.Lock()
+
+    def _request(self, method: str = "GET", byte_range: Optional[str] = None):
+        headers = dict(self.headers)
+        if byte_range:
+            headers["Range"] = f"bytes={byte_range}"
+        request = urllib.request.Request(self.url, headers=headers, method=method)
+        for name, value in self.auth_headers.items():
+            # Not forwarded when the server redirects to another host
+            request.add_unredirected_header(name, value)
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def probe(self) -> bool:
+        """Find the file size; returns True if the server honours Range requests."""
+        with self._request(byte_range="0-0") as response:
+            if response.status == 206:
+                self.size = int(response.headers["Content-Range"].rsplit("/", 1)[1])
+                return True
+            length = response.headers.get("Content-Length")
+            self.size = int(length) if length is not None else self.size
+            return False
+
+    def _load_progress(self):
+        if not (os.path.exists(self.progress_path) and os.path.exists(self.part_path)):
+            return
+        try:
+            with open(self.progress_path, "r") as f:
+                progress = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (progress.get("url"), progress.get("size"), progress.get("chunk_size")) == (self.url, self.size, self.chunk_size):
+            self.done = set(progress.get("done", []))
+            logging.info(f"Resuming {self.dest}: {len(self.done)} chunks already downloaded")
+
+    def _save_progress(self):
+        temp_path = self.progress_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"url": self.url, "size": self.size, "chunk_size": self.chunk_size,
+                       "sha256": self.sha256, "done": sorted(self.done)}, f)
+        os.replace(temp_path, self.progress_path)
+
+    def _fetch_chunk(self, fd: int, index: int):
+        start = index * self.chunk_size
+        end = min(start + self.chunk_size, self.size) - 1
+        for attempt in range(self.retries + 1):
+            offset = start
+            try:
+                with self._request(byte_range=f"{start}-{end}") as response:
+                    if response.status != 206:
+                        raise DownloadError(f"Server ignored the Range request for chunk {index}")
+                    while offset <= end:
+                        data = response.read(min(READ_SIZE, end + 1 - offset))
+                        if not data:
+                            break
+                        os.pwrite(fd, data, offset)
+                        offset += len(data)
+                if offset != end + 1:
+                    raise DownloadError(f"Chunk {index} ended after {offset - start} of {end + 1 - start} bytes")
+                break
+            except (HTTPError, URLError, OSError, DownloadError) as e:
+                if attempt == self.retries:
+                    raise DownloadError(f"Chunk {index} of {self.url} failed: {e}") from e
+                time.sleep(min(2 ** attempt, 10))
+        with self._lock:
+            self.bytes_fetched += end + 1 - start
+            self.done.add(index)
+            self._save_progress()
+
+    def _download_stream(self):
+        """Fallback for servers without Range support: one sequential GET, no resume."""
+        with self._request() as response, open(self.part_path, "wb") as f:
+            while True:
+                data = response.read(READ_SIZE)
+                if not data:
+                    break
+                f.write(data)
+                self.bytes_fetched += len(data)
+
+    def download(self) -> str:
+        """Fetch the file and return its SHA-256; raises ChecksumMismatchError if it does not verify."""
+        supports_ranges = self.probe()
+        if not supports_ranges or not self.size:
+            logging.info(f"{self.url} does not support Range requests; downloading in one stream")
+            self._download_stream()
+        else:
+            self._load_progress()
+            chunks = range((self.size + self.chunk_size - 1) // self.chunk_size)
+            fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT | (0 if self.done else os.O_TRUNC), 0o644)
+            try:
+                if not self.done:
+                    preallocate(fd, self.size)
+                    self._save_progress()
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    futures = [executor.submit(self._fetch_chunk, fd, index)
+                               for index in chunks if index not in self.done]
+                    try:
+                        for future in futures:
+                            future.result()
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        return self._finish()
+
+    def _finish(self) -> str:
+        actual_size = os.path.getsize(self.part_path)
+        digest = sha256_file(self.part_path)
+        if (self.size is not None and actual_size != self.size) or (self.sha256 and digest != self.sha256):
+            # A corrupt chunk cannot be located, so start over next time
+            for path in (self.part_path, self.progress_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise ChecksumMismatchError(f"Download of {self.url} did not verify (size {actual_size}, sha256 {digest})")
+        os.replace(self.part_path, self.dest)
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+        return digest
+
+
+def _hf_token() -> Optional[str]:
+    try:
+        import huggingface_hub
+    except ImportError:
+        return None
+    get_token = getattr(huggingface_hub, "get_token", None) or huggingface_hub.HfFolder.get_token
+    return get_token()
+
+
+def hf_download(repo_id: str, filename: str, local_dir: str, sha256: Optional[str] = None,
+                workers: int = 4) -> str:
+    """Download `filename` from a Hugging Face repo into `local_dir`; returns its SHA-256."""
+    from huggingface_hub import hf_hub_url
+    os.makedirs(local_dir, exist_ok=True)
+    token = _hf_token()
+    downloader = RangeDownloader(hf_hub_url(repo_id=repo_id, filename=filename), os.path.join(local_dir, filename),
+                                 sha256=sha256, workers=workers,
+                                 auth_headers={"Authorization": f"Bearer {token}"} if token else None)
+    return downloader.download()
+
+
+def self_test(size: int = 5 * 1024 * 1024 + 123, chunk_size: int = 256 * 1024) -> None:
+    """Download from a local HTTP stand-in server, interrupting once and resuming."""
+    import hashlib
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    payload = os.urandom(size)
+    expected = hashlib.sha256(payload).hexdigest()
+    state = {"requests": 0, "fail_after": 8}
+
+    class RangeHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            state["requests"] += 1
+            if state["fail_after"] is not None and state["requests"] > state["fail_after"]:
+                self.send_error(503)
+                return
+            start, end = 0, size - 1
+            byte_range = self.headers.get("Range")
+            if byte_range:
+                first, _, last = byte_range.split("=", 1)[1].partition("-")
+                start, end = int(first), min(int(last), size - 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(end + 1 - start))
+            self.end_headers()
+            self.wfile.write(payload[start:end + 1])
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/model.gguf"
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            dest = os.path.join(workdir, "model.gguf")
+            interrupted = RangeDownloader(url, dest, sha256=expected, workers=2, chunk_size=chunk_size, retries=0)
+            try:
+                interrupted.download()
+                raise AssertionError("The stand-in server should have interrupted the first download")
+            except DownloadError:
+                pass
+            assert os.path.exists(interrupted.progress_path), "progress sidecar missing after interruption"
+
+            state["fail_after"] = None
+            resumed = RangeDownloader(url, dest, sha256=expected, workers=4, chunk_size=chunk_size)
+            digest = resumed.download()
+            assert digest == expected and os.path.getsize(dest) == size
+            assert resumed.bytes_fetched < size, "resume re-downloaded the whole file"
+            assert not os.path.exists(resumed.progress_path) and not os.path.exists(resumed.part_path)
+            print(f"self-test passed: resumed download fetched {resumed.bytes_fetched} of {size} bytes")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1 and sys.argv[1] == "--self-test":
+        self_test()
+    elif len(sys.argv) >= 3:
+        print(RangeDownloader(sys.argv[1], sys.argv[2], sha256=sys.argv[3] if len(sys.argv) > 3 else None).download())
+    else:
+        print(__doc__)
@@ -0,0 +1,348 @@
+"""
+Persistent index of local GGUF model files for hflocal model resolution.
+
+The index records each model's path, size, mtime, split membership,
+quantization and SHA-256. It lives in `model_index.json` next to the models.
+Resolving a model is a dictionary lookup plus one `stat` instead of probing a
+list of directories.
+
+A file is hashed when it is first indexed, and that hash stays the reference
+for the file. If the file's size or mtime later changes, the recorded hash
+is kept, not replaced. `verify` and `sha256` then report a mismatch unless
+the contents still match. Only a hash passed in explicitly, e.g. one checked
+against the Hugging Face metadata after a download, sets a new reference.
+
+    python3 model_index.py scan      # rebuild the index from the model directories
+    python3 model_index.py list      # show indexed models
+    python3 model_index.py verify    # re-hash every model in parallel
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+INDEX_FILENAME = "model_index.json"
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+QUANTIZATION_PATTERN = re.compile(r"(?:^|[.\-_])((?:I?Q\d+(?:_[A-Z0-9]+)*)|F16|F32|BF16)(?=[.\-]|$)", re.IGNORECASE)
+
+
+def default_models_dir() -> str:
+    """The directory get_hf_llm downloads models into."""
+    try:
+        import appdirs
+        user_data_dir = appdirs.user_data_dir("Open Interpreter")
+    except ImportError:
+        user_data_dir = os.path.join(os.path.expanduser("~"), ".local", "share", "Open Interpreter")
+    return os.path.join(user_data_dir, "models")
+
+
+def parse_quantization(filename: str) -> Optional[str]:
+    """Extract the quantization tag (e.g. Q4_K_M, F16) from a GGUF filename."""
+    match = QUANTIZATION_PATTERN.search(os.path.basename(filename))
+    return match.group(1).upper() if match else None
+
+
+def split_base(filename: str) -> Optional[str]:
+    """Return the combined model name for a `-split-` part, or None for whole files."""
+    return filename.split('-split-')[0] if '-split-' in filename else None
+
+
+def sha256_file(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Hash a file in fixed-size chunks so memory use does not depend on model size."""
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+class ChecksumMismatchError(Exception):
+    """Raised when a model file does not match its expected SHA-256."""
+
+
+def preallocate(fd: int, size: int) -> None:
+    """Reserve `size` bytes for `fd` so the copy does not fragment or run out of space midway."""
+    if size <= 0:
+        return
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass  # e.g. filesystems without fallocate support
+    os.ftruncate(fd, size)
+
+
+def _copy_range(src_fd: int, dst_fd: int, src_offset: int, dst_offset: int, count: int, buffer: bytearray) -> int:
+    """Copy up to `count` bytes, in the kernel when possible; returns the number of bytes copied."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            return os.copy_file_range(src_fd, dst_fd, count, src_offset, dst_offset)
+        except OSError:
+            pass  # cross-device copies on older kernels, unsupported filesystems
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        try:
+            os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+            return os.sendfile(dst_fd, src_fd, src_offset, count)
+        except OSError:
+            pass
+    view = memoryview(buffer)[:count]
+    read = _pread_into(src_fd, view, src_offset)
+    return os.pwrite(dst_fd, view[:read], dst_offset) if read else 0
+
+
+def _pread_into(fd: int, view: memoryview, offset: int) -> int:
+    if hasattr(os, "preadv"):
+        return os.preadv(fd, [view], offset)
+    data = os.pread(fd, len(view), offset)
+    view[:len(data)] = data
+    return len(data)
+
+
+def combine_splits(output_path: str, splits: List[str], expected: Optional[Dict[str, str]] = None,
+                   chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Concatenate `splits` (in sorted order) into `output_path` and return the combined SHA-256.
+
+    Data is copied with `copy_file_range`/`sendfile` where available and a fixed
+    buffer otherwise, so memory use does not grow with model size. Each copied
+    chunk is read back from the output and hashed, both into the combined digest
+    and into a digest for its split. A split is checked against `expected[split]`
+    when given, otherwise against a hash of the split itself. The output is only
+    renamed into place, and the splits only deleted, once every split verifies.
+    """
+    splits = sorted(splits)
+    expected = expected or {}
+    sizes = [os.path.getsize(split) for split in splits]
+    temp_path = output_path + ".part"
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    combined = hashlib.sha256()
+    out_fd = os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        preallocate(out_fd, sum(sizes))
+        offset = 0
+        for split, size in zip(splits, sizes):
+            segment = hashlib.sha256()
+            src_fd = os.open(split, os.O_RDONLY)
+            try:
+                copied = 0
+                while copied < size:
+                    count = _copy_range(src_fd, out_fd, copied, offset + copied, min(chunk_size, size - copied), buffer)
+                    if count <= 0:
+                        raise IOError(f"Unexpected end of {split} after {copied} of {size} bytes")
+                    read = _pread_into(out_fd, view[:count], offset + copied)
+                    segment.update(view[:read])
+                    combined.update(view[:read])
+                    copied += count
+            finally:
+                os.close(src_fd)
+            want = expected.get(split) or sha256_file(split, chunk_size)
+            if segment.hexdigest() != want:
+                raise ChecksumMismatchError(f"{split} was not copied intact into {output_path}")
+            offset += size
+        os.fsync(out_fd)
+    except BaseException:
+        os.close(out_fd)
+        os.remove(temp_path)
+        raise
+    os.close(out_fd)
+    os.replace(temp_path, output_path)
+    for split in splits:
+        os.remove(split)
+    return combined.hexdigest()
+
+
+class ModelIndex:
+    """JSON-backed index of GGUF files found in a set of model directories."""
+
+    def __init__(self, roots: Iterable[str], index_path: Optional[str] = None):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.index_path = index_path or os.path.join(self.roots[0], INDEX_FILENAME)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    self.entries = json.load(f).get("models", {})
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable model index {self.index_path}: {e}")
+                self.entries = {}
+
+    def save(self):
+        """Write the index atomically."""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        temp_path = self.index_path + ".tmp"
+        with self._lock:
+            with open(temp_path, 'w') as f:
+                json.dump({"version": 1, "models": self.entries}, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.index_path)
+
+    @staticmethod
+    def _stat_matches(entry: Dict) -> bool:
+        try:
+            stat = os.stat(entry["path"])
+        except OSError:
+            return False
+        return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+    def add(self, path: str, splits: Optional[List[str]] = None, sha256: Optional[str] = None) -> Dict:
+        """Record a model file, hashing it if it has no recorded hash.
+
+        An explicit `sha256` replaces the reference hash. Otherwise the recorded
+        hash is kept even when the file's size or mtime changed.
+        """
+        path = os.path.abspath(path)
+        filename = os.path.basename(path)
+        stat = os.stat(path)
+        previous = self.entries.get(filename)
+        if previous is not None and previous["path"] != path:
+            previous = None
+        if sha256 is not None:
+            hash_stat = [stat.st_size, stat.st_mtime_ns]
+        elif previous is not None and previous.get("sha256"):
+            sha256 = previous["sha256"]
+            # The size and mtime the recorded hash was last confirmed for
+            hash_stat = previous.get("hash_stat") or [previous["size"], previous["mtime_ns"]]
+        else:
+            logging.info(f"Hashing {path}")
+            sha256 = sha256_file(path)
+            hash_stat = [stat.st_size, stat.st_mtime_ns]
+        entry = {
+            "path": path,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "quantization": parse_quantization(filename),
+            "split_of": split_base(filename),
+            "splits": splits or (previous or {}).get("splits") or [],
+            "sha256": sha256,
+            "hash_stat": hash_stat,
+        }
+        with self._lock:
+            self.entries[filename] = entry
+        return entry
+
+    def scan(self) -> int:
+        """Re-read the model directories, dropping entries whose files are gone."""
+        found = set()
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            for filename in os.listdir(root):
+                if "gguf" not in filename or filename.endswith((".tmp", ".progress", ".part")):
+                    continue
+                path = os.path.join(root, filename)
+                if os.path.isfile(path) and filename not in found:
+                    found.add(filename)
+                    self.add(path)
+        with self._lock:
+            for filename in set(self.entries) - found:
+                if not self._stat_matches(self.entries[filename]):
+                    del self.entries[filename]
+        self.save()
+        return len(found)
+
+    def lookup(self, filename: str, rescan: bool = True) -> Optional[str]:
+        """Return the local path of `filename`, or None if it is not on this host."""
+        entry = self.entries.get(filename)
+        if entry is not None and self._stat_matches(entry):
+            return entry["path"]
+        if rescan:
+            self.scan()
+            return self.lookup(filename, rescan=False)
+        return None
+
+    @staticmethod
+    def _hash_current(entry: Dict) -> bool:
+        """True if the file has not changed since its recorded hash was last confirmed."""
+        return ModelIndex._stat_matches(entry) and entry.get("hash_stat") == [entry["size"], entry["mtime_ns"]]
+
+    def _check(self, filename: str, digest: str) -> bool:
+        """Compare a fresh digest with the recorded hash, confirming the file's stat on a match."""
+        entry = self.entries[filename]
+        if digest != entry["sha256"]:
+            logging.error(f"Model {filename} changed since it was indexed: sha256 {digest}, "
+                          f"recorded {entry['sha256']}")
+            return False
+        stat = os.stat(entry["path"])
+        with self._lock:
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, hash_stat=[stat.st_size, stat.st_mtime_ns])
+        return True
+
+    def sha256(self, filename: str) -> str:
+        """Return the file's SHA-256, re-hashing it only if it changed since the hash was confirmed.
+
+        Raises ChecksumMismatchError if the contents no longer match the recorded hash.
+        """
+        entry = self.entries[filename]
+        if not self._hash_current(entry):
+            entry = self.add(entry["path"])
+            if not self._check(filename, sha256_file(entry["path"])):
+                raise ChecksumMismatchError(f"Model {filename} does not match its recorded SHA-256")
+            self.save()
+        return entry["sha256"]
+
+    def verify(self, workers: Optional[int] = None) -> Dict[str, bool]:
+        """Re-hash every indexed file in parallel; returns filename -> matches recorded hash."""
+        entries = [(filename, dict(entry)) for filename, entry in self.entries.items()]
+
+        def _hash(item):
+            filename, entry = item
+            if not os.path.exists(entry["path"]):
+                return filename, None
+            return filename, sha256_file(entry["path"])
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as executor:
+            for filename, digest in executor.map(_hash, entries):
+                if digest is None:
+                    logging.error(f"Model {filename} is missing")
+                    results[filename] = False
+                elif not self.entries[filename].get("sha256"):
+                    # Indexed before files were hashed on add; this digest becomes the reference
+                    self.add(self.entries[filename]["path"], sha256=digest)
+                    results[filename] = True
+                else:
+                    results[filename] = self._check(filename, digest)
+        self.save()
+        return results
+
+
+def default_model_index() -> ModelIndex:
+    """Index over the directories get_hf_llm searches for models."""
+    return ModelIndex([
+        default_models_dir(),
+        "llama.cpp/models/",
+        os.path.join(os.path.expanduser("~"), "llama.cpp", "models"),
+    ])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    index = default_model_index()
+    if command == "scan":
+        print(f"Indexed {index.scan()} model files.")
+    elif command == "verify":
+        index.scan()
+        results = index.verify()
+        for filename, ok in sorted(results.items()):
+            print(f"{'OK  ' if ok else 'FAIL'} {filename}")
+        sys.exit(0 if all(results.values()) else 1)
+    else:
+        for filename, entry in sorted(index.entries.items()):
+            print(f"{filename} | {entry['size'] / 1024 ** 3:.1f} GB | {entry['quantization'] or '-'} | "
+                  f"{(entry['sha256'] or 'not hashed')[:16]} | {entry['path']}")
@@ -0,0 +1,280 @@
+"""
+Warm, sandboxed Python interpreter workers for PythonSkill.
+
+Starting a fresh interpreter for every snippet costs tens of milliseconds
+before any user code runs. `PythonWorkerPool` keeps long-lived worker
+processes that preload configured modules once, run under the rlimits from
+`sandbox.apply_limits`, and execute snippets sent over their stdin/stdout
+pipes using the length-prefixed JSON frames from `sandbox.py`.
+
+Snippet output is streamed back one line per frame while the snippet runs,
+with stdout and stderr kept apart and lines longer than `line_limit` sent in
+pieces, so frames stay small and the caller sees output as it is printed. A
+snippet that is cancelled or runs past its timeout has its worker killed and
+replaced, so the next snippet never waits behind it.
+
+A worker's globals persist between snippets unless `reset_namespace` is set.
+Workers are recycled after `max_executions` snippets or once their peak RSS
+passes `max_rss_bytes`.
+
+Run `python3 pyworkers.py` to benchmark warm workers against cold spawns.
+"""
+
+import io
+import os
+import sys
+import time
+import json
+import struct
+import select
+import logging
+import resource
+import threading
+import subprocess
+import contextlib
+import traceback
+from queue import Queue
+from typing import Any, Callable, Dict, List, Optional
+
+from sandbox import (FRAME_HEADER, KIND_REQUEST, KIND_RESULT, MAX_FRAME_SIZE, SandboxError, SandboxTimeout,
+                     apply_limits)
+
+KIND_OUTPUT = 5
+
+
+class SnippetCancelled(SandboxError):
+    """Raised when a running snippet is cancelled and its worker killed."""
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            raise EOFError("Python worker pipe closed.")
+        data += chunk
+    return data
+
+
+def _write(stream, kind: int, payload: Any) -> None:
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    data = memoryview(FRAME_HEADER.pack(len(body), kind) + body)
+    while data:
+        data = data[stream.write(data):]  # unbuffered pipes may take a partial write
+    stream.flush()
+
+
+def _read(stream, max_size: int = MAX_FRAME_SIZE):
+    length, kind = FRAME_HEADER.unpack(_read_exact(stream, FRAME_HEADER.size))
+    if length > max_size:
+        raise SandboxError(f"Frame of {length} bytes exceeds the {max_size} byte limit.")
+    return kind, json.loads(_read_exact(stream, length))
+
+
+class _LineWriter(io.TextIOBase):
+    """Text stream that sends each line written by a snippet as an output frame."""
+
+    def __init__(self, name: str, protocol, line_limit: int):
+        self.name = name
+        self.protocol = protocol
+        self.line_limit = line_limit
+        self._partial = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._partial += text
+        if "\n" in self._partial:
+            *lines, self._partial = self._partial.split("\n")
+            for line in lines:
+                self._send(line)
+        while len(self._partial) > self.line_limit:
+            self._send(self._partial[:self.line_limit])
+            self._partial = self._partial[self.line_limit:]
+        return len(text)
+
+    def _send(self, line: str):
+        for start in range(0, max(len(line), 1), self.line_limit):
+            _write(self.protocol, KIND_OUTPUT, {"stream": self.name, "line": line[start:start + self.line_limit]})
+
+    def end(self):
+        """Send a final line that has no trailing newline."""
+        if self._partial:
+            self._send(self._partial)
+            self._partial = ""
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def worker_main(config: Dict[str, Any]) -> None:
+    """Serve snippets on stdin/stdout until the pipe closes."""
+    stdin = sys.stdin.buffer
+    # Keep the protocol pipe on a private descriptor so child processes started by a snippet cannot write into it.
+    protocol = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    line_limit = config.get("line_limit", 64 * 1024)
+    pristine = {"__name__": "__main__", "__builtins__": __builtins__}
+    for module in config.get("preload", []):
+        pristine[module.partition(".")[0]] = __import__(module)
+    apply_limits(config.get("cpu_seconds"), config.get("memory_bytes"), config.get("max_fds"))
+    namespace = dict(pristine)
+    while True:
+        try:
+            _, request = _read(stdin)
+        except EOFError:
+            return
+        if request.get("reset"):
+            namespace = dict(pristine)
+        out = _LineWriter("stdout", protocol, line_limit)
+        err = _LineWriter("stderr", protocol, line_limit)
+        returncode = 0
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                exec(compile(request["code"], "<snippet>", "exec"), namespace)
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException:
+                traceback.print_exc()
+                returncode = 1
+        out.end()
+        err.end()
+        _write(protocol, KIND_RESULT, {"returncode": returncode, "rss": _peak_rss_bytes()})
+
+
+class PythonWorkerPool:
+    """Pool of long-lived Python workers that execute snippets over a pipe."""
+
+    def __init__(self, size: int = 2, preload: Optional[List[str]] = None, reset_namespace: bool = True,
+                 max_executions: int = 500, max_rss_bytes: int = 256 * 1024 * 1024, timeout: float = 30.0,
+                 workdir: str = "executor/python", cpu_seconds: Optional[int] = None,
+                 memory_bytes: Optional[int] = 1024 * 1024 * 1024, max_fds: Optional[int] = 64,
+                 line_limit: int = 64 * 1024):
+        self.size = size
+        self.reset_namespace = reset_namespace
+        self.max_executions = max_executions
+        self.max_rss_bytes = max_rss_bytes
+        self.timeout = timeout
+        self.workdir = os.path.abspath(workdir)
+        self.config = {"preload": list(preload or []), "cpu_seconds": cpu_seconds,
+                       "memory_bytes": memory_bytes, "max_fds": max_fds, "line_limit": line_limit}
+        # An output frame carries at most `line_limit` characters, each escaped to at most 6 bytes of JSON
+        self.max_frame_bytes = 6 * line_limit + 256
+        self._idle: "Queue[Dict[str, Any]]" = Queue()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> "PythonWorkerPool":
+        """Spawn `size` workers; they become warm in the background."""
+        with self._lock:
+            if not self._started:
+                os.makedirs(self.workdir, exist_ok=True)
+                os.chmod(self.workdir, 0o700)
+                for _ in range(self.size):
+                    self._idle.put(self._spawn())
+                self._started = True
+        return self
+
+    def _spawn(self) -> Dict[str, Any]:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(self.config)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=self.workdir, start_new_session=True, bufsize=0)
+        return {"process": process, "executions": 0}
+
+    @staticmethod
+    def _retire(worker):
+        process = worker["process"]
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdin.close()
+        process.stdout.close()
+
+    def execute(self, code: str, reset: Optional[bool] = None, timeout: Optional[float] = None,
+                on_line: Optional[Callable[[str, str], None]] = None,
+                cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Run `code` in a warm worker and return its returncode.
+
+        Each ("stdout" | "stderr", line) goes to `on_line` as soon as the snippet prints it; without a
+        callback the lines are collected in the result instead. Setting `cancel`, or running past
+        `timeout`, kills the worker and raises SnippetCancelled or SandboxTimeout.
+        """
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        reset = self.reset_namespace if reset is None else reset
+        worker = self._idle.get()
+        process = worker["process"]
+        result: Dict[str, Any] = {"returncode": None, "stdout": [], "stderr": []}
+        finished = False
+        deadline = time.monotonic() + timeout
+        try:
+            _write(process.stdin, KIND_REQUEST, {"code": code, "reset": reset})
+            while not finished:
+                if cancel is not None and cancel.is_set():
+                    raise SnippetCancelled(f"Python snippet cancelled; worker {process.pid} killed.")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise SandboxTimeout(f"Python snippet exceeded {timeout}s; worker {process.pid} killed.")
+                readable, _, _ = select.select([process.stdout], [], [], min(remaining, 0.1))
+                if not readable:
+                    continue
+                kind, payload = _read(process.stdout, self.max_frame_bytes)
+                if kind == KIND_RESULT:
+                    result.update(payload)
+                    finished = True
+                elif on_line is not None:
+                    on_line(payload["stream"], payload["line"])
+                else:
+                    result[payload["stream"]].append(payload["line"])
+        except (EOFError, OSError, struct.error, ValueError) as e:
+            raise SandboxError(f"Python worker {process.pid} died or sent a bad frame: {e}") from e
+        finally:
+            worker["executions"] += 1
+            # A worker that did not finish its snippet is still running it, or its pipe is out of sync
+            replace = not finished or worker["executions"] >= self.max_executions
+            if not replace and result["rss"] > self.max_rss_bytes:
+                logging.info(f"Recycling Python worker {process.pid} after reaching its memory threshold")
+                replace = True
+            if replace:
+                self._retire(worker)
+                worker = self._spawn()
+            self._idle.put(worker)
+        return result
+
+    def close(self):
+        """Terminate every worker."""
+        with self._lock:
+            while not self._idle.empty():
+                self._retire(self._idle.get())
+            self._started = False
+
+
+def benchmark_latency(runs: int = 50, code: str = "x = sum(range(100))\nprint(x)") -> Dict[str, float]:
+    """Compare the mean latency of warm workers with a cold interpreter per snippet."""
+    pool = PythonWorkerPool(size=1).start()
+    pool.execute("pass")
+    start = time.perf_counter()
+    for _ in range(runs):
+        pool.execute(code)
+    warm = (time.perf_counter() - start) / runs
+    pool.close()
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, check=True)
+    cold = (time.perf_counter() - start) / runs
+    print(f"warm worker: {warm * 1000:8.2f} ms/snippet")
+    print(f"cold spawn:  {cold * 1000:8.2f} ms/snippet ({cold / warm:.0f}x slower)")
+    return {"warm_seconds": warm, "cold_seconds": cold}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--worker":
+        worker_main(json.loads(sys.argv[2]))
+    else:
+        benchmark_latency()
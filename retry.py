@@ -0,0 +1,200 @@
+"""
+Retry engine with decorrelated jitter, per-exception policies, deadlines and retry budgets.
+
+Backoff uses decorrelated jitter: each delay is drawn uniformly from
+`[base, 3 * previous delay]` and capped, so many agents failing at the same
+time spread their retries out instead of retrying in lockstep. A `RetryBudget`
+shared across callers allows retries only up to a fraction of first attempts
+(10% by default, plus a small reserve). During an outage this bounds the
+extra load that retries put on the failing service.
+
+    @retry(max_attempts=5, deadline=30)
+    def fetch(): ...
+
+    @retry(policies={TimeoutError: {"max_attempts": 2}}, give_up_on=(ValueError,))
+    async def call_model(): ...
+
+Counts of calls, attempts, retries and give-ups are kept per policy name in
+`METRICS`.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import functools
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+
+class RetryBudget:
+    """Token bucket: each first attempt deposits `ratio` tokens and each retry spends one."""
+
+    def __init__(self, ratio: float = 0.1, reserve: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = reserve
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class RetryMetrics:
+    """Thread-safe counters for one retry policy."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+DEFAULT_BUDGET = RetryBudget()
+METRICS: Dict[str, RetryMetrics] = defaultdict(RetryMetrics)
+
+
+class RetryPolicy:
+    """When and how long to wait before retrying a failed call."""
+
+    def __init__(self, max_attempts: int = 3, base: float = 0.1, cap: float = 60.0,
+                 deadline: Optional[float] = None, retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+                 give_up_on: Tuple[Type[BaseException], ...] = (),
+                 policies: Optional[Dict[Type[BaseException], Dict[str, Any]]] = None,
+                 budget: Optional[RetryBudget] = DEFAULT_BUDGET, name: Optional[str] = None):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.deadline = deadline
+        self.retry_on = retry_on
+        self.give_up_on = give_up_on
+        self.policies = policies or {}
+        self.budget = budget
+        self.name = name
+
+    def _settings(self, error: BaseException) -> Dict[str, Any]:
+        """Per-exception overrides, matched on the most specific exception class."""
+        for cls in type(error).__mro__:
+            if cls in self.policies:
+                return dict({"max_attempts": self.max_attempts, "base": self.base, "cap": self.cap},
+                            **self.policies[cls])
+        return {"max_attempts": self.max_attempts, "base": self.base, "cap": self.cap}
+
+    def next_delay(self, error: BaseException, attempt: int, previous: float, started: float,
+                   metrics: RetryMetrics) -> Optional[float]:
+        """Return the delay before the next attempt, or None to give up and re-raise."""
+        if isinstance(error, self.give_up_on) or not isinstance(error, self.retry_on):
+            metrics.incr("not_retryable")
+            return None
+        settings = self._settings(error)
+        if attempt >= settings["max_attempts"]:
+            metrics.incr("exhausted")
+            return None
+        delay = min(settings["cap"], random.uniform(settings["base"], max(settings["base"], previous * 3)))
+        if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+            metrics.incr("deadline_exceeded")
+            return None
+        if self.budget is not None and not self.budget.try_spend():
+            metrics.incr("budget_exhausted")
+            return None
+        metrics.incr("retries")
+        metrics.incr(f"retries.{type(error).__name__}")
+        return delay
+
+    def _begin(self, fn) -> RetryMetrics:
+        metrics = METRICS[self.name or getattr(fn, "__qualname__", repr(fn))]
+        metrics.incr("calls")
+        if self.budget is not None:
+            self.budget.record_call()
+        return metrics
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Call `fn`, retrying according to this policy."""
+        metrics = self._begin(fn)
+        started = time.monotonic()
+        delay = self.base
+        attempt = 0
+        while True:
+            attempt += 1
+            metrics.incr("attempts")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(e, attempt, delay, started, metrics)
+                if delay is None:
+                    metrics.incr("failures")
+                    raise
+                logging.warning(f"{getattr(fn, '__name__', fn)} failed on attempt {attempt} ({e}); "
+                                f"retrying in {delay:.2f}s")
+                time.sleep(delay)
+            else:
+                metrics.incr("successes")
+                return result
+
+    async def call_async(self, fn: Callable, *args, **kwargs) -> Any:
+        """Await `fn(*args, **kwargs)`, retrying according to this policy without blocking the loop."""
+        metrics = self._begin(fn)
+        started = time.monotonic()
+        delay = self.base
+        attempt = 0
+        while True:
+            attempt += 1
+            metrics.incr("attempts")
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(e, attempt, delay, started, metrics)
+                if delay is None:
+                    metrics.incr("failures")
+                    raise
+                logging.warning(f"{getattr(fn, '__name__', fn)} failed on attempt {attempt} ({e}); "
+                                f"retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            else:
+                metrics.incr("successes")
+                return result
+
+
+def retry(policy: Optional[RetryPolicy] = None, **kwargs):
+    """Decorate a function or coroutine function so failed calls are retried under `policy`.
+
+    Pass either a `RetryPolicy` or `RetryPolicy` keyword arguments, not both.
+    """
+    if policy is not None and kwargs:
+        raise TypeError(f"retry() takes a policy or policy settings, not both; got policy and {sorted(kwargs)}")
+
+    def decorator(fn):
+        active = policy or RetryPolicy(**dict({"name": fn.__qualname__}, **kwargs))
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kw):
+                return await active.call_async(fn, *args, **kw)
+            async_wrapper.retry_policy = active
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kw):
+            return active.call(fn, *args, **kw)
+        wrapper.retry_policy = active
+        return wrapper
+    return decorator
+
+
+def metrics_snapshot() -> Dict[str, Dict[str, int]]:
+    """Counters for every policy that has been used."""
+    return {name: metrics.snapshot() for name, metrics in list(METRICS.items())}
@@ -0,0 +1,347 @@
+"""
+Pre-forked sandboxed worker pool for untrusted agents and shell commands.
+
+`SandboxPool.start()` forks a single-threaded zygote process. Workers are
+forked from the zygote rather than from the (threaded) controller, so spawning
+or replacing a worker is a cheap fork of an already-warm interpreter. Each
+worker applies rlimits on CPU time, address space and open files, changes into
+its working directory with a private umask, and then serves calls over a
+socket. The working directory is not a filesystem jail: a worker can read and
+write anything the user running the pool can. Run the pool under a separate
+user, in a container or in a chroot when agents must not reach the rest of
+the system.
+
+The timeout of a call covers the whole reply. A worker that stalls halfway
+through a frame is killed like one that never answers.
+
+Frames on the socket are a 5-byte header (big-endian payload length and a kind
+byte) followed by a UTF-8 JSON payload. JSON is used instead of pickle so a
+compromised worker cannot execute code in the controller through its reply.
+
+Start the pool before the controller starts other threads.
+"""
+
+import os
+import json
+import time
+import signal
+import socket
+import struct
+import logging
+import resource
+import threading
+import subprocess
+import importlib.util
+from queue import Empty, Queue
+from typing import Any, Dict, Optional, Tuple
+
+FRAME_HEADER = struct.Struct("!IB")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+KIND_REQUEST = 1
+KIND_RESULT = 2
+KIND_ERROR = 3
+KIND_SPAWN = 4
+
+
+class SandboxError(Exception):
+    """Raised when a sandboxed call fails or its worker dies."""
+
+
+class SandboxTimeout(SandboxError):
+    """Raised when a sandboxed call exceeds its timeout."""
+
+
+def _recv_exact(sock: socket.socket, size: int, deadline: Optional[float] = None) -> bytes:
+    chunks = []
+    while size:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SandboxTimeout("Sandbox peer did not send a complete frame in time.")
+            sock.settimeout(remaining)
+        try:
+            chunk = sock.recv(size)
+        except socket.timeout:
+            raise SandboxTimeout("Sandbox peer did not send a complete frame in time.")
+        if not chunk:
+            raise EOFError("Sandbox peer closed the connection.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def write_frame(sock: socket.socket, kind: int, payload: Any) -> None:
+    """Send one frame carrying a JSON-serializable payload."""
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    sock.sendall(FRAME_HEADER.pack(len(body), kind) + body)
+
+
+def read_frame(sock: socket.socket, deadline: Optional[float] = None) -> Tuple[int, Any]:
+    """Receive one frame and return its kind and decoded payload.
+
+    `deadline` is a `time.monotonic()` value by which the whole frame must have arrived.
+    """
+    try:
+        length, kind = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size, deadline))
+        if length > MAX_FRAME_SIZE:
+            raise SandboxError(f"Frame of {length} bytes exceeds the {MAX_FRAME_SIZE} byte limit.")
+        return kind, json.loads(_recv_exact(sock, length, deadline))
+    finally:
+        if deadline is not None:
+            sock.settimeout(None)
+
+
+def apply_limits(cpu_seconds: Optional[int], memory_bytes: Optional[int], max_fds: Optional[int]) -> None:
+    """Apply rlimits to the current process; None leaves a limit untouched."""
+    if cpu_seconds is not None:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    if memory_bytes is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    if max_fds is not None:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (max_fds, max_fds))
+
+
+def _cpu_used() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _find_agent_class(module):
+    """Return the agent class defined in `module`, matching AgentInterface by its methods."""
+    methods = ("initialize", "execute", "get_data", "shutdown")
+    agent_class = None
+    for attribute_name in dir(module):
+        attribute = getattr(module, attribute_name)
+        if (isinstance(attribute, type) and getattr(attribute, "__module__", None) == module.__name__
+                and all(callable(getattr(attribute, m, None)) for m in methods)):
+            agent_class = attribute
+    return agent_class
+
+
+class _Worker:
+    """Request loop that runs inside a sandboxed worker process."""
+
+    def __init__(self, sock, cpu_seconds):
+        self.sock = sock
+        self.cpu_seconds = cpu_seconds
+        self.modules: Dict[str, Tuple[int, Any]] = {}
+
+    def serve(self):
+        while True:
+            try:
+                kind, request = read_frame(self.sock)
+            except EOFError:
+                return
+            if self.cpu_seconds is not None:
+                # RLIMIT_CPU counts the whole process lifetime; give each call its own allowance.
+                soft = int(_cpu_used()) + self.cpu_seconds
+                hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+                resource.setrlimit(resource.RLIMIT_CPU, (min(soft, hard), hard))
+            try:
+                handler = getattr(self, f"call_{request['call']}")
+                write_frame(self.sock, KIND_RESULT, handler(**request.get("args", {})))
+            except Exception as e:
+                write_frame(self.sock, KIND_ERROR, f"{type(e).__name__}: {e}")
+
+    def call_agent(self, module_path, agent_name):
+        """Run one initialize/execute/get_data/shutdown cycle of an agent module."""
+        mtime = os.stat(module_path).st_mtime_ns
+        cached = self.modules.get(module_path)
+        if cached is None or cached[0] != mtime:
+            spec = importlib.util.spec_from_file_location(agent_name, module_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            cached = self.modules[module_path] = (mtime, module)
+        agent_class = _find_agent_class(cached[1])
+        if agent_class is None:
+            raise SandboxError(f"No agent class found in {module_path}")
+        agent = agent_class()
+        agent.initialize()
+        try:
+            agent.execute()
+            return agent.get_data()
+        finally:
+            agent.shutdown()
+
+    def call_command(self, command, shell=False, timeout=None):
+        """Run a command inside the worker's limits and return its exit status and output."""
+        result = subprocess.run(command, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                universal_newlines=True, timeout=timeout)
+        return {"returncode": result.returncode, "stdout": result.stdout, "stderr": result.stderr}
+
+
+class SandboxPool:
+    """Pool of pre-forked, rlimited worker processes spawned from a zygote."""
+
+    def __init__(self, size: int = 2, workdir: str = "executor/sandbox", cpu_seconds: Optional[int] = 10,
+                 memory_bytes: Optional[int] = 512 * 1024 * 1024, max_fds: Optional[int] = 64,
+                 timeout: float = 30.0, max_calls: int = 1000):
+        self.size = size
+        self.workdir = os.path.abspath(workdir)
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.max_fds = max_fds
+        self.timeout = timeout
+        self.max_calls = max_calls
+        self.zygote_pid = None
+        self._control = None
+        self._control_lock = threading.Lock()
+        self._idle: "Queue[Dict[str, Any]]" = Queue()
+        self._missing = 0  # workers that died and could not be replaced yet
+        self._missing_lock = threading.Lock()
+
+    def start(self):
+        """Fork the zygote and pre-fork `size` workers."""
+        os.makedirs(self.workdir, exist_ok=True)
+        os.chmod(self.workdir, 0o700)
+        parent_end, zygote_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                keep = zygote_end.fileno()
+                os.closerange(3, keep)
+                os.closerange(keep + 1, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+                self._zygote_loop(zygote_end)
+            finally:
+                os._exit(0)
+        zygote_end.close()
+        self.zygote_pid = pid
+        self._control = parent_end
+        for _ in range(self.size):
+            self._idle.put(self._spawn_worker())
+        logging.info(f"Sandbox pool started with {self.size} workers in {self.workdir}")
+        return self
+
+    def _zygote_loop(self, control):
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        while True:
+            try:
+                read_frame(control)
+            except EOFError:
+                return
+            ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+            pid = os.fork()
+            if pid == 0:
+                control.close()
+                ours.close()
+                self._worker_main(theirs)
+            theirs.close()
+            socket.send_fds(control, [FRAME_HEADER.pack(pid, KIND_SPAWN)], [ours.fileno()])
+            ours.close()
+
+    def _worker_main(self, sock):
+        try:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            os.setsid()
+            os.chdir(self.workdir)
+            os.umask(0o077)
+            cpu_hard = None if self.cpu_seconds is None else self.cpu_seconds * self.max_calls
+            apply_limits(cpu_hard, self.memory_bytes, self.max_fds)
+            _Worker(sock, self.cpu_seconds).serve()
+        finally:
+            os._exit(0)
+
+    def _spawn_worker(self, attempts: int = 3) -> Dict[str, Any]:
+        error = None
+        for attempt in range(1, attempts + 1):
+            try:
+                with self._control_lock:
+                    if self._control is None:
+                        raise EOFError("Sandbox pool is closed.")
+                    write_frame(self._control, KIND_SPAWN, None)
+                    data, fds, _, _ = socket.recv_fds(self._control, FRAME_HEADER.size, 1)
+                if len(data) != FRAME_HEADER.size or not fds:
+                    raise EOFError("Sandbox zygote did not send a worker.")
+                pid, _ = FRAME_HEADER.unpack(data)
+                return {"pid": pid, "sock": socket.socket(fileno=fds[0]), "calls": 0}
+            except (EOFError, OSError) as e:
+                error = e
+                logging.warning(f"Spawning a sandbox worker failed on attempt {attempt}: {e}")
+        raise SandboxError(f"Could not spawn a sandbox worker: {error}") from error
+
+    def _acquire(self) -> Dict[str, Any]:
+        """Take an idle worker, first replacing any that could not be respawned earlier."""
+        while True:
+            with self._missing_lock:
+                missing, self._missing = self._missing, 0
+            try:
+                for _ in range(missing):
+                    self._idle.put(self._spawn_worker())
+                    missing -= 1
+            except SandboxError:
+                with self._missing_lock:
+                    self._missing += missing
+                    if self._missing >= self.size:
+                        raise
+            try:
+                return self._idle.get(timeout=1.0)
+            except Empty:
+                continue
+
+    def _release(self, worker, replace: bool):
+        worker["calls"] += 1
+        if not replace and worker["calls"] < self.max_calls:
+            self._idle.put(worker)
+            return
+        self._retire(worker)
+        try:
+            self._idle.put(self._spawn_worker())
+        except SandboxError as e:
+            with self._missing_lock:
+                self._missing += 1
+            logging.error(f"Sandbox pool is down a worker: {e}")
+
+    def _retire(self, worker):
+        try:
+            os.killpg(worker["pid"], signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        worker["sock"].close()
+
+    def call(self, call: str, args: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Any:
+        """Run `call` in an idle worker and return its JSON-decoded result."""
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire()
+        replace = False
+        try:
+            write_frame(worker["sock"], KIND_REQUEST, {"call": call, "args": args or {}})
+            kind, payload = read_frame(worker["sock"], time.monotonic() + timeout)
+        except SandboxTimeout as e:
+            replace = True
+            raise SandboxTimeout(f"Sandboxed {call} exceeded {timeout}s; worker {worker['pid']} killed.") from e
+        except (EOFError, OSError) as e:
+            replace = True
+            raise SandboxError(f"Sandbox worker {worker['pid']} died during {call}: {e}") from e
+        except (SandboxError, ValueError) as e:
+            # An oversized or undecodable frame leaves the stream out of sync; never reuse that worker.
+            replace = True
+            raise SandboxError(f"Sandbox worker {worker['pid']} sent a bad reply to {call}: {e}") from e
+        finally:
+            self._release(worker, replace)
+        if kind == KIND_ERROR:
+            raise SandboxError(payload)
+        return payload
+
+    def run_agent(self, agent_name: str, module_path: str, timeout: Optional[float] = None) -> Any:
+        """Run one lifecycle of an untrusted agent module in a worker."""
+        return self.call("agent", {"module_path": os.path.abspath(module_path), "agent_name": agent_name}, timeout)
+
+    def run_command(self, command, shell: bool = False, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run a shell command in a worker; returns returncode, stdout and stderr."""
+        timeout = self.timeout if timeout is None else timeout
+        return self.call("command", {"command": command, "shell": shell, "timeout": timeout}, timeout)
+
+    def close(self):
+        """Kill all workers and the zygote."""
+        while not self._idle.empty():
+            self._retire(self._idle.get())
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+        if self.zygote_pid is not None:
+            try:
+                os.waitpid(self.zygote_pid, 0)
+            except ChildProcessError:
+                pass
+            self.zygote_pid = None
@@ -0,0 +1,270 @@
+"""
+Subprocess skills for SimpleCoder and an asyncio runner that executes them.
+
+`AsyncSkillRunner` runs skills as subprocesses under a concurrency limit,
+streams stdout and stderr line by line to the caller, enforces per-skill
+timeouts, supports cancellation and keeps only the tail of each stream in
+memory. Output beyond `max_output_bytes` per stream is dropped from the
+captured result (but still streamed), and lines longer than `line_limit` are
+delivered in pieces, so a chatty command cannot exhaust memory.
+
+Synchronous callers such as the SimpleCoder console call `start()` to run the
+event loop in a background thread and `submit()` jobs to it.
+"""
+
+import sys
+import asyncio
+import logging
+import itertools
+import threading
+import concurrent.futures
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class SkillResult:
+    returncode: Optional[int]
+    stdout: List[str] = field(default_factory=list)
+    stderr: List[str] = field(default_factory=list)
+    truncated: bool = False
+    timed_out: bool = False
+    cancelled: bool = False
+
+
+class SubprocessSkill(ABC):
+    """A skill that runs a command built from its parameter."""
+
+    timeout: Optional[float] = None
+
+    @abstractmethod
+    def command(self, param: str) -> List[str]:
+        """Return the argv to run for `param`."""
+        pass
+
+    def execute(self, param: str) -> SkillResult:
+        """Run the skill synchronously, printing output as it arrives."""
+        return asyncio.run(AsyncSkillRunner().run(self, param, on_line=_print_line))
+
+
+class BashSkill(SubprocessSkill):
+    def command(self, param):
+        return ["bash", "-c", param]
+
+
+class PythonSkill(SubprocessSkill):
+    """Runs Python snippets, in a warm `pyworkers.PythonWorkerPool` when one is given."""
+
+    def __init__(self, pool=None):
+        self.pool = pool
+
+    def command(self, param):
+        return [sys.executable, "-c", param]
+
+
+def _print_line(stream: str, line: str) -> None:
+    print(line, file=sys.stderr if stream == "stderr" else sys.stdout)
+
+
+class _TailBuffer:
+    """Keeps the most recent lines of a stream within a byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.lines = deque()
+        self.size = 0
+        self.truncated = False
+
+    def append(self, line: str):
+        self.lines.append(line)
+        self.size += len(line)
+        while self.size > self.max_bytes and len(self.lines) > 1:
+            self.size -= len(self.lines.popleft())
+            self.truncated = True
+
+
+class AsyncSkillRunner:
+    """Runs subprocess skills concurrently with streaming output, timeouts and cancellation."""
+
+    def __init__(self, max_concurrency: int = 4, max_output_bytes: int = 1024 * 1024,
+                 line_limit: int = 64 * 1024, default_timeout: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.max_output_bytes = max_output_bytes
+        self.line_limit = line_limit
+        self.default_timeout = default_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._job_ids = itertools.count(1)
+        self.jobs: Dict[int, "asyncio.Future"] = {}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _pump(self, name: str, reader: asyncio.StreamReader, queue: asyncio.Queue):
+        while True:
+            try:
+                chunk = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                chunk = e.partial
+            except asyncio.LimitOverrunError as e:
+                # Deliver an over-long line in pieces instead of buffering it whole.
+                chunk = await reader.readexactly(min(e.consumed, self.line_limit) or 1)
+            if not chunk:
+                break
+            await queue.put((name, chunk.decode(errors="replace").rstrip("\n")))
+        await queue.put((name, None))
+
+    async def stream(self, skill: SubprocessSkill, param: str,
+                     timeout: Optional[float] = None) -> AsyncIterator[Tuple[str, str]]:
+        """Yield ("stdout" | "stderr", line) pairs, then ("exit", returncode).
+
+        Raises asyncio.TimeoutError if the skill runs past its timeout.
+        """
+        timeout = timeout or skill.timeout or self.default_timeout
+        async with self._get_semaphore():
+            process = await asyncio.create_subprocess_exec(
+                *skill.command(param), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                limit=self.line_limit)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+            pumps = [asyncio.ensure_future(self._pump("stdout", process.stdout, queue)),
+                     asyncio.ensure_future(self._pump("stderr", process.stderr, queue))]
+            loop = asyncio.get_running_loop()
+            deadline = None if timeout is None else loop.time() + timeout
+            open_streams = 2
+            try:
+                while open_streams:
+                    remaining = None if deadline is None else deadline - loop.time()
+                    if remaining is not None and remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    name, line = await asyncio.wait_for(queue.get(), remaining)
+                    if line is None:
+                        open_streams -= 1
+                    else:
+                        yield name, line
+                yield "exit", await process.wait()
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                for pump in pumps:
+                    pump.cancel()
+
+    async def run(self, skill: SubprocessSkill, param: str,
+                  on_line: Optional[Callable[[str, str], None]] = None,
+                  timeout: Optional[float] = None) -> SkillResult:
+        """Run a skill to completion, forwarding lines to `on_line` and keeping capped output."""
+        buffers = {"stdout": _TailBuffer(self.max_output_bytes), "stderr": _TailBuffer(self.max_output_bytes)}
+        result = SkillResult(returncode=None)
+        if getattr(skill, "pool", None) is not None:
+            return await self._run_pooled(skill, param, on_line, timeout, buffers, result)
+        lines = self.stream(skill, param, timeout)
+        try:
+            async for name, line in lines:
+                if name == "exit":
+                    result.returncode = line
+                    continue
+                buffers[name].append(line)
+                if on_line is not None:
+                    on_line(name, line)
+        except asyncio.TimeoutError:
+            result.timed_out = True
+            logging.warning(f"Skill {type(skill).__name__} timed out after {timeout or skill.timeout or self.default_timeout}s")
+        except asyncio.CancelledError:
+            result.cancelled = True
+            raise
+        finally:
+            await lines.aclose()
+            result.stdout = list(buffers["stdout"].lines)
+            result.stderr = list(buffers["stderr"].lines)
+            result.truncated = buffers["stdout"].truncated or buffers["stderr"].truncated
+        return result
+
+    async def _run_pooled(self, skill, param, on_line, timeout, buffers, result):
+        """Run a snippet on the skill's warm worker pool, streaming its lines like a subprocess."""
+        from sandbox import SandboxTimeout
+        timeout = timeout or skill.timeout or self.default_timeout
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        cancel = threading.Event()
+
+        def forward(name, line):
+            # Block the pool thread while the queue is full, so a slow consumer throttles the snippet.
+            future = asyncio.run_coroutine_threadsafe(queue.put((name, line)), loop)
+            while not cancel.is_set():
+                try:
+                    return future.result(timeout=0.1)
+                except concurrent.futures.TimeoutError:
+                    continue
+            future.cancel()
+
+        def execute():
+            try:
+                return skill.pool.execute(param, timeout=timeout, on_line=forward, cancel=cancel)
+            finally:
+                forward("exit", None)
+
+        async with self._get_semaphore():
+            pooled = loop.run_in_executor(None, execute)
+            try:
+                while True:
+                    name, line = await queue.get()
+                    if name == "exit":
+                        break
+                    buffers[name].append(line)
+                    if on_line is not None:
+                        on_line(name, line)
+                result.returncode = (await pooled)["returncode"]
+            except SandboxTimeout:
+                result.timed_out = True
+                logging.warning(f"Skill {type(skill).__name__} timed out after {timeout}s")
+            except asyncio.CancelledError:
+                result.cancelled = True
+                pooled.add_done_callback(lambda f: f.cancelled() or f.exception())
+                raise
+            finally:
+                # Kills the worker if the snippet is still running; a finished snippet is unaffected.
+                cancel.set()
+                result.stdout = list(buffers["stdout"].lines)
+                result.stderr = list(buffers["stderr"].lines)
+                result.truncated = buffers["stdout"].truncated or buffers["stderr"].truncated
+        return result
+
+    def start(self) -> "AsyncSkillRunner":
+        """Run the event loop in a daemon thread so synchronous code can submit jobs."""
+        if self._thread is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="AsyncSkillRunner", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, skill: SubprocessSkill, param: str,
+               on_line: Optional[Callable[[str, str], None]] = None,
+               timeout: Optional[float] = None) -> int:
+        """Schedule a skill on the background loop and return its job id."""
+        if self._loop is None:
+            raise RuntimeError("AsyncSkillRunner.start() must be called before submit().")
+        job_id = next(self._job_ids)
+        future = asyncio.run_coroutine_threadsafe(self.run(skill, param, on_line, timeout), self._loop)
+        self.jobs[job_id] = future
+        future.add_done_callback(lambda _: self.jobs.pop(job_id, None))
+        return job_id
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a running job; its subprocess or pooled worker is killed."""
+        future = self.jobs.get(job_id)
+        return future.cancel() if future is not None else False
+
+    def stop(self):
+        """Cancel outstanding jobs and stop the background loop."""
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = None
@@ -0,0 +1,185 @@
+"""
+Startup and import-time profiler for the MASTERMIND controllers.
+
+Enable it with `--profile-startup[=report.json]` on the command line or with
+`MASTERMIND_PROFILE_STARTUP=report.json` in the environment. While enabled, the
+profiler times every module import (inclusive and self time), plus any block
+wrapped in `section()`: config loading, agent module loads and `initialize()`
+calls. `finish()` logs a report sorted by cost and writes a JSON file that can
+be diffed across releases.
+
+Import this module before anything else so the heavy imports are captured.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import platform
+import threading
+import importlib.abc
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+ENV_VAR = "MASTERMIND_PROFILE_STARTUP"
+ARGUMENT = "--profile-startup"
+DEFAULT_REPORT = "startup_profile.json"
+
+_profiler = None
+
+
+class _TimedLoader:
+    """Loader proxy that times `exec_module` for the profiler."""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._loader, attribute)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._profiler.measure("import", self._name):
+            self._loader.exec_module(module)
+
+
+class _ImportFinder(importlib.abc.MetaPathFinder):
+    """Meta path finder that wraps the loader of every module found after it."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "busy", False):
+            return None
+        self._local.busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.busy = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self.profiler, fullname)
+        return spec
+
+
+class StartupProfiler:
+    """Collects timed startup events and reports them."""
+
+    def __init__(self, report_path: str = DEFAULT_REPORT):
+        self.report_path = report_path
+        self.started = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.finder = _ImportFinder(self)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.finished = False
+
+    def install(self):
+        sys.meta_path.insert(0, self.finder)
+
+    def uninstall(self):
+        if self.finder in sys.meta_path:
+            sys.meta_path.remove(self.finder)
+
+    @contextmanager
+    def measure(self, kind: str, name: str):
+        """Record the inclusive and self time of the enclosed block."""
+        stack = self._local.__dict__.setdefault("stack", [])
+        frame = {"children": 0.0}
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1]["children"] += elapsed
+            with self._lock:
+                self.events.append({
+                    "kind": kind,
+                    "name": name,
+                    "seconds": round(elapsed, 6),
+                    "self_seconds": round(elapsed - frame["children"], 6),
+                    "offset": round(start - self.started, 6),
+                })
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the machine-readable report."""
+        events = sorted(self.events, key=lambda e: e["self_seconds"], reverse=True)
+        totals: Dict[str, float] = {}
+        for event in events:
+            totals[event["kind"]] = round(totals.get(event["kind"], 0.0) + event["self_seconds"], 6)
+        return {
+            "python": platform.python_version(),
+            "argv": sys.argv,
+            "total_seconds": round(time.perf_counter() - self.started, 6),
+            "totals_by_kind": totals,
+            "events": events,
+        }
+
+    def finish(self, top: int = 25) -> Dict[str, Any]:
+        """Stop collecting, log the most expensive events and write the JSON report."""
+        self.uninstall()
+        self.finished = True
+        report = self.summary()
+        logging.info(f"Startup took {report['total_seconds']:.3f}s: {report['totals_by_kind']}")
+        for event in report["events"][:top]:
+            logging.info(f"{event['self_seconds'] * 1000:9.2f} ms self {event['seconds'] * 1000:9.2f} ms total"
+                         f"  {event['kind']:<10} {event['name']}")
+        with open(self.report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"Startup profile written to {self.report_path}")
+        return report
+
+
+def enable(report_path: str = DEFAULT_REPORT) -> StartupProfiler:
+    """Enable startup profiling for this process."""
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler(report_path)
+        _profiler.install()
+        atexit.register(finish)
+    return _profiler
+
+
+def enable_from_environment(argv: Optional[List[str]] = None) -> Optional[StartupProfiler]:
+    """Enable profiling if requested via `--profile-startup[=path]` or the environment."""
+    argv = sys.argv if argv is None else argv
+    for argument in argv:
+        if argument == ARGUMENT or argument.startswith(ARGUMENT + "="):
+            return enable(argument.partition("=")[2] or DEFAULT_REPORT)
+    if os.environ.get(ENV_VAR):
+        return enable(os.environ[ENV_VAR])
+    return None
+
+
+@contextmanager
+def section(kind: str, name: str):
+    """Time a startup step; a no-op unless profiling is enabled."""
+    if _profiler is None or _profiler.finished:
+        yield
+        return
+    with _profiler.measure(kind, name):
+        yield
+
+
+def finish() -> Optional[Dict[str, Any]]:
+    """Write the report if profiling is enabled and has not finished yet."""
+    if _profiler is None or _profiler.finished:
+        return None
+    return _profiler.finish()
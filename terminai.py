@@ -1,7 +1,11 @@
 import curses
-import requests
 import os
-import subprocess
+import sys
+from terminai_client import ChatClient, LocalChatClient, render_stream
+from terminai_cache import BYPASS_PREFIX, CachingChatClient
+from terminai_memory import ConversationMemory, extractive_summary
+from terminai_jobs import JobManager, render_job
+from terminai_view import ScrollbackView
 
 def get_api_key():
     env_file = './.env'
@@ -15,10 +19,17 @@ def get_api_key():
         return api_key
 
 class TerminAI:
-    def __init__(self, stdscr, api_key):
+    def __init__(self, stdscr, api_key, backend=None):
         self.stdscr = stdscr
         self.api_key = api_key
         self.setup_terminai_folder()
+        # Identical questions are answered from ./terminai/responses.sqlite3 or share one in-flight request
+        # `backend` is e.g. a LocalChatClient; the remote chat completions API is the default
+        self.client = CachingChatClient(backend or ChatClient(api_key))
+        # A local model serves one generation at a time, so summaries must not queue behind replies on it
+        self.memory = ConversationMemory(
+            summarizer=extractive_summary if isinstance(backend, LocalChatClient) else self.summarize)
+        self.jobs = JobManager()
         self.main()
 
     def setup_terminai_folder(self):
@@ -26,57 +37,119 @@ class TerminAI:
         os.makedirs(folder_path, exist_ok=True)
         os.chmod(folder_path, 0o700)
 
+    def build_messages(self, message):
+        # Recent turns that fit the token budget, plus a cached summary of older ones
+        return self.memory.build_messages("You are a helpful assistant.", message)
+
+    def summarize(self, previous_summary, turns):
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        return self.client.chat([
+            {"role": "system", "content": "Summarize this conversation in a few sentences. Keep facts, names and commands."},
+            {"role": "user", "content": f"{previous_summary}\n{transcript}"}
+        ])
+
+    def remember(self, message, response, truncated=False):
+        self.memory.add_turn("user", message)
+        self.memory.add_turn("assistant", response + ("\n[reply truncated]" if truncated else ""), truncated=truncated)
+
     def talk_to_ai(self, message):
-        api_url = "https://api.openai.com/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": message}
-            ]
-        }
-        response = requests.post(api_url, headers=headers, json=data)
-        response_json = response.json()
-        return response_json.get("choices", [{}])[0].get("message", {}).get("content", "")
+        response = self.client.chat(self.build_messages(message))
+        self.remember(message, response)
+        return response
+
+    def stream_reply(self, message):
+        # Draw tokens as they arrive; Esc cancels the reply
+        bypass = message.startswith(BYPASS_PREFIX)
+        if bypass:
+            message = message[len(BYPASS_PREFIX):]
+        self.view.addstr("AI: ")
+        handle = self.client.start_stream(self.build_messages(message), bypass=bypass)
+        response = render_stream(self.view, handle)
+        self.view.addstr("\n")
+        if response:
+            # A cancelled or failed reply is kept for context but marked as cut off
+            self.remember(message, response, truncated=handle.cancelled.is_set() or handle.error is not None)
+        return response
 
     def execute_command(self, command):
-        try:
-            result = subprocess.run(command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-            return result.stdout + result.stderr
-        except subprocess.CalledProcessError as e:
-            return f"An error occurred while executing the command: {e}"
+        job = self.jobs.start(command)
+        job.done.wait()
+        if job.returncode != 0:
+            return f"{job.output()}\nThe command exited with status {job.returncode}"
+        return job.output()
+
+    def run_command(self, command):
+        # Stream output as it arrives; Esc kills the command
+        self.view.addstr(f"Executed: {command}\nOutput:\n")
+        job = render_job(self.view, self.jobs.start(command))
+        self.view.addstr(f"[job {job.id} {job.status()}]\n")
+
+    def job_command(self, input_str):
+        # bg:<command> starts a background job; jobs, out <id>, kill <id> and forget <id> manage them
+        name, _, arg = input_str.partition(" ")
+        if name.startswith("bg:"):
+            job = self.jobs.start(input_str[3:])
+            self.view.addstr(f"[job {job.id} started]\n")
+        elif name == "jobs":
+            for job in self.jobs.jobs.values():
+                self.view.addstr(f"[{job.id}] {job.status():<10} {job.command}\n")
+        elif not arg.strip().isdigit() or self.jobs.get(int(arg)) is None:
+            self.view.addstr(f"No such job: {arg}\n")
+        elif name == "kill":
+            self.jobs.cancel(int(arg))
+            self.view.addstr(f"[job {arg} killed]\n")
+        elif name == "forget":
+            if self.jobs.forget(int(arg)):
+                self.view.addstr(f"[job {arg} forgotten]\n")
+            else:
+                self.view.addstr(f"[job {arg} is still running; kill it first]\n")
+        else:
+            job = self.jobs.get(int(arg))
+            if job.spilled:
+                self.view.addstr(f"[{job.spilled} earlier lines in {job.spill_path}]\n")
+            self.view.addstr(job.output() + "\n")
 
     def main(self):
         self.stdscr.clear()
-        self.stdscr.addstr("Welcome to TerminAI. Type 'exit' to quit, or type a command to execute it.\n")
-        self.stdscr.addstr("AI: How can I assist you today?\n")
-        curses.echo()
-        self.stdscr.keypad(True)
+        self.stdscr.refresh()
+        self.view = ScrollbackView(self.stdscr)
+        self.view.addstr("Welcome to TerminAI. Type 'exit' to quit, or type a command to execute it.\n")
+        self.view.addstr("PageUp/PageDown scroll, /text searches the history, Esc stops a reply or command.\n")
+        self.view.addstr(f"Start a question with {BYPASS_PREFIX} to skip the response cache.\n")
+        self.view.addstr("AI: How can I assist you today?\n")
 
         while True:
-            self.stdscr.addstr("> ")
-            input_str = self.stdscr.getstr().decode('utf-8')
+            input_str = self.view.read_line("> ")
+            if input_str.startswith("/"):
+                self.view.search(input_str[1:])
+                continue
+            self.view.follow()
+            self.view.addstr(f"> {input_str}\n")
 
             if input_str == 'exit':
                 break
             elif input_str.startswith("cmd:"):
-                command = input_str[4:]
-                output = self.execute_command(command)
-                self.stdscr.addstr(f"Executed: {command}\nOutput:\n{output}\n")
+                self.run_command(input_str[4:])
+            elif input_str.startswith("bg:") or input_str == "jobs" or (
+                    input_str.partition(" ")[0] in ("out", "kill", "forget") and input_str.partition(" ")[2].isdigit()):
+                self.job_command(input_str)
             else:
-                response = self.talk_to_ai(input_str)
-                self.stdscr.addstr(f"AI: {response}\n")
+                self.stream_reply(input_str)
 
-            self.stdscr.refresh()
+            self.view.refresh()
 
-        self.stdscr.addstr("Goodbye!")
-        self.stdscr.refresh()
-        self.stdscr.getch()
+        self.jobs.shutdown()
+        self.client.close()
+        self.view.addstr("Goodbye!")
+        self.view.refresh()
+        self.view.getch()
 
 if __name__ == '__main__':
-    api_key = get_api_key()  # Get the API key before initializing curses
-    curses.wrapper(TerminAI, api_key)
+    # python3 terminai.py --local [model.gguf] runs a local model instead of the remote API
+    if "--local" in sys.argv:
+        model_args = sys.argv[sys.argv.index("--local") + 1:]
+        backend = LocalChatClient.load(model_path=model_args[0] if model_args else None)  # Load before curses starts
+        curses.wrapper(TerminAI, None, backend)
+    else:
+        api_key = get_api_key()  # Get the API key before initializing curses
+        curses.wrapper(TerminAI, api_key)
@@ -0,0 +1,131 @@
+"""
+Response cache and in-flight request coalescing for TerminAI.
+
+`CachingChatClient` wraps `terminai_client.ChatClient`. A completed reply is
+stored in `./terminai/responses.sqlite3`, using `llm_cache.CompletionCache`
+for the TTL, the size-bounded LRU eviction and the hit statistics. The key
+hashes the model and every message after whitespace normalization, so the
+system prompt, the conversation summary and all recent turns are part of the
+key. A follow-up such as "why?" is therefore never answered with a reply
+given in another context. A repeated question hits only when its context is
+the same as well, e.g. the first question of a fresh conversation or a
+summarizer call over the same turns.
+
+If an identical request is already streaming, a second caller attaches to it
+and reads the same tokens instead of sending another request. Each caller
+can cancel on its own; the upstream request stops only when every caller has
+cancelled. Messages that start with `BYPASS_PREFIX` skip the cache and the
+coalescing, and are always sent fresh.
+"""
+
+import os
+import threading
+from functools import partial
+from typing import Dict, Iterator, List, Optional
+
+from llm_cache import CompletionCache, make_key
+from terminai_client import StreamHandle
+
+BYPASS_PREFIX = "!"
+
+
+def normalize_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return [{"role": message["role"], "content": " ".join(message["content"].split())} for message in messages]
+
+
+class _Flight:
+    """One upstream request shared by every caller waiting for the same reply."""
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.finished = False
+        self.error: Optional[Exception] = None
+        self.readers = 0
+        self.cancel = threading.Event()
+        self.cond = threading.Condition()
+
+
+class CachingChatClient:
+    """ChatClient wrapper with a persistent response cache and request coalescing."""
+
+    def __init__(self, client, folder: str = "./terminai", ttl: Optional[float] = 7 * 24 * 3600,
+                 max_bytes: int = 32 * 1024 * 1024):
+        self.client = client
+        self.model = client.model
+        self.cache = CompletionCache(os.path.join(folder, "responses.sqlite3"), max_bytes=max_bytes, ttl=ttl)
+        self.coalesced = 0
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, messages: List[Dict[str, str]]) -> str:
+        return make_key(self.model, {}, repr(normalize_messages(messages)))
+
+    def _fly(self, key: str, messages: List[Dict[str, str]], flight: _Flight):
+        try:
+            for token in self.client.stream_chat(messages, flight.cancel):
+                with flight.cond:
+                    flight.tokens.append(token)
+                    flight.cond.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            with flight.cond:
+                flight.finished = True
+                flight.cond.notify_all()
+            if flight.error is None and not flight.cancel.is_set():
+                self.cache.put(key, "".join(flight.tokens))
+
+    def stream_chat(self, messages: List[Dict[str, str]], cancel: Optional[threading.Event] = None,
+                    bypass: bool = False) -> Iterator[str]:
+        if bypass:
+            yield from self.client.stream_chat(messages, cancel)
+            return
+        key = self._key(messages)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                threading.Thread(target=self._fly, args=(key, messages, flight), daemon=True).start()
+            else:
+                self.coalesced += 1
+            flight.readers += 1
+        position = 0
+        try:
+            while True:
+                with flight.cond:
+                    flight.cond.wait_for(lambda: len(flight.tokens) > position or flight.finished, timeout=0.1)
+                    tokens = flight.tokens[position:]
+                    finished = flight.finished
+                if cancel is not None and cancel.is_set():
+                    return
+                for token in tokens:
+                    yield token
+                position += len(tokens)
+                if finished and position == len(flight.tokens):
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            with self._lock:
+                flight.readers -= 1
+                if flight.readers == 0 and not flight.finished:
+                    flight.cancel.set()
+
+    def chat(self, messages: List[Dict[str, str]], bypass: bool = False) -> str:
+        return "".join(self.stream_chat(messages, bypass=bypass))
+
+    def start_stream(self, messages: List[Dict[str, str]], bypass: bool = False) -> StreamHandle:
+        return StreamHandle(partial(self.stream_chat, bypass=bypass), messages)
+
+    def stats(self) -> Dict:
+        return dict(self.cache.stats(), coalesced=self.coalesced)
+
+    def close(self):
+        self.cache.close()
+        self.client.close()
@@ -0,0 +1,272 @@
+"""
+Streaming chat backends for TerminAI: a remote chat-completions client and a local GGUF model.
+
+`ChatClient` keeps one `requests.Session` with a connection pool, so turns
+after the first reuse the TLS connection. It requests `"stream": true` and
+yields content deltas as the server-sent events arrive. Every request has
+connect and read timeouts. `start_stream` runs a request on a background
+thread, so the curses loop can draw tokens as they arrive and cancel the
+request mid-stream.
+
+`LocalChatClient` has the same interface but runs a GGUF model in-process,
+loaded once per session from a file path or through `hflocal.load_hf_llm`,
+so TerminAI also works on hosts without network access. Replies go through
+`Llama.create_chat_completion`, so each model's own chat template is used.
+
+Run `python3 terminai_client.py --self-test` to exercise the client against a
+local mock server that speaks the same streaming protocol.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from queue import Empty, Queue
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://api.openai.com/v1/chat/completions"
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_LOCAL_REPO = "TheBloke/CodeLlama-7B-Instruct-GGUF"
+
+
+class ChatClientError(Exception):
+    """Raised when the chat completions API returns an error."""
+
+
+class ChatClient:
+    """Pooled, streaming client for an OpenAI-compatible chat completions endpoint."""
+
+    def __init__(self, api_key: str, api_url: str = API_URL, model: str = DEFAULT_MODEL,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0, pool_size: int = 4):
+        self.api_url = api_url
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"})
+
+    def stream_chat(self, messages: List[Dict[str, str]],
+                    cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        """Yield content deltas for `messages` until the reply ends or `cancel` is set."""
+        response = self.session.post(self.api_url, json={"model": self.model, "messages": messages, "stream": True},
+                                     stream=True, timeout=self.timeout)
+        try:
+            if response.status_code >= 400:
+                try:
+                    message = response.json().get("error", {}).get("message", response.text)
+                except ValueError:
+                    message = response.text
+                raise ChatClientError(f"{response.status_code}: {message}")
+            for line in response.iter_lines(decode_unicode=True):
+                if cancel is not None and cancel.is_set():
+                    return
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    # Keep reading to the end of the body so the connection goes back to the pool
+                    continue
+                delta = json.loads(data).get("choices", [{}])[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+        finally:
+            response.close()
+
+    def chat(self, messages: List[Dict[str, str]]) -> str:
+        return "".join(self.stream_chat(messages))
+
+    def start_stream(self, messages: List[Dict[str, str]]) -> "StreamHandle":
+        """Run `stream_chat` on a background thread; read tokens from the returned handle."""
+        return StreamHandle(self.stream_chat, messages)
+
+    def close(self):
+        self.session.close()
+
+
+class LocalChatClient:
+    """Chat backend running a local GGUF model that stays loaded for the whole session.
+
+    The model generates one reply at a time. It serves replies only: TerminAI
+    summarizes older turns without a model call when this backend is in use,
+    so background summaries never wait for the model or hold it.
+    """
+
+    def __init__(self, llama, max_tokens: int = 512, temperature: float = 0.2):
+        self.llama = llama
+        self.model = "local:" + os.path.basename(getattr(llama, "model_path", "gguf"))
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, model_path: Optional[str] = None, repo_id: str = DEFAULT_LOCAL_REPO,
+             context_window: int = 4096, **kwargs) -> "LocalChatClient":
+        """Load `model_path` directly, or resolve `repo_id` through hflocal without prompting.
+
+        Raises ChatClientError with the reason when no model can be loaded.
+        """
+        from hflocal import LocalModelError, load_hf_llm
+        try:
+            if model_path:
+                from llama_cpp import Llama
+                llama = Llama(model_path=model_path, n_ctx=context_window, verbose=False)
+            else:
+                llama = load_hf_llm(repo_id, context_window)
+        except ImportError:
+            raise ChatClientError("llama-cpp-python is not installed. Install it with `pip install llama-cpp-python`.")
+        except (LocalModelError, ValueError) as e:
+            raise ChatClientError(f"No local model could be loaded for {model_path or repo_id}: {e}") from e
+        return cls(llama, **kwargs)
+
+    def stream_chat(self, messages: List[Dict[str, str]],
+                    cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        # One llama.cpp context serves one generation at a time
+        with self._lock:
+            chunks = self.llama.create_chat_completion(messages, max_tokens=self.max_tokens,
+                                                       temperature=self.temperature, stream=True)
+            try:
+                for chunk in chunks:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    # The first delta only carries the role
+                    text = chunk["choices"][0]["delta"].get("content")
+                    if text:
+                        yield text
+            finally:
+                chunks.close()
+
+    def chat(self, messages: List[Dict[str, str]]) -> str:
+        return "".join(self.stream_chat(messages))
+
+    def start_stream(self, messages: List[Dict[str, str]]) -> "StreamHandle":
+        return StreamHandle(self.stream_chat, messages)
+
+    def close(self):
+        pass
+
+
+class StreamHandle:
+    """A streaming reply running on a background thread."""
+
+    def __init__(self, stream, messages: List[Dict[str, str]]):
+        self.tokens: Queue = Queue()
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+        self.text = ""
+        self._thread = threading.Thread(target=self._run, args=(stream, messages), daemon=True)
+        self._thread.start()
+
+    def _run(self, stream, messages):
+        try:
+            for token in stream(messages, self.cancelled):
+                self.text += token
+                self.tokens.put(token)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def drain(self, timeout: float = 0.05) -> List[str]:
+        """Return the tokens received so far, waiting up to `timeout` for the first one."""
+        tokens = []
+        try:
+            tokens.append(self.tokens.get(timeout=timeout))
+            while True:
+                tokens.append(self.tokens.get_nowait())
+        except Empty:
+            pass
+        return tokens
+
+
+def render_stream(stdscr, handle: StreamHandle, cancel_keys=(27,)) -> str:
+    """Draw a streaming reply into a curses window; Esc cancels. Returns the text received."""
+    stdscr.nodelay(True)
+    try:
+        while not (handle.done.is_set() and handle.tokens.empty()):
+            tokens = handle.drain()
+            if tokens:
+                stdscr.addstr("".join(tokens))
+                stdscr.refresh()
+            if stdscr.getch() in cancel_keys:
+                handle.cancel()
+                stdscr.addstr(" [cancelled]")
+                break
+    finally:
+        stdscr.nodelay(False)
+    if handle.error is not None:
+        stdscr.addstr(f"[error: {handle.error}]")
+    return handle.text
+
+
+def self_test():
+    """Stream and cancel replies from a local mock SSE server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    words = ["Hello", " from", " the", " mock", " server", "."] * 20
+    connections = set()
+
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            connections.add(self.client_address)
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            assert request["stream"] is True
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for word in words:
+                    self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n")
+                    time.sleep(0.002)
+                self._chunk("data: [DONE]\n\n")
+                self._chunk("")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _chunk(self, text):
+            data = text.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ChatClient("test-key", api_url=f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions")
+    try:
+        messages = [{"role": "user", "content": "hi"}]
+        assert client.chat(messages) == "".join(words)
+        assert client.chat(messages) == "".join(words)
+        assert len(connections) == 1, f"expected one pooled connection, saw {len(connections)}"
+
+        handle = client.start_stream(messages)
+        while len(handle.text) < 20:
+            time.sleep(0.001)
+        handle.cancel()
+        handle.done.wait(5)
+        assert handle.done.is_set() and len(handle.text) < len("".join(words)), "cancel did not stop the stream"
+        print(f"self-test passed: streamed {len(words)} tokens twice over one connection, cancelled after "
+              f"{len(handle.text)} characters")
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--self-test":
+        self_test()
+    else:
+        print(__doc__)
@@ -0,0 +1,192 @@
+"""
+Streaming, cancellable shell jobs for TerminAI's cmd: mode.
+
+Each command runs in its own process group with stdout and stderr merged. A
+reader thread moves output line by line into a bounded scrollback that the UI
+drains as lines arrive. Lines pushed out of the scrollback are written to
+`./terminai/jobs/<session>-<id>.log`, so a command with huge output uses a
+fixed amount of memory while nothing is lost. Job IDs restart at 1 in every
+session, so the session prefix keeps one run's output out of another's file.
+Finished jobs and their files are kept until the user forgets them, until
+more than `max_finished` finished jobs pile up (the oldest go first), or
+until the session shuts down. Any number of jobs can run in the background
+at once, each under a numeric job ID.
+"""
+
+import os
+import time
+import signal
+import logging
+import threading
+import subprocess
+from collections import deque
+from queue import Empty, Full, Queue
+from typing import Dict, List, Optional
+
+LINE_LIMIT = 4096
+
+
+class Job:
+    """A running shell command and its captured output."""
+
+    def __init__(self, job_id: int, command: str, spill_path: str, scrollback_lines: int):
+        self.id = job_id
+        self.command = command
+        self.spill_path = spill_path
+        self.scrollback = deque(maxlen=scrollback_lines)
+        self.spilled = 0
+        # Lines not yet shown; bounded so an unwatched background job cannot grow it forever
+        self.pending: Queue = Queue(maxsize=scrollback_lines)
+        self.dropped = 0
+        self.done = threading.Event()
+        self.returncode: Optional[int] = None
+        self.cancelled = False
+        self._spill = None
+        self.process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        stdin=subprocess.DEVNULL, start_new_session=True)
+        self._reader = threading.Thread(target=self._read, name=f"TerminAIJob-{job_id}", daemon=True)
+        self._reader.start()
+
+    def _keep(self, line: str):
+        if len(self.scrollback) == self.scrollback.maxlen:
+            if self._spill is None:
+                self._spill = open(self.spill_path, "w")
+            self._spill.write(self.scrollback[0] + "\n")
+            self.spilled += 1
+        self.scrollback.append(line)
+        try:
+            self.pending.put_nowait(line)
+        except Full:
+            self.dropped += 1
+
+    def _read(self):
+        try:
+            for raw in iter(lambda: self.process.stdout.readline(LINE_LIMIT), b""):
+                self._keep(raw.decode(errors="replace").rstrip("\n"))
+        finally:
+            self.process.stdout.close()
+            self.returncode = self.process.wait()
+            if self._spill is not None:
+                self._spill.close()
+            self.done.set()
+
+    @property
+    def running(self) -> bool:
+        return not self.done.is_set()
+
+    def cancel(self):
+        """Kill the command and everything it started."""
+        if self.process.poll() is None:
+            self.cancelled = True
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def discard(self, timeout: float = 1.0):
+        """Cancel the job and delete its spill file."""
+        self.cancel()
+        self.done.wait(timeout)
+        try:
+            os.remove(self.spill_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Could not delete {self.spill_path}: {e}")
+
+    def drain(self, timeout: float = 0.05) -> List[str]:
+        """Return lines produced since the last drain, waiting up to `timeout` for the first one."""
+        lines = []
+        try:
+            lines.append(self.pending.get(timeout=timeout))
+            while True:
+                lines.append(self.pending.get_nowait())
+        except Empty:
+            pass
+        return lines
+
+    def output(self) -> str:
+        """Output kept in memory; earlier lines are in `spill_path` when `spilled` is non-zero."""
+        return "\n".join(self.scrollback)
+
+    def status(self) -> str:
+        if self.running:
+            return "running"
+        return "cancelled" if self.cancelled else f"exit {self.returncode}"
+
+
+class JobManager:
+    """Starts, tracks and cancels TerminAI shell jobs."""
+
+    def __init__(self, folder: str = "./terminai", scrollback_lines: int = 2000, max_finished: int = 50):
+        self.directory = os.path.join(folder, "jobs")
+        os.makedirs(self.directory, exist_ok=True)
+        self.scrollback_lines = scrollback_lines
+        self.max_finished = max_finished
+        self.jobs: Dict[int, Job] = {}
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def start(self, command: str) -> Job:
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+        job = Job(job_id, command, os.path.join(self.directory, f"{self.session}-{job_id}.log"), self.scrollback_lines)
+        self.jobs[job_id] = job
+        self._prune()
+        return job
+
+    def _prune(self):
+        # Job IDs increase, so dict order is oldest first
+        finished = [job_id for job_id, job in self.jobs.items() if not job.running]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            self.jobs.pop(job_id).discard()
+
+    def get(self, job_id: int) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: int) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or not job.running:
+            return False
+        job.cancel()
+        return True
+
+    def forget(self, job_id: int) -> bool:
+        """Drop a finished job and delete its spill file."""
+        job = self.jobs.get(job_id)
+        if job is None or job.running:
+            return False
+        self.jobs.pop(job_id).discard()
+        return True
+
+    def forget_finished(self):
+        for job_id in [job_id for job_id, job in self.jobs.items() if not job.running]:
+            self.forget(job_id)
+
+    def shutdown(self):
+        """Kill every job and delete this session's spill files."""
+        for job in self.jobs.values():
+            job.cancel()
+        for job in self.jobs.values():
+            job.discard()
+        self.jobs.clear()
+
+
+def render_job(stdscr, job: Job, cancel_keys=(27,)) -> Job:
+    """Stream a job's output into a curses window until it exits; Esc cancels it."""
+    stdscr.nodelay(True)
+    try:
+        while job.running or not job.pending.empty():
+            lines = job.drain()
+            if lines:
+                stdscr.addstr("\n".join(lines) + "\n")
+                stdscr.refresh()
+            if job.running and stdscr.getch() in cancel_keys:
+                job.cancel()
+    finally:
+        stdscr.nodelay(False)
+    if job.dropped:
+        stdscr.addstr(f"[{job.dropped} lines were not shown; type 'out {job.id}' or see {job.spill_path}]\n")
+    return job
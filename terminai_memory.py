@@ -0,0 +1,199 @@
+"""
+Token-budgeted conversation memory for TerminAI.
+
+Every turn is appended as one JSON line to
+`./terminai/conversations/<id>.jsonl`, so saving a turn costs one small write
+and resuming only replays the file. `build_messages` sends the system prompt,
+a summary of older turns and as many recent turns as fit in the token budget.
+
+Older turns are summarized in fixed blocks. Each block summary extends the
+previous one, is stored in the same log, and is never computed again. Tokens
+are counted with tiktoken when it is installed and estimated otherwise. Each
+turn's count is stored with it, so a turn is only counted once.
+
+`build_messages` never waits for the summarizer. It uses the newest summary
+that is already computed, plus the recent turns that fit the budget, and
+starts at most one block summary per call on a background thread. A resumed
+long conversation therefore catches up one block per turn, and the question
+is never held back behind summary calls.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+NO_SUMMARY = {"type": "summary", "upto": 0, "text": "", "tokens": 0}
+_encoders: Dict[str, object] = {}
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count tokens with tiktoken if available, else estimate about four characters per token."""
+    encoder = _encoders.get(model)
+    if encoder is None and model not in _encoders:
+        try:
+            import tiktoken
+            try:
+                encoder = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoder = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            encoder = None
+        _encoders[model] = encoder
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def extractive_summary(previous: str, turns: List[Dict], max_chars: int = 200) -> str:
+    """Summarize turns without a model call by keeping the start of each one."""
+    lines = [previous] if previous else []
+    for turn in turns:
+        content = " ".join(turn["content"].split())
+        lines.append(f"{turn['role']}: {content[:max_chars]}{'...' if len(content) > max_chars else ''}")
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """Sliding-window conversation history with cached block summaries and an append-only log."""
+
+    def __init__(self, conversation_id: str = "default", folder: str = "./terminai", budget: int = 3000,
+                 summary_budget: int = 500, block_size: int = 8, model: str = "gpt-3.5-turbo",
+                 summarizer: Optional[Callable[[str, List[Dict]], str]] = None):
+        self.conversation_id = conversation_id
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.block_size = block_size
+        self.model = model
+        self.summarizer = summarizer or extractive_summary
+        self.turns: List[Dict] = []
+        self.summaries: Dict[int, Dict] = {}
+        self._lock = threading.RLock()
+        self._worker: Optional[threading.Thread] = None
+        self._generation = 0  # bumped by load() and clear() so a stale background summary is discarded
+        directory = os.path.join(folder, "conversations")
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{conversation_id}.jsonl")
+        self.load()
+
+    def load(self):
+        """Replay the conversation log."""
+        with self._lock:
+            self._generation += 1
+            self.turns, self.summaries = [], {}
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted write
+                    continue
+                if record.get("type") == "summary":
+                    self.summaries[record["upto"]] = record
+                else:
+                    self.turns.append(record)
+
+    def _append(self, record: Dict):
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def add_turn(self, role: str, content: str, truncated: bool = False) -> Dict:
+        """Record a turn; `truncated` marks a reply that was cancelled or failed mid-stream."""
+        turn = {"role": role, "content": content, "tokens": self.tokens(content), "ts": time.time()}
+        if truncated:
+            turn["truncated"] = True
+        with self._lock:
+            self.turns.append(turn)
+            self._append(turn)
+        return turn
+
+    def tokens(self, text: str) -> int:
+        return count_tokens(text, self.model) + MESSAGE_OVERHEAD_TOKENS
+
+    def ready_summary(self, upto: int) -> Dict:
+        """The newest summary already computed that covers at most turns[:upto]."""
+        with self._lock:
+            done = [covered for covered in self.summaries if covered <= upto]
+            return self.summaries[max(done)] if done else NO_SUMMARY
+
+    def _summarize_block(self, previous: Dict, block: List[Dict], generation: int) -> Dict:
+        """Extend `previous` with one block of turns and store the result."""
+        try:
+            text = self.summarizer(previous["text"], block)
+        except Exception as e:
+            logging.warning(f"Summarizer failed, keeping an extractive summary: {e}")
+            text = extractive_summary(previous["text"], block)
+        # Keep the most recent part of the rolling summary within its budget
+        while self.tokens(text) > self.summary_budget and len(text) > 1:
+            text = text[len(text) // 4:]
+        record = {"type": "summary", "upto": previous["upto"] + len(block), "text": text, "tokens": self.tokens(text)}
+        with self._lock:
+            if generation == self._generation and record["upto"] not in self.summaries:
+                self.summaries[record["upto"]] = record
+                self._append(record)
+        return record
+
+    def _schedule(self, upto: int):
+        """Summarize the next missing block below `upto` on a background thread, unless one is running."""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            previous = self.ready_summary(upto)
+            if previous["upto"] >= upto:
+                return
+            block = self.turns[previous["upto"]:previous["upto"] + self.block_size]
+            self._worker = threading.Thread(target=self._summarize_block, args=(previous, block, self._generation),
+                                            name="TerminAISummary", daemon=True)
+            self._worker.start()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for a background summary to finish."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def summary(self, upto: int) -> Dict:
+        """Summary of turns[:upto], computing any missing blocks now; `upto` is a multiple of block_size."""
+        record = self.ready_summary(upto)
+        while record["upto"] < upto:
+            block = self.turns[record["upto"]:record["upto"] + self.block_size]
+            record = self._summarize_block(record, block, self._generation)
+        return record
+
+    def build_messages(self, system_prompt: str, message: str) -> List[Dict[str, str]]:
+        """Messages for the next request, within the token budget."""
+        available = self.budget - self.tokens(system_prompt) - self.tokens(message) - self.summary_budget
+        start = len(self.turns)
+        used = 0
+        while start > 0 and used + self.turns[start - 1]["tokens"] <= available:
+            start -= 1
+            used += self.turns[start]["tokens"]
+        # Round the summarized prefix up to a block boundary so block summaries are reused. If no
+        # complete block reaches `start`, turns between the last boundary and `start` are dropped.
+        upto = -(-start // self.block_size) * self.block_size
+        if upto > len(self.turns):
+            upto = len(self.turns) // self.block_size * self.block_size
+        # Until the summary reaches `upto`, send what is summarized so far plus the turns that fit
+        summary = self.ready_summary(upto)
+        if summary["upto"] < upto:
+            self._schedule(upto)
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary["text"]:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary['text']}"})
+        messages.extend({"role": turn["role"], "content": turn["content"]}
+                        for turn in self.turns[max(summary["upto"], start):])
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.turns, self.summaries = [], {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,203 @@
+"""
+Virtualized scrollback view for the TerminAI curses UI.
+
+Output is kept as wrapped screen lines in a bounded ring buffer. Only the
+rows of the viewport are drawn, into a pad the size of the screen, and a row
+is rewritten only when its text changed since the last refresh. The cost of a
+redraw therefore depends on the window size, not the session length. The
+bottom row is the input line.
+
+`ScrollbackView` has the same `addstr`/`refresh`/`nodelay`/`getch` methods
+as a curses window, so the streaming renderers can draw into it directly.
+While typing, PageUp/PageDown (or the arrow keys) scroll the history, and
+`/text` searches backwards for `text`.
+
+Lines are wrapped by display width, not by character count: wide characters
+(CJK, emoji) take two columns and combining marks none. wcwidth is used when
+installed, and unicodedata otherwise. ANSI escape sequences are dropped and
+other control characters are shown in caret notation (`^C`) before text is
+stored, so nothing written to the pad moves the cursor.
+"""
+
+import re
+import curses
+import unicodedata
+from collections import deque
+from typing import List, Optional
+
+try:
+    from wcwidth import wcwidth
+except ImportError:
+    wcwidth = None
+
+SCROLL_KEYS = {curses.KEY_PPAGE: "page_up", curses.KEY_NPAGE: "page_down",
+               curses.KEY_UP: "line_up", curses.KEY_DOWN: "line_down"}
+ANSI_ESCAPE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+
+
+def char_width(char: str) -> int:
+    """Number of terminal columns `char` takes."""
+    if wcwidth is not None:
+        return max(0, wcwidth(char))
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf"):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def display_width(text: str) -> int:
+    return sum(char_width(char) for char in text)
+
+
+def sanitize(text: str) -> str:
+    """Drop ANSI escapes and carriage returns, expand tabs and show other control characters as ^X."""
+    text = ANSI_ESCAPE.sub("", text).replace("\r", "").replace("\t", "    ")
+    return "".join(char if char == "\n" or unicodedata.category(char) != "Cc"
+                   else "^" + chr(ord(char) ^ 0x40) if ord(char) < 0x80 else "?"
+                   for char in text)
+
+
+def tail_to_width(text: str, width: int) -> str:
+    """The longest end of `text` that fits in `width` columns."""
+    used = 0
+    for index in range(len(text) - 1, -1, -1):
+        used += char_width(text[index])
+        if used > width:
+            return text[index + 1:]
+    return text
+
+
+class ScrollbackView:
+    """Ring-buffered, pad-backed scrollback with an input line."""
+
+    def __init__(self, stdscr, max_lines: int = 10000):
+        self.stdscr = stdscr
+        self.lines = deque([""], maxlen=max_lines)
+        self.offset = 0  # lines scrolled up from the bottom
+        self.highlight: Optional[str] = None
+        self._last_match: Optional[int] = None
+        self._resize()
+
+    def _resize(self):
+        self.height, self.width = self.stdscr.getmaxyx()
+        self.rows = max(1, self.height - 1)
+        self.pad = curses.newpad(self.rows, self.width)
+        self.input = curses.newwin(1, self.width, self.height - 1, 0)
+        self.input.keypad(True)
+        self._drawn: List[Optional[str]] = [None] * self.rows
+
+    # Window-like interface used by render_stream and render_job
+
+    def addstr(self, text: str):
+        """Append text; a partial line keeps growing until a newline arrives."""
+        limit = max(2, self.width - 1)
+        for i, part in enumerate(sanitize(text).split("\n")):
+            if i:
+                self._new_line()
+            current = self.lines[-1]
+            used = display_width(current)
+            for char in part:
+                width = char_width(char)
+                if used + width > limit:
+                    self.lines[-1] = current
+                    self._new_line()
+                    current, used = "", 0
+                current += char
+                used += width
+            self.lines[-1] = current
+
+    def _new_line(self):
+        self.lines.append("")
+        if self.offset:
+            self.offset += 1  # keep a scrolled-back viewport where it is
+
+    def refresh(self):
+        """Redraw the rows whose content changed."""
+        end = len(self.lines) - self.offset
+        start = max(0, end - self.rows)
+        visible = [self.lines[i] for i in range(start, end)]
+        visible += [""] * (self.rows - len(visible))
+        for row, text in enumerate(visible):
+            if self._drawn[row] == text:
+                continue
+            self.pad.move(row, 0)
+            self.pad.clrtoeol()
+            attr = curses.A_REVERSE if self.highlight and self.highlight in text else curses.A_NORMAL
+            try:
+                self.pad.addstr(row, 0, text, attr)
+            except curses.error:
+                # Lines wrapped for a wider window before a resize; curses drew what fits
+                pass
+            self._drawn[row] = text
+        self.pad.noutrefresh(0, 0, 0, 0, self.rows - 1, self.width - 1)
+        self.input.noutrefresh()
+        curses.doupdate()
+
+    def nodelay(self, flag: bool):
+        self.input.nodelay(flag)
+
+    def getch(self) -> int:
+        key = self.input.getch()
+        if key in SCROLL_KEYS:
+            self.scroll(SCROLL_KEYS[key])
+        return key
+
+    # Scrolling and search
+
+    def scroll(self, action: str):
+        step = {"page_up": self.rows - 1, "page_down": -(self.rows - 1), "line_up": 1, "line_down": -1}[action]
+        self.offset = min(max(0, self.offset + step), max(0, len(self.lines) - self.rows))
+        self.refresh()
+
+    def search(self, text: str) -> bool:
+        """Scroll back to the previous line containing `text`; returns False if there is none.
+
+        Searching for the same text again continues from the last match.
+        """
+        if text == self.highlight and self._last_match is not None:
+            begin = self._last_match - 1
+        else:
+            begin = len(self.lines) - self.offset - 1
+        self.highlight = text
+        self._drawn = [None] * self.rows
+        for index in range(min(begin, len(self.lines) - 1), -1, -1):
+            if text in self.lines[index]:
+                self._last_match = index
+                self.offset = min(max(0, len(self.lines) - index - self.rows // 2), max(0, len(self.lines) - self.rows))
+                self.refresh()
+                return True
+        self.refresh()
+        return False
+
+    def follow(self):
+        """Jump back to the newest output."""
+        self.offset = 0
+        self.highlight = self._last_match = None
+        self._drawn = [None] * self.rows
+
+    # Input line
+
+    def read_line(self, prompt: str = "> ") -> str:
+        """Read a line from the input row while scroll keys keep working."""
+        buffer = []
+        self.input.nodelay(False)
+        while True:
+            self.input.erase()
+            try:
+                self.input.addstr(0, 0, tail_to_width(prompt + "".join(buffer), self.width - 1))
+            except curses.error:
+                pass
+            self.refresh()
+            key = self.input.get_wch()
+            if key in ("\n", "\r") or key == curses.KEY_ENTER:
+                line = "".join(buffer)
+                self.input.erase()
+                return line
+            if key in ("\b", "\x7f") or key == curses.KEY_BACKSPACE:
+                if buffer:
+                    buffer.pop()
+            elif key == curses.KEY_RESIZE:
+                self._resize()
+            elif key in SCROLL_KEYS:
+                self.scroll(SCROLL_KEYS[key])
+            elif isinstance(key, str) and key.isprintable():
+                buffer.append(key)